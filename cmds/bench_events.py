@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark of the events handling, it measures the number of log and check events per second:
+
+- that can be built and dispatched to a listener (without any test being run),
+- that are handled within a test session (the tests doing nothing but logging and checking).
+
+Usage: bench_events.py [--events N] [--tests N] [--threads N]
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import lemoncheesecake.api as lcc
+from lemoncheesecake import runner
+from lemoncheesecake.events import SyncEventManager, AsyncEventManager, LogEvent, CheckEvent
+from lemoncheesecake.fixture import FixtureRegistry
+from lemoncheesecake.reporting import ReportLocation
+from lemoncheesecake.reporting.backends import JsonBackend
+from lemoncheesecake.reporting.savingstrategy import make_report_saving_strategy, DEFAULT_REPORT_SAVING_STRATEGY
+from lemoncheesecake.session import Session
+from lemoncheesecake.suite import load_suites_from_classes
+
+
+class _Listener:
+    def __init__(self):
+        self.nb_events = 0
+
+    def on_log(self, _):
+        self.nb_events += 1
+
+    def on_check(self, _):
+        self.nb_events += 1
+
+
+def bench_dispatch(nb_events):
+    event_manager = SyncEventManager.load()
+    listener = _Listener()
+    event_manager.add_listener(listener)
+    location = ReportLocation.in_test(("suite", "test"))
+
+    start_time = time.perf_counter()
+    for i in range(nb_events // 2):
+        event_manager.fire(LogEvent(location, "step", 0, "info", "message"))
+        event_manager.fire(CheckEvent(location, "step", 0, "check", True, "details"))
+    duration = time.perf_counter() - start_time
+
+    assert listener.nb_events == nb_events // 2 * 2
+    return listener.nb_events / duration
+
+
+def _make_suite(nb_tests, nb_events_per_test):
+    @lcc.suite()
+    class suite:
+        pass
+
+    def make_test(name):
+        def test(_):
+            for i in range(nb_events_per_test // 2):
+                lcc.log_info("message")
+                lcc.log_check("check", True, "details")
+        test.__name__ = name
+        return test
+
+    for i in range(nb_tests):
+        name = "test_%d" % i
+        setattr(suite, name, lcc.test("Test %d" % i)(make_test(name)))
+
+    return load_suites_from_classes([suite])
+
+
+def bench_session(nb_events, nb_tests, nb_threads):
+    suites = _make_suite(nb_tests, nb_events // nb_tests)
+    report_dir = tempfile.mkdtemp()
+    try:
+        session = Session.create(
+            AsyncEventManager.load(), [JsonBackend()], report_dir,
+            make_report_saving_strategy(DEFAULT_REPORT_SAVING_STRATEGY), nb_threads=nb_threads
+        )
+        runner.run_suites(suites, FixtureRegistry(), session, nb_threads=nb_threads)
+    finally:
+        shutil.rmtree(report_dir)
+    return session.event_manager.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the events handling")
+    parser.add_argument("--events", type=int, default=200000, help="Number of log and check events")
+    parser.add_argument("--tests", type=int, default=100, help="Number of tests (in session mode)")
+    parser.add_argument("--threads", type=int, default=1, help="Number of threads (in session mode)")
+    args = parser.parse_args()
+
+    print("dispatch: %.0f events/s" % bench_dispatch(args.events))
+    print("session: %s" % bench_session(args.events, args.tests, args.threads))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ import lemoncheesecake.api as lcc
 """
 
 from lemoncheesecake.suite import Test, add_test_into_suite, \
-    get_metadata, suite, test, tags, prop, link, disabled, visible_if, hidden, depends_on, inject_fixture, parametrized
+    get_metadata, suite, test, tags, prop, link, disabled, visible_if, hidden, depends_on, inject_fixture, parametrized, \
+    resource, timeout, tests_with_tag, tests_in_suite
 from lemoncheesecake.session import set_step, detached_step, end_step, log_debug, log_info, log_warning, log_error, \
     log_check, prepare_attachment, prepare_image_attachment, save_attachment_file, save_image_file, \
     save_attachment_content, save_image_content, log_url, add_report_info, Thread
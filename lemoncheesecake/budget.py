@@ -0,0 +1,158 @@
+"""
+Select the tests of a test session that fit within a time budget (for instance, for a quick pre-merge check).
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from lemoncheesecake.exceptions import LemoncheesecakeException, UserError
+from lemoncheesecake.filter import FromTestsFilter
+from lemoncheesecake.history import Durations
+from lemoncheesecake.suite import Suite, Test, resolve_tests_dependencies
+from lemoncheesecake.testtree import filter_suites, flatten_tests
+
+PRIORITY_PROPERTY = "priority"
+
+_TIME_BUDGET_PATTERN = re.compile(r"^(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m)?(?:(\d+(?:\.\d+)?)s?)?$")
+
+
+def parse_time_budget(time_budget: str) -> float:
+    """
+    Parse a time budget expression such as "90", "90s", "10m" or "1h30m" into a number of seconds.
+    """
+    match = _TIME_BUDGET_PATTERN.match(time_budget)
+    if not time_budget or not match:
+        raise LemoncheesecakeException("Invalid time budget '%s' (expect for instance 90s, 10m or 1h30m)" % time_budget)
+    hours, minutes, seconds = (float(value) if value else 0 for value in match.groups())
+    seconds = hours * 3600 + minutes * 60 + seconds
+    if seconds <= 0:
+        raise LemoncheesecakeException("Invalid time budget '%s' (expect a duration greater than 0)" % time_budget)
+    return seconds
+
+
+def get_test_priority(test: Test) -> float:
+    """
+    Get the priority of the test from its ``priority`` property (or from the one of its suites), default is 1.
+    """
+    priority = test.hierarchy_properties.get(PRIORITY_PROPERTY, 1)
+    try:
+        priority = float(priority)
+    except ValueError:
+        raise LemoncheesecakeException(
+            "Invalid priority '%s' for test '%s' (expect a number)" % (priority, test.path)
+        )
+    if priority < 0:
+        raise LemoncheesecakeException(
+            "Invalid priority '%s' for test '%s' (expect a positive number)" % (priority, test.path)
+        )
+    return priority
+
+
+class _Selection:
+    def __init__(self, durations):
+        self.durations = durations
+        self.tests = set()
+        self.suites = set()
+        self.cost = 0
+        self.value = 0
+
+    def get_marginal_cost(self, tests):
+        cost = 0
+        suites = set()
+        for test in tests:
+            if test in self.tests:
+                continue
+            cost += self.durations.get_test_duration(test.path)
+            for suite in test.parent_suite.hierarchy:
+                if suite not in self.suites and suite not in suites:
+                    suites.add(suite)
+                    cost += self.durations.get_suite_setup_duration(suite.path) + \
+                        self.durations.get_suite_teardown_duration(suite.path)
+        return cost
+
+    def add(self, tests, priorities):
+        self.cost += self.get_marginal_cost(tests)
+        for test in tests:
+            if test not in self.tests:
+                self.tests.add(test)
+                self.value += priorities[test]
+                self.suites.update(test.parent_suite.hierarchy)
+
+
+def _get_dependency_closures(tests):
+    # NB: the resolved dependencies may be the tests of all the suites, they are looked up through their path
+    tests_by_path = {test.path: test for test in tests}
+    closures = {}
+    for test in tests:
+        closure = [test]
+        seen = {test.path}
+        for closure_test in closure:
+            for dependency in closure_test.resolved_dependencies:
+                if dependency.path not in seen:
+                    seen.add(dependency.path)
+                    closure.append(tests_by_path[dependency.path])
+        closures[test] = closure
+    return closures
+
+
+def select_tests_within_budget(suites: Sequence[Suite], budget: float, nb_threads: int = 1,
+                               durations: Optional[Durations] = None) -> Tuple[List[Test], float]:
+    """
+    Select the tests that fit within ``budget`` seconds of a test run using ``nb_threads`` threads (the tests
+    are assumed to be spread evenly over the threads) while maximizing the sum of their priorities
+    (see :py:func:`get_test_priority`).
+
+    A test is only selected along with the tests it depends on, and the setup and teardown durations of
+    a suite are counted once, along with its first selected test. This knapsack problem is solved greedily,
+    picking first the tests bringing the most priority per second, the greedy solution is then compared
+    to the most valuable test that fits on its own. The tests durations are taken from ``durations``
+    (the durations of the tests that are not known are estimated).
+
+    The selected tests are returned in their original order along with their estimated total duration.
+    The tests dependencies must have been resolved (see :py:func:`resolve_tests_dependencies`).
+    """
+    if durations is None:
+        durations = Durations()
+    capacity = budget * nb_threads
+
+    tests = list(flatten_tests(suites))
+    priorities = {test: get_test_priority(test) for test in tests}
+    closures = _get_dependency_closures(tests)
+
+    empty_selection = _Selection(durations)
+    standalone_costs = {test: empty_selection.get_marginal_cost(closures[test]) for test in tests}
+    standalone_values = {test: sum(priorities[t] for t in closures[test]) for test in tests}
+
+    def get_density(test):
+        cost = standalone_costs[test]
+        return standalone_values[test] / cost if cost > 0 else float("inf")
+
+    selection = _Selection(durations)
+    for test in sorted(tests, key=lambda t: -get_density(t)):  # NB: sorted is stable, ties keep the test order
+        if test not in selection.tests and \
+                selection.cost + selection.get_marginal_cost(closures[test]) <= capacity:
+            selection.add(closures[test], priorities)
+
+    fitting_tests = [test for test in tests if standalone_costs[test] <= capacity]
+    if fitting_tests:
+        best_test = max(fitting_tests, key=lambda t: standalone_values[t])
+        if standalone_values[best_test] > selection.value:
+            selection = _Selection(durations)
+            selection.add(closures[best_test], priorities)
+
+    return [test for test in tests if test in selection.tests], selection.cost / nb_threads
+
+
+def get_time_budget_suites(suites: Sequence[Suite], all_suites: Sequence[Suite], budget: float, nb_threads: int = 1,
+                           durations: Optional[Durations] = None) -> Tuple[List[Suite], List[Test], float]:
+    """
+    Get the suites restricted to the tests selected by :py:func:`select_tests_within_budget`, along with
+    the dropped tests and the estimated duration of the selected tests.
+    """
+    resolve_tests_dependencies(suites, all_suites)
+    selected_tests, estimated_duration = select_tests_within_budget(suites, budget, nb_threads, durations)
+    if not selected_tests:
+        raise UserError("No test fits within the time budget")
+    selected_tests_set = set(selected_tests)
+    dropped_tests = [test for test in flatten_tests(suites) if test not in selected_tests_set]
+    return filter_suites(suites, FromTestsFilter(selected_tests)), dropped_tests, estimated_duration
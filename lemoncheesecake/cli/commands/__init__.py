@@ -5,16 +5,18 @@ from .fixtures import FixturesCommand
 from .stats import StatsCommand
 from .report import ReportCommand
 from .diff import DiffCommand
+from .merge import MergeCommand
 from .version import VersionCommand
-from .top import TopTests, TopSuites, TopSteps
+from .top import TopTests, TopSuites, TopSteps, TopCriticalPath
 from .check import CheckCommand
+from .worker import WorkerCommand
 
 
 def get_commands():
     return [
-        RunCommand(), CheckCommand(), BootstrapCommand(),
+        RunCommand(), WorkerCommand(), CheckCommand(), BootstrapCommand(),
         ShowCommand(), FixturesCommand(), StatsCommand(),
-        ReportCommand(), DiffCommand(),
-        TopTests(), TopSuites(), TopSteps(),
+        ReportCommand(), DiffCommand(), MergeCommand(),
+        TopTests(), TopSuites(), TopSteps(), TopCriticalPath(),
         VersionCommand()
     ]
@@ -0,0 +1,23 @@
+from lemoncheesecake.cli.command import Command
+from lemoncheesecake.cli.utils import auto_detect_reporting_backends
+from lemoncheesecake.reporting.merge import merge_reports_into_dir
+
+
+class MergeCommand(Command):
+    def get_name(self):
+        return "merge"
+
+    def get_description(self):
+        return "Merge several reports (such as the reports of 'lcc run --shard') into one"
+
+    def add_cli_args(self, cli_parser):
+        cli_parser.add_argument(
+            "--output", "-o", required=True,
+            help="The directory of the merged report (it must not exist or be empty)"
+        )
+        cli_parser.add_argument("report_paths", nargs="+", help="Report files or directories")
+
+    def run_cmd(self, cli_args):
+        report = merge_reports_into_dir(cli_args.report_paths, cli_args.output, auto_detect_reporting_backends())
+        print("Merged %d report(s) (%d tests) into %s" % (len(cli_args.report_paths), report.nb_tests, cli_args.output))
+        return 0
@@ -1,13 +1,26 @@
 import os
+import os.path as osp
 
 from lemoncheesecake.cli.command import Command
-from lemoncheesecake.cli.utils import load_suites_from_project, add_project_cli_arg
+from lemoncheesecake.cli.utils import filter_project_suites, add_project_cli_arg
 from lemoncheesecake.exceptions import LemoncheesecakeException, ProjectNotFound, UserError, serialize_current_exception
 from lemoncheesecake.filter import add_test_filter_cli_args, make_test_filter
-from lemoncheesecake.project import load_project, PreparedProject, DEFAULT_REPORTING_BACKENDS
+from lemoncheesecake.project import load_project, PreparedProject, DEFAULT_REPORTING_BACKENDS, PROJECT_FILE
 from lemoncheesecake.reporting.backend import get_reporting_backend_names as do_get_reporting_backend_names, \
     parse_reporting_backend_names_expression, get_reporting_backends_for_test_run
 from lemoncheesecake.reporting.savingstrategy import make_report_saving_strategy, DEFAULT_REPORT_SAVING_STRATEGY
+from lemoncheesecake.process import WORKER_TYPES, is_process_mode_available
+from lemoncheesecake.history import Durations, load_previous_report, get_failed_test_paths, load_history, \
+    order_tests_by_failure_rate, DEFAULT_HISTORY_DEPTH
+from lemoncheesecake.suite import resolve_tests_dependencies
+from lemoncheesecake.testtree import filter_suites, prioritize_tests
+from lemoncheesecake.distributed import Coordinator, DEFAULT_COORDINATOR_ADDRESS, parse_address, format_address
+from lemoncheesecake.shard import parse_shard, get_shard_suites
+from lemoncheesecake.budget import parse_time_budget, get_time_budget_suites, PRIORITY_PROPERTY
+from lemoncheesecake.helpers.time import humanize_duration
+from lemoncheesecake.resultcache import ResultCache
+from lemoncheesecake.impact import build_dependency_map, get_changed_files, get_affected_suites, \
+    get_dependency_map_path
 
 
 def get_nb_threads(cli_args, project):
@@ -29,6 +42,168 @@ def get_nb_threads(cli_args, project):
     return nb_threads
 
 
+def get_async_concurrency(cli_args, project):
+    async_concurrency = max(cli_args.async_concurrency, 1)
+    if async_concurrency > 1 and not project.threaded:
+        raise LemoncheesecakeException("Project does not support running tests concurrently")
+    return async_concurrency
+
+
+def get_batch_size(cli_args):
+    if cli_args.batch_size < 1:
+        raise LemoncheesecakeException("--batch-size must be greater or equal to 1")
+    return cli_args.batch_size
+
+
+def get_test_timeout(cli_args, project):
+    test_timeout = cli_args.test_timeout if cli_args.test_timeout is not None else project.default_test_timeout
+    if test_timeout is not None and test_timeout <= 0:
+        raise LemoncheesecakeException("The test timeout must be greater than 0")
+    return test_timeout
+
+
+def get_worker_type(cli_args):
+    if cli_args.worker_type == "process" and not is_process_mode_available():
+        raise LemoncheesecakeException("--worker-type process is not supported on this platform")
+    return cli_args.worker_type
+
+
+def get_durations(cli_args, project):
+    # durations are used to schedule tests, to balance shards and to select the tests fitting the time budget
+    if cli_args.schedule != "duration" and not cli_args.shard and not cli_args.time_budget:
+        return None
+
+    previous_report = load_previous_report(project.dir, cli_args.previous_report)
+    if previous_report is None:
+        return None
+
+    return Durations.from_report(previous_report)
+
+
+def get_failed_tests(cli_args, project):
+    if not cli_args.last_failed and not cli_args.failed_first:
+        return None
+
+    if cli_args.failed_first and cli_args.schedule != "rank":
+        raise LemoncheesecakeException("--failed-first cannot be used along with --schedule %s" % cli_args.schedule)
+
+    previous_report = load_previous_report(project.dir, cli_args.from_report or cli_args.previous_report)
+    failed_tests = get_failed_test_paths(previous_report) if previous_report else set()
+    if cli_args.last_failed and not failed_tests:
+        print("No previously failed tests, running all the tests.")
+    return failed_tests
+
+
+def get_suites_affected_by_changes(cli_args, project, suites):
+    project_file = osp.join(project.dir, PROJECT_FILE)
+    dependency_map = build_dependency_map(
+        suites, project.dir, project_file if osp.exists(project_file) else None, project.load_fixtures()
+    )
+    changed_files = get_changed_files(cli_args.changed_since, project.dir, dependency_map.get_files())
+    # the dependency map is saved so that it can be used as a snapshot by the next run
+    dependency_map.save(get_dependency_map_path(project.dir))
+    return get_affected_suites(suites, dependency_map, changed_files)
+
+
+def get_time_budget_suites_from_cli(cli_args, project, suites, all_suites, durations):
+    time_budget = parse_time_budget(cli_args.time_budget)
+    if durations is None or durations.is_empty():
+        print("No test durations from a previous report, running all the tests despite the time budget.")
+        return suites
+
+    suites, dropped_tests, estimated_duration = get_time_budget_suites(
+        suites, all_suites, time_budget, get_nb_threads(cli_args, project), durations
+    )
+    if dropped_tests:
+        print("Time budget of %s: %d test(s) dropped (estimated duration of the remaining tests: %s):" % (
+            humanize_duration(time_budget), len(dropped_tests), humanize_duration(estimated_duration)
+        ))
+        for test in dropped_tests:
+            print("  - %s" % test.path)
+    return suites
+
+
+def get_history(cli_args, project):
+    # the history is used to order the tests in failfast mode
+    if cli_args.schedule != "failfast":
+        return None
+
+    if cli_args.history_depth < 1:
+        raise LemoncheesecakeException("--history-depth must be greater or equal to 1")
+
+    return load_history(project.dir, cli_args.history_depth)
+
+
+def get_suites(cli_args, project, durations, failed_tests, history=None):
+    # all the suites of the project (and not only the selected ones) are needed to resolve the dependencies
+    # of the selected tests, they are loaded only once
+    all_suites = project.load_suites()
+    suites = filter_project_suites(all_suites, make_test_filter(cli_args))
+
+    if cli_args.last_failed and failed_tests:
+        failed_suites = filter_suites(suites, lambda test: test.path in failed_tests)
+        # if none of the selected tests failed previously, all of them are run
+        if failed_suites:
+            suites = failed_suites
+
+    if cli_args.changed_since:
+        suites = get_suites_affected_by_changes(cli_args, project, suites)
+        if not suites:
+            return suites
+
+    if cli_args.shard:
+        suites = get_shard_suites(suites, all_suites, parse_shard(cli_args.shard), durations)
+
+    if cli_args.time_budget:
+        suites = get_time_budget_suites_from_cli(cli_args, project, suites, all_suites, durations)
+
+    if cli_args.failed_first and failed_tests:
+        suites = prioritize_tests(suites, lambda test: test.path in failed_tests)
+
+    if history is not None:
+        resolve_tests_dependencies(suites, all_suites)
+        suites = order_tests_by_failure_rate(suites, history)
+
+    return suites
+
+
+def get_no_test_message(cli_args):
+    # the tests selected by the filter may be left out by --changed-since, --shard or --time-budget
+    if cli_args.changed_since:
+        return "No test is affected by the changes since %s." % cli_args.changed_since
+    elif cli_args.shard:
+        return "Shard %s does not contain any test." % cli_args.shard
+    else:
+        return "No test to run."
+
+
+def get_coordinator(cli_args, nb_threads, worker_type):
+    if not cli_args.coordinator:
+        return None
+
+    if worker_type == "process":
+        raise LemoncheesecakeException("--coordinator cannot be used along with --worker-type process")
+
+    coordinator = Coordinator(parse_address(cli_args.listen), nb_threads, cli_args)
+    print("Waiting for %d worker(s) on %s..." % (nb_threads, format_address(coordinator.address)))
+    return coordinator
+
+
+def get_result_cache(cli_args, project):
+    if not cli_args.result_cache:
+        return None
+
+    try:
+        fingerprint = project.build_result_cache_fingerprint()
+    except Exception:
+        raise LemoncheesecakeException(
+            "Got an unexpected exception while getting result cache fingerprint from project:%s" %
+            serialize_current_exception(show_stacktrace=True)
+        )
+
+    return ResultCache.for_project_dir(project.dir, project.result_cache_max_size, fingerprint)
+
+
 def get_report_saving_strategy(cli_args):
     saving_strategy_expression = cli_args.save_report or \
         os.environ.get("LCC_SAVE_REPORT") or DEFAULT_REPORT_SAVING_STRATEGY
@@ -80,10 +255,20 @@ def create_report_dir(cli_args, project):
 
 
 def run_suites_from_project(project, cli_args):
+    # Get durations, failed tests & history from previous reports (it must be done before the report dir is created
+    # since the previous report may be archived in the meantime)
+    durations = get_durations(cli_args, project)
+    failed_tests = get_failed_tests(cli_args, project)
+    history = get_history(cli_args, project)
+
+    # Get the suites to be run
+    suites = get_suites(cli_args, project, durations, failed_tests, history)
+    if not suites:
+        print(get_no_test_message(cli_args))
+        return 0
+
     # Create prepared_project
-    prepared_project = PreparedProject.create(
-        project, load_suites_from_project(project, make_test_filter(cli_args)), cli_args
-    )
+    prepared_project = PreparedProject.create(project, suites, cli_args)
 
     # Get reporting backends
     reporting_backends = get_reporting_backends_for_test_run(
@@ -96,13 +281,25 @@ def run_suites_from_project(project, cli_args):
     # Create report dir
     report_dir = create_report_dir(cli_args, project)
 
-    # Get number of threads
+    # Get number of threads, worker type, async concurrency, batch size & test timeout
     nb_threads = get_nb_threads(cli_args, project)
+    worker_type = get_worker_type(cli_args)
+    async_concurrency = get_async_concurrency(cli_args, project)
+    batch_size = get_batch_size(cli_args)
+    test_timeout = get_test_timeout(cli_args, project)
+
+    # Get coordinator (if tests are to be run by remote workers)
+    coordinator = get_coordinator(cli_args, nb_threads, worker_type)
+
+    # Get result cache (if any)
+    result_cache = get_result_cache(cli_args, project)
 
     # Run tests
     report = prepared_project.run(
         reporting_backends, report_dir, report_saving_strategy,
-        cli_args.force_disabled, cli_args.stop_on_failure, nb_threads
+        cli_args.force_disabled, cli_args.stop_on_failure, nb_threads, worker_type,
+        durations if cli_args.schedule == "duration" else None, coordinator, async_concurrency, result_cache,
+        batch_size, test_timeout
     )
 
     # Return exit code
@@ -146,8 +343,81 @@ class RunCommand(Command):
             help="Stop tests execution on the first non-passed test"
         )
         test_execution_group.add_argument(
-            "--threads", type=int, default=None,
-            help="Number of threads used to run tests (default: $LCC_THREADS or 1)"
+            "--threads", "--workers", type=int, default=None,
+            help="Number of threads (or worker processes) used to run tests (default: $LCC_THREADS or 1)"
+        )
+        test_execution_group.add_argument(
+            "--worker-type", choices=WORKER_TYPES, default="thread",
+            help="Whether tests are run in threads or in worker processes forked from the main process "
+                 "(default: thread)"
+        )
+        test_execution_group.add_argument(
+            "--async-concurrency", type=int, default=1,
+            help="Maximum number of async tests run at once on the event loop (default: 1)"
+        )
+        test_execution_group.add_argument(
+            "--batch-size", type=int, default=1,
+            help="Run up to N consecutive tests of a suite using the same fixtures as a single task, it saves "
+                 "the scheduling overhead of very small tests (default: 1)"
+        )
+        test_execution_group.add_argument(
+            "--test-timeout", type=float, metavar="SECONDS",
+            help="The timeout of the tests that do not have their own timeout, a test still running after its "
+                 "timeout is marked as failed (default: the project's default test timeout if any)"
+        )
+        test_execution_group.add_argument(
+            "--coordinator", action="store_true",
+            help="Run tests in remote worker processes started with 'lcc worker', "
+                 "the number of workers to wait for is given by --workers"
+        )
+        test_execution_group.add_argument(
+            "--listen", default=DEFAULT_COORDINATOR_ADDRESS, metavar="HOST:PORT",
+            help="The address the coordinator listens on for workers (default: %s)" % DEFAULT_COORDINATOR_ADDRESS
+        )
+        test_execution_group.add_argument(
+            "--schedule", choices=("rank", "duration", "failfast"), default="rank",
+            help="How tests are handed to the threads: in suite/test rank order, longest work first "
+                 "using the durations of the previous report or most often failed (and then shortest) tests "
+                 "first using the history of the previous reports (default: rank)"
+        )
+        test_execution_group.add_argument(
+            "--history-depth", type=int, default=DEFAULT_HISTORY_DEPTH, metavar="N",
+            help="The number of previous reports used by --schedule failfast (default: %d)" % DEFAULT_HISTORY_DEPTH
+        )
+        test_execution_group.add_argument(
+            "--previous-report", required=False,
+            help="The report used to get historical data such as test durations "
+                 "(default: the last report of the project)"
+        )
+        test_execution_group.add_argument(
+            "--last-failed", action="store_true",
+            help="Only run the tests that failed in the previous report (or in the report given with --from-report), "
+                 "all the tests are run if there is no such test"
+        )
+        test_execution_group.add_argument(
+            "--failed-first", action="store_true",
+            help="Run first the tests that failed in the previous report (or in the report given with --from-report)"
+        )
+        test_execution_group.add_argument(
+            "--changed-since", required=False, metavar="REVISION_OR_SNAPSHOT",
+            help="Only run the tests affected by the files changed since the given git revision or since "
+                 "the given snapshot (such as the %s file written by the previous run)" % get_dependency_map_path(".")
+        )
+        test_execution_group.add_argument(
+            "--shard", required=False, metavar="I/N",
+            help="Only run the I-th of N shards of the tests, shards are balanced using the durations "
+                 "of the previous report (if any)"
+        )
+        test_execution_group.add_argument(
+            "--time-budget", required=False, metavar="DURATION",
+            help="Only run the tests fitting within the given duration (such as 90s, 10m or 1h30m) with the "
+                 "given number of threads according to the durations of the previous report, the tests "
+                 "with the highest '%s' property are preferred" % PRIORITY_PROPERTY
+        )
+        test_execution_group.add_argument(
+            "--result-cache", action="store_true",
+            help="Do not run again the tests that passed with the same code, parameters, fixtures and "
+                 "environment fingerprint, their cached result is reported instead"
         )
 
         reporting_group = cli_parser.add_argument_group("Reporting")
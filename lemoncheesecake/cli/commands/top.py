@@ -204,3 +204,121 @@ class TopSteps(Command):
         )
 
         return 0
+
+
+class TopCriticalPath(Command):
+    def get_name(self):
+        return "top-critical-path"
+
+    def get_description(self):
+        return "Display the critical path of the test run and the utilization of workers"
+
+    def add_cli_args(self, cli_parser):
+        group = cli_parser.add_argument_group("Top critical path")
+        add_report_path_cli_arg(group)
+
+    @staticmethod
+    def _get_task_run_end_time(task_run):
+        return task_run.end_time if task_run.end_time is not None else -1
+
+    @staticmethod
+    def get_critical_path(task_runs):
+        """
+        Get the longest chain of dependent tasks, going back from the task that ended last through the dependency
+        that ended last at each step.
+        """
+        ended_task_runs = [task_run for task_run in task_runs if task_run.end_time is not None]
+        if not ended_task_runs:
+            return []
+
+        path = [max(ended_task_runs, key=lambda task_run: task_run.end_time)]
+        while path[-1].dependencies:
+            path.append(
+                max(
+                    (task_runs[index] for index in path[-1].dependencies),
+                    key=TopCriticalPath._get_task_run_end_time
+                )
+            )
+
+        return list(reversed(path))
+
+    @staticmethod
+    def _get_run_start_time(task_runs):
+        return min(
+            (task_run.ready_time for task_run in task_runs if task_run.ready_time is not None), default=None
+        )
+
+    @staticmethod
+    def _format_duration(duration):
+        return humanize_duration(duration, show_milliseconds=True) if duration is not None else "-"
+
+    @staticmethod
+    def get_top_critical_path(report):
+        run_start_time = TopCriticalPath._get_run_start_time(report.task_runs)
+        return [
+            (
+                task_run.name,
+                task_run.worker or "-",
+                TopCriticalPath._format_duration(task_run.wait_duration),
+                TopCriticalPath._format_duration(task_run.duration),
+                TopCriticalPath._format_duration(
+                    task_run.end_time - run_start_time
+                    if task_run.end_time is not None and run_start_time is not None else None
+                )
+            )
+            for task_run in TopCriticalPath.get_critical_path(report.task_runs)
+        ]
+
+    @staticmethod
+    def get_top_workers(report):
+        task_runs_by_worker = {}
+        for task_run in report.task_runs:
+            if task_run.worker is not None and task_run.duration is not None:
+                task_runs_by_worker.setdefault(task_run.worker, []).append(task_run)
+        if not task_runs_by_worker:
+            return []
+
+        run_start_time = TopCriticalPath._get_run_start_time(report.task_runs)
+        run_end_time = max(
+            task_run.end_time for task_runs in task_runs_by_worker.values() for task_run in task_runs
+        )
+        run_duration = (run_end_time - run_start_time) if run_start_time is not None else None
+
+        data = []
+        for worker, task_runs in task_runs_by_worker.items():
+            busy_duration = get_total_duration(task_runs)
+            wait_durations = [task_run.wait_duration for task_run in task_runs if task_run.wait_duration is not None]
+            data.append([
+                worker,
+                len(task_runs),
+                busy_duration,
+                (busy_duration / run_duration * 100) if run_duration else 100,
+                (sum(wait_durations) / len(wait_durations)) if wait_durations else 0
+            ])
+
+        return [
+            (
+                worker, str(nb_tasks), humanize_duration(busy_duration, show_milliseconds=True),
+                "%d%%" % utilization, humanize_duration(average_wait, show_milliseconds=True)
+            )
+            for worker, nb_tasks, busy_duration, utilization, average_wait
+            in sorted(data, key=lambda row: row[2], reverse=True)
+        ]
+
+    def run_cmd(self, cli_args):
+        report_path = get_report_path(cli_args)
+
+        report = load_report(report_path, auto_detect_reporting_backends())
+
+        print_table(
+            "Critical path",
+            ("Task", "Worker", "Wait", "Duration", "End"),
+            TopCriticalPath.get_top_critical_path(report)
+        )
+        print_table(
+            "Workers, ordered by busy time",
+            ("Worker", "Tasks Nb.", "Busy", "Utilization", "Avg. wait"),
+            TopCriticalPath.get_top_workers(report)
+        )
+
+        return 0
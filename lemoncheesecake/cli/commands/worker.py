@@ -0,0 +1,36 @@
+from lemoncheesecake.cli.command import Command
+from lemoncheesecake.cli.utils import load_suites_from_project, add_project_cli_arg
+from lemoncheesecake.filter import make_test_filter
+from lemoncheesecake.project import load_project, PreparedProject
+from lemoncheesecake.distributed import run_worker, parse_address
+
+
+class WorkerCommand(Command):
+    def get_name(self):
+        return "worker"
+
+    def get_description(self):
+        return "Run the tests sent by a coordinator ('lcc run --coordinator')"
+
+    def add_cli_args(self, cli_parser):
+        cli_parser.add_argument(
+            "--connect", required=True, metavar="HOST:PORT",
+            help="The address of the coordinator"
+        )
+        cli_parser.add_argument(
+            "--timeout", type=float, default=30,
+            help="How long to wait (in seconds) for the coordinator to be available (default: 30)"
+        )
+        add_project_cli_arg(cli_parser)
+
+    def run_cmd(self, cli_args):
+        project = load_project(cli_args.project)
+
+        def prepare_project(run_cli_args):
+            return PreparedProject.create(
+                project, load_suites_from_project(project, make_test_filter(run_cli_args)), run_cli_args
+            )
+
+        run_worker(parse_address(cli_args.connect), prepare_project, timeout=cli_args.timeout)
+
+        return 0
@@ -15,7 +15,10 @@ LEMONCHEESECAKE_VERSION = "lemoncheesecake version %s (using Python %s - %s)" %
 
 
 def load_suites_from_project(project, test_filter=None):
-    suites = project.load_suites()
+    return filter_project_suites(project.load_suites(), test_filter)
+
+
+def filter_project_suites(suites, test_filter=None):
     if all(suite.is_empty() for suite in suites):
         raise UserError("No test is defined in your lemoncheesecake project.")
 
@@ -0,0 +1,567 @@
+"""
+Run tests in worker processes, either remote or local.
+
+The coordinator (``lcc run --coordinator``) builds the tasks of the test session as usual, except that the tests are
+sent to the worker processes (``lcc worker --connect``) connected to it. A worker process loads the same project,
+runs the tests it is given and streams the events of these tests back to the coordinator where the report is built.
+With ``lcc run --worker-type process``, the worker processes are local: they are forked (see
+:py:class:`ForkServer <lemoncheesecake.process.ForkServer>`) once the project is loaded and are given the tests
+the same way.
+
+The setups and teardowns of the ``session`` and ``suite`` scopes are not run by the coordinator but by each worker
+process that runs tests depending on them (the ``pre_run`` fixtures of the local worker processes are set up once,
+before they are forked). The events of a setup are forwarded along with the events of the test that triggered it,
+the coordinator only reports the setup of the first worker process to forward it. The events of the teardowns
+are not part of the report, their errors are reported at the end of the test run.
+"""
+
+import ipaddress
+import os
+import os.path as osp
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+from lemoncheesecake.events import EventManager, LogEvent, LogAttachmentEvent, serialize_event
+from lemoncheesecake.exceptions import LemoncheesecakeException, UserError, TaskFailure, \
+    serialize_current_exception
+from lemoncheesecake.process import ForkServer, WorkerProcessCrash, WorkerProcessTimeout
+from lemoncheesecake.reporting import Log
+from lemoncheesecake.runner import RunContext, TestTask, SuiteTeardownTask, TestSessionTeardownTask, build_tasks, \
+    setup_pre_run_fixtures, teardown_pre_run_fixtures
+from lemoncheesecake.session import Session
+from lemoncheesecake.helpers.asyncio import stop_event_loop_thread
+
+DEFAULT_COORDINATOR_ADDRESS = "localhost:7531"
+DEFAULT_AUTHKEY = "lemoncheesecake"
+
+
+def parse_address(address):
+    """
+    Parse a "host:port" address into a (host, port) tuple.
+    """
+    host, _, port = address.rpartition(":")
+    try:
+        return host or "localhost", int(port)
+    except ValueError:
+        raise LemoncheesecakeException("Invalid address '%s' (expect host:port)" % address)
+
+
+def format_address(address):
+    return "%s:%d" % address
+
+
+def is_loopback_address(address):
+    host, _ = address
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def get_authkey(address):
+    """
+    Get the key authenticating the connection between the coordinator and the workers from ``$LCC_AUTHKEY``.
+    Since the coordinator and the workers exchange pickled data (that may run arbitrary code), the default
+    key is only accepted on a loopback ``address``.
+    """
+    authkey = os.environ.get("LCC_AUTHKEY")
+    if not authkey:
+        if not is_loopback_address(address):
+            raise UserError(
+                "$LCC_AUTHKEY must be set to use an address that is not a loopback address (%s)" %
+                format_address(address)
+            )
+        authkey = DEFAULT_AUTHKEY
+    return authkey.encode("utf-8")
+
+
+class _RemoteWorker:
+    def __init__(self, connection, name):
+        self._connection = connection
+        self.name = name
+        # the cancellation of tests can be sent while the worker is running a test for another thread
+        self._send_lock = threading.Lock()
+
+    def _send(self, message_type, message):
+        with self._send_lock:
+            self._connection.send((message_type, message))
+
+    def _get_crash(self):
+        return WorkerProcessCrash("worker process %s closed the connection unexpectedly" % self.name)
+
+    def _kill(self):
+        # a remote worker process cannot be killed, it is only disconnected
+        self._connection.close()
+
+    def _receive(self, timeout=None, deadline=None):
+        if deadline is not None and not self._connection.poll(max(deadline - time.monotonic(), 0)):
+            self._kill()
+            raise WorkerProcessTimeout(
+                "worker process %s has been killed after a timeout of %s seconds" % (self.name, timeout)
+            )
+        try:
+            return self._connection.recv()
+        except (EOFError, OSError):
+            raise self._get_crash()
+
+    def wait_until_ready(self):
+        message_type, message = self._receive()
+        if message_type == "error":
+            raise LemoncheesecakeException("Worker process %s failed to start:%s" % (self.name, message))
+
+    def init(self, run_cli_args):
+        self._send("init", run_cli_args)
+        self.wait_until_ready()
+
+    def run_test(self, test_path, session, on_event, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        thread_id = threading.get_ident()
+        self._send("run_test", test_path)
+        while True:
+            message_type, message = self._receive(timeout, deadline)
+            if message_type == "event":
+                serialized_event, attachment_content = message
+                _, attrs = serialized_event
+                # the thread ids of distinct worker processes may be the same, the events of the test are
+                # attributed to the thread waiting for it instead
+                if "thread_id" in attrs:
+                    attrs["thread_id"] = thread_id
+                if attachment_content is not None:
+                    attrs["attachment_path"] = session.store_attachment(
+                        osp.basename(attrs["attachment_path"]).partition("_")[2], attachment_content
+                    )
+                on_event(serialized_event)
+            elif message_type == "result":
+                return message
+            else:
+                raise LemoncheesecakeException(
+                    "Got an unexpected exception in worker process %s:%s" % (self.name, message)
+                )
+
+    def cancel_tests(self):
+        try:
+            self._send("cancel", None)
+        except OSError:
+            # the worker process has been lost, the test it was running (if any) will fail anyway
+            pass
+
+    def stop(self):
+        try:
+            self._send("stop", None)
+            _, errors = self._receive()
+        except (WorkerProcessCrash, OSError) as excp:
+            errors = [str(excp)]
+        finally:
+            self._connection.close()
+        return errors
+
+
+class _LocalWorker(_RemoteWorker):
+    def __init__(self, fork_server):
+        self._fork_server = fork_server
+        self.pid, connection = fork_server.fork_worker()
+        _RemoteWorker.__init__(self, connection, "#%d" % self.pid)
+
+    def _get_crash(self):
+        return WorkerProcessCrash(
+            "worker process exited unexpectedly with %s" % self._fork_server.wait_worker(self.pid)
+        )
+
+    def _kill(self):
+        self._connection.close()
+        self._fork_server.kill_worker(self.pid)
+
+
+class _WorkerPool:
+    """
+    Dispatch tests to worker processes.
+    """
+
+    def __init__(self, nb_workers):
+        self.nb_workers = nb_workers
+        self._workers = []
+        self._idle_workers = []
+        self._condition = threading.Condition()
+        self._tests_cancelled = False
+
+    def start(self):
+        """
+        Start the worker processes and wait for them to be ready.
+        """
+        raise NotImplementedError()
+
+    def _add_worker(self, worker):
+        with self._condition:
+            if self._tests_cancelled:
+                worker.cancel_tests()
+            self._workers.append(worker)
+            self._idle_workers.append(worker)
+            self._condition.notify_all()
+
+    def _acquire_worker(self):
+        with self._condition:
+            while not self._idle_workers:
+                if not self._workers:
+                    raise WorkerProcessCrash("worker processes have all been lost")
+                self._condition.wait()
+            return self._idle_workers.pop(0)
+
+    def _release_worker(self, worker, lost=False):
+        with self._condition:
+            if lost:
+                self._workers.remove(worker)
+            else:
+                self._idle_workers.append(worker)
+            self._condition.notify_all()
+
+    def run_test(self, test_path, session, on_event, timeout=None):
+        """
+        Run the test on the first idle worker process, ``on_event`` is called with each serialized
+        event of the test, the outcome of the test is returned (see :py:meth:`TestTask.run_and_get_outcome`).
+        If the test is still running after ``timeout`` seconds, its worker process is killed.
+        """
+        worker = self._acquire_worker()
+        try:
+            outcome = worker.run_test(test_path, session, on_event, timeout)
+        except WorkerProcessCrash:
+            self._release_worker(worker, lost=True)
+            raise
+        except BaseException:
+            self._release_worker(worker)
+            raise
+        self._release_worker(worker)
+        return outcome
+
+    def cancel_tests(self):
+        """
+        Cancel the tests being run by the worker processes (and the next ones), see
+        :py:meth:`Session.cancel_tests <lemoncheesecake.session.Session.cancel_tests>`.
+        """
+        with self._condition:
+            self._tests_cancelled = True
+            for worker in self._workers:
+                worker.cancel_tests()
+
+    def stop(self):
+        """
+        Stop the worker processes and return the errors that occurred during their teardowns (if any).
+        """
+        errors = []
+        for worker in self._workers:
+            errors.extend(worker.stop())
+        self._workers = []
+        return errors
+
+
+class Coordinator(_WorkerPool):
+    """
+    Dispatch tests to remote worker processes (the test timeouts are not enforced on remote workers).
+    """
+
+    def __init__(self, address, nb_workers, run_cli_args, authkey=None):
+        _WorkerPool.__init__(self, nb_workers)
+        self._run_cli_args = run_cli_args
+        try:
+            self._listener = Listener(address, authkey=authkey or get_authkey(address))
+        except OSError as excp:
+            raise LemoncheesecakeException("Cannot listen on %s: %s" % (format_address(address), excp))
+
+    @property
+    def address(self):
+        return self._listener.address
+
+    def start(self):
+        """
+        Wait for all the worker processes to be connected and ready.
+        """
+        try:
+            while len(self._workers) < self.nb_workers:
+                try:
+                    connection = self._listener.accept()
+                except AuthenticationError:
+                    continue
+                worker = _RemoteWorker(connection, format_address(self._listener.last_accepted))
+                self._workers.append(worker)
+                worker.init(self._run_cli_args)
+        except BaseException:
+            self.stop()
+            raise
+        finally:
+            self._listener.close()
+        self._idle_workers = list(self._workers)
+
+    def run_test(self, test_path, session, on_event, timeout=None):
+        return _WorkerPool.run_test(self, test_path, session, on_event)
+
+
+class ProcessWorkerPool(_WorkerPool):
+    """
+    Dispatch tests to local worker processes. The worker processes are forked once (through a
+    :py:class:`ForkServer <lemoncheesecake.process.ForkServer>` started by :py:meth:`start`, that must be called
+    before the current process starts any thread) and each of them runs many tests; a worker process that is
+    killed (on a test timeout) or that crashes is replaced by a new one.
+    """
+
+    def __init__(self, nb_workers, suites, fixture_registry, force_disabled, pre_run_scheduled_fixtures):
+        _WorkerPool.__init__(self, nb_workers)
+
+        def run_worker(connection):
+            # NB: this function is run in the worker process
+            _run_worker(connection, lambda report_dir: _TestRunner(
+                suites, fixture_registry, force_disabled, connection, report_dir, pre_run_scheduled_fixtures
+            ))
+
+        self._fork_server = ForkServer(run_worker)
+
+    def _start_worker(self):
+        worker = _LocalWorker(self._fork_server)
+        try:
+            worker.wait_until_ready()
+        except BaseException:
+            worker.stop()
+            raise
+        return worker
+
+    def start(self):
+        self._fork_server.start()
+        try:
+            for _ in range(self.nb_workers):
+                self._add_worker(self._start_worker())
+        except BaseException:
+            self.stop()
+            raise
+
+    def _release_worker(self, worker, lost=False):
+        _WorkerPool._release_worker(self, worker, lost)
+        if lost:
+            self._add_worker(self._start_worker())
+
+    def stop(self):
+        try:
+            return _WorkerPool.stop(self)
+        finally:
+            self._fork_server.stop()
+
+
+class _RemoteEventManager(EventManager):
+    def __init__(self, connection, report_dir):
+        EventManager.__init__(self)
+        self._connection = connection
+        self._report_dir = report_dir
+        self.forwarding = False
+        self.recording_errors = False
+        self.recorded_errors = []
+
+    def fire(self, event):
+        if self.recording_errors and isinstance(event, LogEvent) and event.log_level == Log.LEVEL_ERROR:
+            self.recorded_errors.append(event.log_message)
+        if not self.forwarding:
+            return
+
+        attachment_content = None
+        if isinstance(event, LogAttachmentEvent):
+            attachment_path = osp.join(self._report_dir, event.attachment_path)
+            with open(attachment_path, "rb") as fh:
+                attachment_content = fh.read()
+            os.unlink(attachment_path)
+
+        self._connection.send(("event", (serialize_event(event), attachment_content)))
+
+    def pop_recorded_errors(self):
+        errors, self.recorded_errors = self.recorded_errors, []
+        return errors
+
+
+class _TestRunner:
+    def __init__(self, suites, fixture_registry, force_disabled, connection, report_dir,
+                 pre_run_scheduled_fixtures=None):
+        self._event_manager = _RemoteEventManager(connection, report_dir)
+        self._session = Session.create(self._event_manager, (), report_dir, None)
+        self._context = RunContext(self._session, fixture_registry, force_disabled, False)
+
+        if pre_run_scheduled_fixtures is None:
+            pre_run_scheduled_fixtures = fixture_registry.get_fixtures_scheduled_for_pre_run(suites, force_disabled)
+            self._pre_run_fixture_teardowns, errors = setup_pre_run_fixtures(pre_run_scheduled_fixtures)
+            if errors:
+                raise LemoncheesecakeException("\n".join(errors))
+        else:
+            # the pre_run fixtures have been set up (and will be torn down) by the process this one is forked from
+            self._pre_run_fixture_teardowns = []
+
+        self._tasks = build_tasks(
+            suites, fixture_registry,
+            fixture_registry.get_fixtures_scheduled_for_session(suites, pre_run_scheduled_fixtures, force_disabled),
+            force_disabled
+        )
+        self._ranks = {task: rank for rank, task in enumerate(self._tasks)}
+        self._test_tasks = {task.test.path: task for task in self._tasks if isinstance(task, TestTask)}
+        self._done_tasks = {}
+
+    def _get_setup_tasks(self, test_task):
+        setup_tasks = set()
+        tasks_to_visit = list(test_task.get_all_dependencies())
+        while tasks_to_visit:
+            task = tasks_to_visit.pop()
+            # the dependencies between tests are handled by the coordinator
+            if task in setup_tasks or isinstance(task, TestTask):
+                continue
+            setup_tasks.add(task)
+            tasks_to_visit.extend(task.get_all_dependencies())
+        return sorted(setup_tasks, key=self._ranks.get)
+
+    def _run_setup_tasks(self, test_task):
+        # the events of the setups are forwarded to the coordinator (that reports the setup of the first
+        # worker process forwarding it), their errors are also recorded for the tests depending on them
+        self._event_manager.forwarding = True
+        self._event_manager.recording_errors = True
+        try:
+            for task in self._get_setup_tasks(test_task):
+                if task not in self._done_tasks:
+                    try:
+                        task.run(self._context)
+                    except TaskFailure as excp:
+                        errors = self._event_manager.pop_recorded_errors()
+                        self._done_tasks[task] = "%s%s" % (excp, "".join("\n" + error for error in errors))
+                    else:
+                        self._done_tasks[task] = None
+                if self._done_tasks[task]:
+                    return self._done_tasks[task]
+            return None
+        finally:
+            self._event_manager.forwarding = False
+            self._event_manager.recording_errors = False
+
+    def cancel_tests(self):
+        self._session.cancel_tests()
+
+    def run_test(self, test_path):
+        test_task = self._test_tasks[test_path]
+        setup_failure = self._run_setup_tasks(test_task)
+
+        self._event_manager.forwarding = True
+        try:
+            if setup_failure:
+                self._session.start_test(test_task.test)
+                self._session.set_step("Setup test")
+                self._session.log_error("Cannot run test in worker process: %s" % setup_failure)
+                self._session.end_test(test_task.test)
+                return "test '%s' failed" % test_path, False, False
+            else:
+                return test_task.run_and_get_outcome(self._context)
+        finally:
+            self._event_manager.forwarding = False
+
+    def stop(self):
+        self._event_manager.recording_errors = True
+        for task in reversed(self._tasks):
+            if isinstance(task, SuiteTeardownTask) and task.suite_setup_task in self._done_tasks:
+                task.run(self._context)
+            elif isinstance(task, TestSessionTeardownTask) and task.test_session_setup_task in self._done_tasks:
+                task.run(self._context)
+        errors = self._event_manager.pop_recorded_errors()
+        errors.extend(teardown_pre_run_fixtures(self._pre_run_fixture_teardowns))
+        return errors
+
+
+def _connect(address, authkey, timeout):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.time() > deadline:
+                raise LemoncheesecakeException("Cannot connect to coordinator %s" % format_address(address))
+            time.sleep(0.1)
+        except AuthenticationError:
+            raise LemoncheesecakeException(
+                "Cannot authenticate to coordinator %s (check $LCC_AUTHKEY)" % format_address(address)
+            )
+
+
+def _receive_messages(connection, test_runner, messages):
+    while True:
+        try:
+            message_type, message = connection.recv()
+        except (EOFError, OSError):
+            messages.put((None, None))
+            break
+        if message_type == "cancel":
+            test_runner.cancel_tests()
+        else:
+            messages.put((message_type, message))
+            if message_type == "stop":
+                break
+
+
+def _run_worker(connection, make_test_runner):
+    report_dir = tempfile.mkdtemp()
+    try:
+        try:
+            test_runner = make_test_runner(report_dir)
+        except LemoncheesecakeException as excp:
+            connection.send(("error", " %s" % excp))
+            raise
+        except Exception:
+            connection.send(("error", serialize_current_exception()))
+            raise
+        connection.send(("ready", None))
+
+        # the messages are received by a dedicated thread so that a test being run can be cancelled
+        messages = queue.Queue()
+        threading.Thread(
+            target=_receive_messages, args=(connection, test_runner, messages), name="receive_messages", daemon=True
+        ).start()
+
+        while True:
+            message_type, message = messages.get()
+            if message_type is None:
+                test_runner.stop()
+                break
+
+            if message_type == "run_test":
+                try:
+                    connection.send(("result", test_runner.run_test(message)))
+                except Exception:
+                    connection.send(("exception", serialize_current_exception()))
+            else:
+                connection.send(("stopped", test_runner.stop()))
+                break
+    finally:
+        connection.close()
+        shutil.rmtree(report_dir, ignore_errors=True)
+        stop_event_loop_thread()
+
+
+def run_worker(address, prepare_project, authkey=None, timeout=30):
+    """
+    Connect to the coordinator and run the tests it sends until it asks to stop.
+
+    :param address: the (host, port) of the coordinator
+    :param prepare_project: a function that takes the CLI arguments of the coordinator's ``lcc run``
+        and returns the corresponding :py:class:`PreparedProject <lemoncheesecake.project.PreparedProject>`
+    :param timeout: how long (in seconds) to wait for the coordinator to accept the connection
+    """
+    connection = _connect(address, authkey or get_authkey(address), timeout)
+    try:
+        _, run_cli_args = connection.recv()
+    except BaseException:
+        connection.close()
+        raise
+
+    def make_test_runner(report_dir):
+        prepared_project = prepare_project(run_cli_args)
+        return _TestRunner(
+            prepared_project.suites, prepared_project.fixture_registry, prepared_project.cli_args.force_disabled,
+            connection, report_dir
+        )
+
+    _run_worker(connection, make_test_runner)
@@ -3,31 +3,46 @@ import time
 import re
 import inspect
 import threading
+import collections
+import queue
 from contextlib import contextmanager
 
-from queue import Queue
-
 from lemoncheesecake.helpers.text import camel_case_to_snake_case
 from lemoncheesecake.exceptions import serialize_current_exception
 
 DEBUG = False
 
 
+def _make_event_name(event_class_name):
+    return re.sub(r"_event$", "", camel_case_to_snake_case(event_class_name))
+
+
 class Event:
+    # the events are compact objects: the built-in event classes have no instance __dict__
+    __slots__ = ("time",)
+
     def __init__(self, event_time=None):
         self.time = event_time or time.time()
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # the name is computed once per event class, it is used to dispatch every event
+        cls._name = _make_event_name(cls.__name__)
+
     @classmethod
     def get_name(cls):
-        return re.sub(r"_event$", "", camel_case_to_snake_case(cls.__name__))
+        return cls._name
 
     def __str__(self):
         return "<Event type='%s'>" % self.get_name()
 
 
+Event._name = _make_event_name(Event.__name__)
+
+
 class EventType:
     def __init__(self, event_class):
-        self._event_class = event_class
+        self.event_class = event_class
         self._handlers = []
 
     def subscribe(self, handler):
@@ -47,6 +62,8 @@ class EventType:
 class EventManager:
     def __init__(self):
         self._event_types = {}
+        # the same event types, looked up by event class when handling an event
+        self._event_types_by_class = {}
 
     @staticmethod
     def _get_event_classes():
@@ -75,7 +92,18 @@ class EventManager:
 
     def register_event(self, *event_classes):
         for event_class in event_classes:
-            self._event_types[event_class.get_name()] = EventType(event_class)
+            event_type = EventType(event_class)
+            self._event_types[event_class.get_name()] = event_type
+            self._event_types_by_class[event_class] = event_type
+
+    def _get_event_type(self, event_class):
+        try:
+            return self._event_types_by_class[event_class]
+        except KeyError:
+            return self._event_types[event_class.get_name()]
+
+    def get_event_class(self, event_name):
+        return self._event_types[event_name].event_class
 
     def subscribe_to_event(self, event, handler):
         self._event_types[self._get_event_name(event)].subscribe(handler)
@@ -84,54 +112,258 @@ class EventManager:
         for event, handler in handlers.items():
             self.subscribe_to_event(event, handler)
 
+    def _get_listener_dispatcher(self, listener):
+        return None
+
     def add_listener(self, listener):
+        # a listener may restrict the events it is subscribed to through a "subscribed_events" attribute,
+        # otherwise it is subscribed to all the events it has a handler for
+        subscribed_events = getattr(listener, "subscribed_events", None)
+        if subscribed_events is not None:
+            subscribed_events = set(map(self._get_event_name, subscribed_events))
+        dispatcher = self._get_listener_dispatcher(listener)
+        handled_event_names = set()
         for event_name in self._event_types:
+            if subscribed_events is not None and event_name not in subscribed_events:
+                continue
             handler_name = "on_%s" % event_name
             handler = getattr(listener, handler_name, None)
             if handler and callable(handler):
-                self.subscribe_to_event(event_name, handler)
+                self.subscribe_to_event(event_name, dispatcher.wrap(handler) if dispatcher else handler)
+                handled_event_names.add(event_name)
+        if dispatcher and TestSessionEndEvent.get_name() not in handled_event_names and \
+                TestSessionEndEvent.get_name() in self._event_types:
+            self.subscribe_to_event(TestSessionEndEvent, dispatcher.on_test_session_end)
 
     def unsubscribe_from_event(self, event, handler):
         self._event_types[self._get_event_name(event)].unsubscribe(handler)
 
     def handle_event(self, event):
-        self._event_types[event.__class__.get_name()].handle(event)
+        self._get_event_type(event.__class__).handle(event)
 
     def fire(self, event):
         raise NotImplementedError()
 
 
+class EventStats:
+    """
+    Throughput and latency (the delay between the moment an event is fired and the moment it is handled)
+    of the events handled by an :py:class:`AsyncEventManager`.
+    """
+
+    def __init__(self):
+        self.nb_events = 0
+        self.duration = 0
+        self.total_latency = 0
+        self.max_latency = 0
+
+    def add_event(self, latency):
+        self.nb_events += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def events_per_second(self):
+        return self.nb_events / self.duration if self.duration else 0
+
+    @property
+    def average_latency(self):
+        return self.total_latency / self.nb_events if self.nb_events else 0
+
+    def __str__(self):
+        return "%d events, %.0f events/s, latency: %.3fms on average, %.3fms at most" % (
+            self.nb_events, self.events_per_second, self.average_latency * 1000, self.max_latency * 1000
+        )
+
+
+class _ListenerDispatcher:
+    """
+    Call the handlers of a listener on a dedicated thread, through a bounded queue: the events are handled by
+    the listener in the order they are dispatched, without holding up the other listeners (unless the queue is full).
+
+    The queue is flushed on :py:class:`TestSessionEndEvent`. A failure of the listener is passed to ``on_failure``
+    (along with its serialized stacktrace) as soon as it happens, the next events are discarded.
+    """
+
+    def __init__(self, listener, queue_size, on_failure):
+        self.name = listener.__class__.__name__
+        self._queue = queue.Queue(queue_size)
+        self._warning_threshold = max(queue_size // 2, 1)
+        self._falling_behind = False
+        self._thread = None
+        self._failed = False
+        self._on_failure = on_failure
+
+    def wrap(self, handler):
+        return lambda event: self.dispatch(handler, event)
+
+    def dispatch(self, handler, event):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch_loop, name="listener-%s" % self.name, daemon=True)
+            self._thread.start()
+
+        queue_depth = self._queue.qsize()
+        if queue_depth >= self._warning_threshold:
+            if not self._falling_behind:
+                self._falling_behind = True
+                print(
+                    "Warning: reporting listener %s is falling behind (%d events queued)" % (self.name, queue_depth),
+                    file=sys.stderr
+                )
+        elif queue_depth < self._warning_threshold // 2:
+            self._falling_behind = False
+
+        self._queue.put((handler, event))
+        if isinstance(event, TestSessionEndEvent):
+            self.flush()
+
+    def is_active(self):
+        return self._thread is not None
+
+    def on_test_session_end(self, _):
+        # the listener does not handle this event, the events previously dispatched must be flushed anyway
+        if self.is_active():
+            self.flush()
+
+    def flush(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._failed = False
+
+    def _dispatch_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            # once the listener has failed, the remaining events are discarded
+            if not self._failed:
+                handler, event = item
+                try:
+                    handler(event)
+                except Exception as excp:
+                    self._failed = True
+                    self._on_failure(excp, serialize_current_exception())
+
+
 class AsyncEventManager(EventManager):
+    """
+    Events are handled by a dedicated thread, in batches.
+
+    The runtime events (logs, checks, steps, etc...), that make most of the events, are appended without any locking
+    to a buffer of the thread firing them. The other events (the beginning and the end of tests, suites, etc...) flush
+    all these buffers into the queue of events to be handled before being queued themselves: the order of the events
+    of each thread is kept and an event that happens after another one (for instance, the beginning of a test after
+    the beginning of its suite) is handled after it, whatever the threads firing them. The handler thread takes all
+    the queued events at once and flushes the buffers itself when it is idle.
+
+    A listener having a ``dispatch_queue_size`` attribute (such as a slow reporting backend) is called on its own
+    thread through a queue of that size, so that it does not hold up the other listeners.
+    """
+
+    # the delay after which an idle handler flushes the buffers of the threads
+    IDLE_FLUSH_DELAY = 0.05
+    # the number of events above which a thread flushes its own buffer
+    MAX_BUFFER_SIZE = 500
+
     def __init__(self):
         EventManager.__init__(self)
+        self._condition = threading.Condition()
         self._queue = None
+        self._buffers = []
+        self._local = threading.local()
         self._pending_failure = None, None
+        self._pending_failure_lock = threading.Lock()
+        self._dispatchers = []
+        self.stats = EventStats()
+
+    def _get_listener_dispatcher(self, listener):
+        queue_size = getattr(listener, "dispatch_queue_size", None)
+        if not queue_size:
+            return None
+        dispatcher = _ListenerDispatcher(listener, queue_size, self._set_pending_failure)
+        self._dispatchers.append(dispatcher)
+        return dispatcher
+
+    def _set_pending_failure(self, excp, serialized_excp):
+        # like the failure of any other listener, the failure of a dispatched listener stops the test run
+        # (see RunContext.is_task_to_be_skipped) and is raised at its end
+        with self._pending_failure_lock:
+            if self._pending_failure[0] is None:
+                self._pending_failure = excp, serialized_excp
+
+    def _flush_dispatchers(self):
+        # the dispatchers have not been flushed if the events have been interrupted before the end of the test session
+        for dispatcher in self._dispatchers:
+            if dispatcher.is_active():
+                dispatcher.flush()
+
+    def _get_buffer(self):
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = None
+        # NB: the buffers are reset by each handle_events
+        if buffer is None or buffer.generation is not self._queue:
+            buffer = self._local.buffer = _EventBuffer(self._queue)
+            with self._condition:
+                self._buffers.append(buffer)
+        return buffer
+
+    def _flush_buffers(self):
+        # NB: the condition must be held, the buffers are only drained here
+        for buffer in self._buffers:
+            while buffer:
+                self._queue.append(buffer.popleft())
 
     def fire(self, event):
-        assert self._queue, "Events can't be fired outside the 'handle_events' context manager."
+        assert self._queue is not None, "Events can't be fired outside the 'handle_events' context manager."
         if DEBUG:
             print("Fire event %s" % event)
-        self._queue.put(event)
+        item = event, time.perf_counter()
+        if isinstance(event, RuntimeEvent):
+            buffer = self._get_buffer()
+            buffer.append(item)
+            if len(buffer) < self.MAX_BUFFER_SIZE:
+                return
+            item = None
+        with self._condition:
+            self._flush_buffers()
+            if item:
+                self._queue.append(item)
+            self._condition.notify()
 
     def get_pending_failure(self):
         return self._pending_failure
 
+    def _get_events(self):
+        with self._condition:
+            if not self._queue:
+                self._condition.wait(self.IDLE_FLUSH_DELAY)
+                if not self._queue:
+                    self._flush_buffers()
+            events = list(self._queue)
+            self._queue.clear()
+            return events
+
     def _handler_loop(self):
         while True:
-            event = self._queue.get()
-            if event is None:
-                break
-            try:
-                self.handle_event(event)
-            except Exception as excp:
-                self._pending_failure = excp, serialize_current_exception()
-                break
-            finally:
-                self._queue.task_done()
+            for event, fire_time in self._get_events():
+                if event is None:
+                    return
+                try:
+                    self.handle_event(event)
+                except Exception as excp:
+                    self._set_pending_failure(excp, serialize_current_exception())
+                    return
+                self.stats.add_event(time.perf_counter() - fire_time)
 
     @contextmanager
     def handle_events(self):
-        self._queue = Queue()
+        self._queue = collections.deque()
+        self._buffers = []
+        self.stats = EventStats()
+        start_time = time.perf_counter()
 
         thread = threading.Thread(target=self._handler_loop)
         thread.start()
@@ -139,9 +371,24 @@ class AsyncEventManager(EventManager):
         try:
             yield
         finally:
-            self._queue.put(None)
+            with self._condition:
+                self._flush_buffers()
+                self._queue.append((None, None))
+                self._condition.notify()
             thread.join()
+            self._flush_dispatchers()
             self._queue = None
+            self._buffers = []
+            self.stats.duration = time.perf_counter() - start_time
+            if DEBUG:
+                print("Event stats: %s" % self.stats)
+
+
+class _EventBuffer(collections.deque):
+    # the events fired by a thread that have not been queued yet
+    def __init__(self, generation):
+        collections.deque.__init__(self)
+        self.generation = generation
 
 
 class SyncEventManager(EventManager):
@@ -156,33 +403,35 @@ class SyncEventManager(EventManager):
 ###
 
 class _ReportEvent(Event):
+    __slots__ = ("report",)
+
     def __init__(self, report, event_time=None):
         super().__init__(event_time)
         self.report = report
 
 
 class TestSessionStartEvent(_ReportEvent):
-    pass
+    __slots__ = ()
 
 
 class TestSessionEndEvent(_ReportEvent):
-    pass
+    __slots__ = ()
 
 
 class TestSessionSetupStartEvent(Event):
-    pass
+    __slots__ = ()
 
 
 class TestSessionSetupEndEvent(Event):
-    pass
+    __slots__ = ()
 
 
 class TestSessionTeardownStartEvent(Event):
-    pass
+    __slots__ = ()
 
 
 class TestSessionTeardownEndEvent(Event):
-    pass
+    __slots__ = ()
 
 
 ###
@@ -190,6 +439,8 @@ class TestSessionTeardownEndEvent(Event):
 ###
 
 class _SuiteEvent(Event):
+    __slots__ = ("suite",)
+
     def __init__(self, suite, event_time=None):
         super().__init__(event_time)
         self.suite = suite
@@ -199,27 +450,27 @@ class _SuiteEvent(Event):
 
 
 class SuiteStartEvent(_SuiteEvent):
-    pass
+    __slots__ = ()
 
 
 class SuiteEndEvent(_SuiteEvent):
-    pass
+    __slots__ = ()
 
 
 class SuiteSetupStartEvent(_SuiteEvent):
-    pass
+    __slots__ = ()
 
 
 class SuiteSetupEndEvent(_SuiteEvent):
-    pass
+    __slots__ = ()
 
 
 class SuiteTeardownStartEvent(_SuiteEvent):
-    pass
+    __slots__ = ()
 
 
 class SuiteTeardownEndEvent(_SuiteEvent):
-    pass
+    __slots__ = ()
 
 
 ###
@@ -227,6 +478,8 @@ class SuiteTeardownEndEvent(_SuiteEvent):
 ###
 
 class _TestEvent(Event):
+    __slots__ = ("test",)
+
     def __init__(self, test, event_time=None):
         super().__init__(event_time)
         self.test = test
@@ -236,20 +489,28 @@ class _TestEvent(Event):
 
 
 class TestStartEvent(_TestEvent):
-    pass
+    __slots__ = ()
 
 
 class TestEndEvent(_TestEvent):
-    pass
+    __slots__ = ("status_details",)
+
+    def __init__(self, test, event_time=None, status_details=None):
+        super().__init__(test, event_time)
+        self.status_details = status_details
 
 
 class TestSkippedEvent(_TestEvent):
+    __slots__ = ("skipped_reason",)
+
     def __init__(self, test, reason, event_time=None):
         super().__init__(test, event_time)
         self.skipped_reason = reason
 
 
 class TestDisabledEvent(_TestEvent):
+    __slots__ = ("disabled_reason",)
+
     def __init__(self, test, reason, event_time=None):
         super().__init__(test, event_time)
         self.disabled_reason = reason
@@ -260,12 +521,16 @@ class TestDisabledEvent(_TestEvent):
 ###
 
 class RuntimeEvent(Event):
+    __slots__ = ("location",)
+
     def __init__(self, location, event_time=None):
         super().__init__(event_time)
         self.location = location
 
 
 class StepStartEvent(RuntimeEvent):
+    __slots__ = ("step_description", "thread_id")
+
     def __init__(self, location, description, thread_id, event_time=None):
         super().__init__(location, event_time)
         self.step_description = description
@@ -278,6 +543,8 @@ class StepStartEvent(RuntimeEvent):
 
 
 class StepEndEvent(RuntimeEvent):
+    __slots__ = ("step", "thread_id")
+
     def __init__(self, location, step, thread_id, event_time=None):
         super().__init__(location, event_time)
         self.step = step
@@ -289,6 +556,8 @@ class SteppedEvent(RuntimeEvent):
     This event class cannot be instantiated directly and only serve has a base
     class for all events happening within a step.
     """
+    __slots__ = ("step", "thread_id")
+
     def __init__(self, location, step, thread_id, event_time=None):
         super().__init__(location, event_time)
         self.step = step
@@ -296,6 +565,8 @@ class SteppedEvent(RuntimeEvent):
 
 
 class LogEvent(SteppedEvent):
+    __slots__ = ("log_level", "log_message")
+
     def __init__(self, location, step, thread_id, level, message, event_time=None):
         super().__init__(location, step, thread_id, event_time)
         self.log_level = level
@@ -308,6 +579,8 @@ class LogEvent(SteppedEvent):
 
 
 class CheckEvent(SteppedEvent):
+    __slots__ = ("check_description", "check_is_successful", "check_details")
+
     def __init__(self, location, step, thread_id, description, is_successful, details=None, event_time=None):
         super().__init__(location, step, thread_id, event_time)
         self.check_description = description
@@ -322,6 +595,8 @@ class CheckEvent(SteppedEvent):
 
 
 class LogAttachmentEvent(SteppedEvent):
+    __slots__ = ("attachment_path", "attachment_description", "as_image")
+
     def __init__(self, location, step, thread_id, path, description, as_image, event_time=None):
         super().__init__(location, step, thread_id, event_time)
         self.attachment_path = path
@@ -335,6 +610,8 @@ class LogAttachmentEvent(SteppedEvent):
 
 
 class LogUrlEvent(SteppedEvent):
+    __slots__ = ("url", "url_description")
+
     def __init__(self, location, step, thread_id, url, description, event_time=None):
         super().__init__(location, step, thread_id, event_time)
         self.url = url
@@ -344,3 +621,48 @@ class LogUrlEvent(SteppedEvent):
         return "<Event type='%s' url='%s' description='%s'>" % (
             self.get_name(), self.url, self.url_description
         )
+
+
+###
+# Event serialization, used to transmit events fired outside the current process
+###
+
+def _get_event_attributes(event):
+    attrs = {}
+    for klass in reversed(type(event).__mro__):
+        for attr_name in klass.__dict__.get("__slots__", ()):
+            if hasattr(event, attr_name):
+                attrs[attr_name] = getattr(event, attr_name)
+    # the event classes defined outside this module may not use __slots__
+    attrs.update(getattr(event, "__dict__", {}))
+    return attrs
+
+
+def serialize_event(event):
+    """
+    Serialize an event into a picklable (name, attributes) tuple, the test and suite objects
+    referenced by the event are replaced by their path.
+    """
+    attrs = _get_event_attributes(event)
+    if "test" in attrs:
+        attrs["test"] = attrs["test"].path
+    if "suite" in attrs:
+        attrs["suite"] = attrs["suite"].path
+    return event.get_name(), attrs
+
+
+def unserialize_event(serialized_event, event_manager, tests, suites):
+    """
+    Re-create an event serialized by :py:func:`serialize_event`, the test and suite paths are looked up
+    in the ``tests`` and ``suites`` dicts.
+    """
+    event_name, attrs = serialized_event
+    event_class = event_manager.get_event_class(event_name)
+    event = event_class.__new__(event_class)
+    for attr_name, attr_value in attrs.items():
+        if attr_name == "test":
+            attr_value = tests[attr_value]
+        elif attr_name == "suite":
+            attr_value = suites[attr_value]
+        setattr(event, attr_name, attr_value)
+    return event
@@ -57,6 +57,16 @@ class AbortAllTests(LemoncheesecakeException):
         LemoncheesecakeException.__init__(self, *args)
 
 
+class CancelTest(AbortTest):
+    """
+    This exception is raised within a running test (through the logging functions) when the test run has been
+    cancelled because of a failure and ``--stop-on-failure``.
+    """
+    # NB: sphinx requires the constructor to be overridden, otherwise it raises an error
+    def __init__(self, *args):
+        AbortTest.__init__(self, *args)
+
+
 class UserError(LemoncheesecakeException):
     """
     This exception is intended to be raised in pre-run and post-run phases of the project
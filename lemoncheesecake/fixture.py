@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import inspect
+import threading
 from typing import List, Any, Sequence, Callable, Optional
 
 from lemoncheesecake.helpers.moduleimport import import_module, get_matching_files, get_py_files_from_dir
@@ -8,6 +10,7 @@ from lemoncheesecake.exceptions import ValidationError, ModuleImportError, Fixtu
 from lemoncheesecake.helpers.orderedset import OrderedSet
 from lemoncheesecake.helpers.introspection import get_callable_args
 from lemoncheesecake.helpers.threading import ThreadedFactory
+from lemoncheesecake.helpers.asyncio import run_coroutine
 
 
 _FORBIDDEN_FIXTURE_NAMES = ("fixture_name",)
@@ -40,13 +43,14 @@ def get_fixture(name):
 
 
 class _FixtureInfo:
-    def __init__(self, names, scope, per_thread):
+    def __init__(self, names, scope, per_thread, prewarm=False):
         self.names = names
         self.scope = scope
         self.per_thread = per_thread
+        self.prewarm = prewarm
 
 
-def fixture(names=None, scope="test", per_thread=False):
+def fixture(names=None, scope="test", per_thread=False, prewarm=False):
     """
     Decorator, declare a function as a fixture.
 
@@ -61,6 +65,16 @@ def fixture(names=None, scope="test", per_thread=False):
 
         - the scope can only be ``session`` or ``suite``
         - the fixture can only be used in tests or by fixtures with the ``test`` scope
+
+    :param prewarm: only applicable to a per-thread fixture: instead of being set up by each thread
+        the first time one of its tests uses it, the fixture is set up on all the threads at the same time
+        right after the test session setup (or the suite setup, depending on the fixture scope).
+        A prewarm setup is not bound to any report location: if it fails (or logs anything), the fixture
+        is set up again by the first test using it on the thread (*new in version 1.16.0*)
+
+    .. versionchanged:: 1.16.0
+
+        The decorated function can be a coroutine function or an async generator function.
     """
     def wrapper(func):
         if scope not in _SCOPE_LEVELS.keys():
@@ -69,7 +83,10 @@ def fixture(names=None, scope="test", per_thread=False):
         if per_thread and scope not in ("session", "suite"):
             raise AssertionError("The fixture can only be per_thread=True if scope is 'session' or 'suite'")
 
-        setattr(func, "_lccfixtureinfo", _FixtureInfo(names or [func.__name__], scope, per_thread))
+        if prewarm and not per_thread:
+            raise AssertionError("The fixture can only be prewarm=True if per_thread=True")
+
+        setattr(func, "_lccfixtureinfo", _FixtureInfo(names or [func.__name__], scope, per_thread, prewarm))
         return func
 
     return wrapper
@@ -79,9 +96,15 @@ class _BaseFixtureResult:
     def get(self):
         raise NotImplementedError()
 
+    async def get_async(self):
+        return self.get()
+
     def teardown(self):
         pass
 
+    async def teardown_async(self):
+        self.teardown()
+
 
 class _FixtureResult(_BaseFixtureResult):
     def __init__(self, value):
@@ -111,17 +134,84 @@ class _GeneratorFixtureResult(_BaseFixtureResult):
             )
 
 
+class _AsyncGeneratorFixtureResult(_BaseFixtureResult):
+    def __init__(self, name, generator, value):
+        self.name = name
+        self.generator = generator
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def teardown(self):
+        run_coroutine(self.teardown_async())
+
+    async def teardown_async(self):
+        try:
+            await self.generator.__anext__()
+        except StopAsyncIteration:
+            pass
+        else:
+            raise AssertionError(
+                "Fixture '%s' yields more than once: only one yield is supported." % self.name
+            )
+
+
 class _PerThreadFixtureResult(_BaseFixtureResult, ThreadedFactory):
     def __init__(self, name, func, params):
         ThreadedFactory.__init__(self)
         self.name = name
         self.func = func
         self.params = params
+        self._torn_down = False
+        # prewarm may be run by a worker thread while the fixture is being torn down
+        self._lock = threading.Lock()
 
     def get(self):
         return self.get_object().get()
 
+    async def get_async(self):
+        # NB: the fixture cannot be set up through get_object() from the event loop thread, since the setup
+        # of an async fixture would wait for the event loop
+        if not hasattr(self._local, "object"):
+            # the async tests being run concurrently on the event loop thread share the same setup
+            if getattr(self._local, "async_setup", None) is None:
+                self._local.async_setup = asyncio.ensure_future(self._setup_async())
+            setup = self._local.async_setup
+            try:
+                await asyncio.shield(setup)
+            finally:
+                if setup.done():
+                    self._local.async_setup = None
+        return self._local.object.get()
+
+    async def _setup_async(self):
+        result = await _build_fixture_result_from_func_async(self.name, self.func, self.params)
+        with self._lock:
+            self._local.object = result
+            self._objects.append(result)
+
+    def prewarm(self):
+        """
+        Set up the fixture for the current thread (if not already done and the fixture has not been torn down).
+        """
+        with self._lock:
+            if self._torn_down or hasattr(self._local, "object"):
+                return
+
+        # the setup itself is not run under the lock so that the fixture can be set up by all threads at once
+        result = self.setup_object()
+        with self._lock:
+            if not self._torn_down:
+                self._local.object = result
+                self._objects.append(result)
+                return
+        # the fixture has been torn down during the setup, the result would never be torn down otherwise
+        self.teardown_object(result)
+
     def teardown(self):
+        with self._lock:
+            self._torn_down = True
         self.teardown_factory()
 
     def setup_object(self):
@@ -138,16 +228,33 @@ def _build_fixture_result_from_func(name, func, params, per_thread=False):
         value = func(**params)
         if inspect.isgenerator(value):
             return _GeneratorFixtureResult(name, value)
+        elif inspect.isasyncgen(value):
+            return _AsyncGeneratorFixtureResult(name, value, run_coroutine(value.__anext__()))
+        elif inspect.iscoroutine(value):
+            return _FixtureResult(run_coroutine(value))
         else:
             return _FixtureResult(value)
 
 
+async def _build_fixture_result_from_func_async(name, func, params):
+    value = func(**params)
+    if inspect.isgenerator(value):
+        return _GeneratorFixtureResult(name, value)
+    elif inspect.isasyncgen(value):
+        return _AsyncGeneratorFixtureResult(name, value, await value.__anext__())
+    elif inspect.iscoroutine(value):
+        return _FixtureResult(await value)
+    else:
+        return _FixtureResult(value)
+
+
 class _BaseFixture:
-    def __init__(self, name, scope, params, per_thread):
+    def __init__(self, name, scope, params, per_thread, prewarm=False):
         self.name = name
         self.scope = scope
         self.params = params
         self.per_thread = per_thread
+        self.prewarm = prewarm
 
     @property
     def scope_level(self):
@@ -156,10 +263,13 @@ class _BaseFixture:
     def execute(self, params: dict) -> _BaseFixtureResult:
         raise NotImplementedError()
 
+    async def execute_async(self, params: dict) -> _BaseFixtureResult:
+        return self.execute(params)
+
 
 class Fixture(_BaseFixture):
-    def __init__(self, name, func, scope, params, per_thread):
-        _BaseFixture.__init__(self, name, scope, params, per_thread)
+    def __init__(self, name, func, scope, params, per_thread, prewarm=False):
+        _BaseFixture.__init__(self, name, scope, params, per_thread, prewarm)
         self.func = func
 
     def execute(self, params):
@@ -167,6 +277,11 @@ class Fixture(_BaseFixture):
             assert param_name in self.params
         return _build_fixture_result_from_func(self.name, self.func, params, self.per_thread)
 
+    async def execute_async(self, params):
+        if self.per_thread:
+            return self.execute(params)
+        return await _build_fixture_result_from_func_async(self.name, self.func, params)
+
 
 class BuiltinFixture(_BaseFixture):
     def __init__(self, name, value):
@@ -214,12 +329,37 @@ class ScheduledFixtures:
         self._results[name].teardown()
         del self._results[name]
 
+    async def _get_fixture_params_async(self, name):
+        return {
+            param_name: name if param_name == "fixture_name" else await self.get_fixture_result_async(param_name)
+                for param_name in self._fixtures[name].params
+        }
+
+    async def _setup_fixture_async(self, name):
+        assert name not in self._results, "Cannot setup fixture '%s', it has already been executed" % name
+        self._results[name] = await self._fixtures[name].execute_async(await self._get_fixture_params_async(name))
+
+    async def _teardown_fixture_async(self, name):
+        assert name in self._results, "Cannot teardown fixture '%s', it has not been previously executed" % name
+        await self._results[name].teardown_async()
+        del self._results[name]
+
     def get_setup_teardown_pairs(self):
         return list(map(
             lambda name: (lambda: self._setup_fixture(name), lambda: self._teardown_fixture(name)),
             self._fixtures
         ))
 
+    def get_async_setup_teardown_pairs(self):
+        """
+        Like :py:meth:`get_setup_teardown_pairs` but the setup and teardown functions return awaitables,
+        they are meant to be used from the event loop.
+        """
+        return list(map(
+            lambda name: (lambda: self._setup_fixture_async(name), lambda: self._teardown_fixture_async(name)),
+            self._fixtures
+        ))
+
     def get_fixture_result(self, name):
         if name in self._fixtures:
             assert name in self._results, "Cannot get fixture '%s' result, it has not been previously executed" % name
@@ -229,9 +369,32 @@ class ScheduledFixtures:
         else:
             raise LookupError("Cannot find fixture named '%s' in scheduled fixtures" % name)
 
+    async def get_fixture_result_async(self, name):
+        """
+        Like :py:meth:`get_fixture_result` but meant to be used from the event loop (a per-thread fixture
+        may have to be set up for the event loop thread).
+        """
+        if name in self._fixtures:
+            assert name in self._results, "Cannot get fixture '%s' result, it has not been previously executed" % name
+            return await self._results[name].get_async()
+        elif self._parent_scheduled_fixtures:
+            return await self._parent_scheduled_fixtures.get_fixture_result_async(name)
+        else:
+            raise LookupError("Cannot find fixture named '%s' in scheduled fixtures" % name)
+
     def get_fixture_results(self, names):
         return {name: self.get_fixture_result(name) for name in names}
 
+    def get_fixture_results_to_prewarm(self):
+        """
+        Get the results of the per-thread fixtures that must be set up on all the threads once the fixtures
+        of the scope have been set up, as (fixture name, result) pairs.
+        """
+        return [
+            (name, self._results[name]) for name, fixture in self._fixtures.items()
+            if fixture.prewarm and name in self._results
+        ]
+
 
 class FixtureRegistry:
     def __init__(self):
@@ -400,7 +563,7 @@ def load_fixtures_from_func(func: Callable) -> List[Fixture]:
     assert hasattr(func, "_lccfixtureinfo")
     info = func._lccfixtureinfo  # noqa
     args = get_callable_args(func)
-    return [Fixture(name, func, info.scope, args, info.per_thread) for name in info.names]
+    return [Fixture(name, func, info.scope, args, info.per_thread, info.prewarm) for name in info.names]
 
 
 def load_fixtures_from_module(mod: Any) -> List[Fixture]:
@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+import os
+import threading
+
+
+class EventLoopThread:
+    """
+    An asyncio event loop running forever in a dedicated thread.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="lcc-event-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def is_current_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, coroutine):
+        """
+        Schedule the coroutine on the event loop and return a :py:class:`concurrent.futures.Future`.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_event_loop_thread = None
+_event_loop_thread_lock = threading.Lock()
+
+
+def get_event_loop_thread() -> EventLoopThread:
+    """
+    Get the event loop thread shared by the whole test run, it is created on the first call.
+    """
+    global _event_loop_thread
+
+    with _event_loop_thread_lock:
+        # NB: the event loop thread of the parent process does not survive a fork()
+        if _event_loop_thread is None or _event_loop_thread.pid != os.getpid():
+            _event_loop_thread = EventLoopThread()
+        return _event_loop_thread
+
+
+def stop_event_loop_thread():
+    global _event_loop_thread
+
+    with _event_loop_thread_lock:
+        if _event_loop_thread is not None and _event_loop_thread.pid == os.getpid():
+            _event_loop_thread.stop()
+        _event_loop_thread = None
+
+
+def run_coroutine(coroutine):
+    """
+    Run the coroutine on the shared event loop and wait for its result. The context variables of the caller
+    (such as the session cursor) are visible from the coroutine.
+    """
+    event_loop_thread = get_event_loop_thread()
+    if event_loop_thread.is_current_thread():
+        coroutine.close()
+        raise RuntimeError("Cannot wait for a coroutine from the event loop thread, it must be awaited instead")
+
+    context = contextvars.copy_context()
+
+    async def wrapper():
+        for var, value in context.items():
+            var.set(value)
+        return await coroutine
+
+    return event_loop_thread.submit(wrapper()).result()
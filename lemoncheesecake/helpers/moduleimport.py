@@ -1,9 +1,13 @@
 import os
+import os.path as osp
 import sys
 import glob
 import fnmatch
 import re
+import builtins
+import inspect
 import importlib.util
+from contextlib import contextmanager
 
 from lemoncheesecake.exceptions import serialize_current_exception, ModuleImportError
 
@@ -39,6 +43,80 @@ def get_matching_files(patterns, excluding=[]):
     return sorted(files)
 
 
+# for each module file imported through import_module (and for the modules it imports in turn),
+# the files of the modules it imports
+_module_dependencies = {}
+_original_import = None
+_recording_depth = 0
+
+
+def _get_module_file(module):
+    path = getattr(module, "__file__", None)
+    return osp.abspath(path) if path else None
+
+
+def _get_imported_modules(module, name, globals, fromlist, level):
+    if level > 0:
+        try:
+            name = importlib.util.resolve_name("." * level + name, globals.get("__package__"))
+        except (ImportError, ValueError):
+            return [module]
+
+    # "import a.b.c" imports (and possibly executes) a, a.b and a.b.c
+    parts = name.split(".")
+    modules = [sys.modules.get(".".join(parts[:i + 1])) for i in range(len(parts))]
+    if fromlist:
+        modules.extend(getattr(modules[-1], attr, None) for attr in fromlist if attr != "*")
+    return [module for module in modules if inspect.ismodule(module)]
+
+
+def _recording_import(name, globals=None, locals=None, fromlist=(), level=0):
+    module = _original_import(name, globals, locals, fromlist, level)
+
+    importer = (globals or {}).get("__file__")
+    if importer:
+        importer = osp.abspath(importer)
+        dependencies = _module_dependencies.setdefault(importer, set())
+        for imported_module in _get_imported_modules(module, name, globals, fromlist, level):
+            imported_file = _get_module_file(imported_module)
+            if imported_file and imported_file != importer:
+                dependencies.add(imported_file)
+
+    return module
+
+
+@contextmanager
+def _record_imports():
+    global _original_import, _recording_depth
+
+    if _recording_depth == 0:
+        _original_import = builtins.__import__
+        builtins.__import__ = _recording_import
+    _recording_depth += 1
+    try:
+        yield
+    finally:
+        _recording_depth -= 1
+        if _recording_depth == 0:
+            builtins.__import__ = _original_import
+
+
+def get_module_dependencies(path, root_dir):
+    """
+    Get the files of the modules imported (directly or not) by the module file ``path`` when it has been
+    imported through :py:func:`import_module`. Only the files located in ``root_dir`` are taken into account.
+    """
+    root_dir = osp.join(osp.abspath(root_dir), "")
+    dependencies = set()
+    paths_to_visit = [osp.abspath(path)]
+    while paths_to_visit:
+        for dependency in _module_dependencies.get(paths_to_visit.pop(), ()):
+            if dependency not in dependencies and dependency.startswith(root_dir):
+                dependencies.add(dependency)
+                paths_to_visit.append(dependency)
+    return dependencies
+
+
 def import_module(path):
     try:
         # NB: path is used as module name to avoid possible conflicting with Python modules using
@@ -46,7 +124,9 @@ def import_module(path):
         spec = importlib.util.spec_from_file_location(path, path)
         module = importlib.util.module_from_spec(spec)
         sys.modules[path] = module
-        spec.loader.exec_module(module)
+        _module_dependencies[osp.abspath(path)] = set()
+        with _record_imports():
+            spec.loader.exec_module(module)
     except Exception:
         raise ModuleImportError(
             "Error while importing file '%s': %s" % (path, serialize_current_exception(show_stacktrace=True))
@@ -0,0 +1,264 @@
+"""
+Historical data (such as durations) extracted from previous reports.
+"""
+
+import json
+import os
+import os.path as osp
+import statistics
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from lemoncheesecake.reporting import load_report, Report
+from lemoncheesecake.reporting.reportdir import DEFAULT_REPORT_DIR_NAME
+from lemoncheesecake.exceptions import ReportLoadingError, LemoncheesecakeException
+from lemoncheesecake.impact import CACHE_DIR
+from lemoncheesecake.suite import Suite
+from lemoncheesecake.testtree import flatten_tests, sort_tests
+
+HISTORY_FILENAME = "history.json"
+ARCHIVES_DIR_NAME = "reports"
+DEFAULT_HISTORY_DEPTH = 10
+
+
+def _median(values):
+    return statistics.median(values) if values else None
+
+
+class Durations:
+    """
+    Tests, suite setups and suite teardowns durations taken from a previous report.
+
+    The duration of a test that is not known is estimated using the median duration of the
+    other tests of its suite (or of all the tests if the suite is not known either).
+    """
+
+    def __init__(self, tests: Dict[str, float] = None, suite_setups: Dict[str, float] = None,
+                 suite_teardowns: Dict[str, float] = None):
+        self.tests = tests or {}
+        self.suite_setups = suite_setups or {}
+        self.suite_teardowns = suite_teardowns or {}
+        self._suite_medians = {}
+        for suite_path, durations in self._group_by_suite(self.tests).items():
+            self._suite_medians[suite_path] = _median(durations)
+        self._median = _median(list(self.tests.values())) or 0
+
+    @staticmethod
+    def _group_by_suite(test_durations):
+        durations_by_suite = {}
+        for test_path, duration in test_durations.items():
+            suite_path = test_path.rpartition(".")[0]
+            durations_by_suite.setdefault(suite_path, []).append(duration)
+        return durations_by_suite
+
+    @classmethod
+    def from_report(cls, report: Report) -> "Durations":
+        tests, suite_setups, suite_teardowns = {}, {}, {}
+        for test in report.all_tests():
+            if test.status in ("passed", "failed") and test.duration is not None:
+                tests[test.path] = test.duration
+        for suite in report.all_suites():
+            if suite.suite_setup and suite.suite_setup.duration is not None:
+                suite_setups[suite.path] = suite.suite_setup.duration
+            if suite.suite_teardown and suite.suite_teardown.duration is not None:
+                suite_teardowns[suite.path] = suite.suite_teardown.duration
+        return cls(tests, suite_setups, suite_teardowns)
+
+    def is_empty(self) -> bool:
+        return not self.tests
+
+    def get_test_duration(self, test_path: str) -> float:
+        try:
+            return self.tests[test_path]
+        except KeyError:
+            suite_median = self._suite_medians.get(test_path.rpartition(".")[0])
+            return suite_median if suite_median is not None else self._median
+
+    def get_suite_setup_duration(self, suite_path: str) -> float:
+        return self.suite_setups.get(suite_path, 0)
+
+    def get_suite_teardown_duration(self, suite_path: str) -> float:
+        return self.suite_teardowns.get(suite_path, 0)
+
+
+def get_failed_test_paths(report: Report) -> Set[str]:
+    return {test.path for test in report.all_tests() if test.status == "failed"}
+
+
+def get_previous_report_path(project_dir: str, report_path: Optional[str] = None) -> Optional[str]:
+    """
+    Get the path of the report to be used as a previous report: either the given report path or
+    the last report of the project (if any).
+    """
+    if report_path:
+        return report_path
+
+    report_path = osp.join(project_dir, DEFAULT_REPORT_DIR_NAME)
+    return report_path if osp.exists(report_path) else None
+
+
+def load_previous_report(project_dir: str, report_path: Optional[str] = None) -> Optional[Report]:
+    """
+    Load the report returned by :py:func:`get_previous_report_path`, ``None`` is returned
+    if there is no previous report.
+    """
+    path = get_previous_report_path(project_dir, report_path)
+    if not path:
+        return None
+
+    try:
+        return load_report(path)
+    except ReportLoadingError as excp:
+        if report_path:
+            raise LemoncheesecakeException("Cannot load previous report: %s" % excp)
+        # the last report of the project may be incomplete or unreadable, ignore it
+        return None
+
+
+class History:
+    """
+    The results (status and duration) of the tests in several previous reports.
+    """
+
+    def __init__(self, results: Dict[str, List[Tuple[str, Optional[float]]]] = None):
+        # the passed / failed results of each test, from the most recent report to the oldest one
+        self.results = results or {}
+
+    @staticmethod
+    def get_test_results(report: Report) -> Dict[str, Tuple[str, Optional[float]]]:
+        return {
+            test.path: (test.status, test.duration) for test in report.all_tests()
+            if test.status in ("passed", "failed")
+        }
+
+    @classmethod
+    def from_test_results(cls, test_results: Sequence[Dict[str, Tuple[str, Optional[float]]]]) -> "History":
+        """
+        Build the history from the test results (see :py:meth:`get_test_results`) of reports, from the most
+        recent report to the oldest one.
+        """
+        results = {}
+        for report_results in test_results:
+            for test_path, result in report_results.items():
+                results.setdefault(test_path, []).append(tuple(result))
+        return cls(results)
+
+    def is_empty(self) -> bool:
+        return not self.results
+
+    def get_failure_rate(self, test_path: str) -> float:
+        results = self.results.get(test_path)
+        if not results:
+            return 0
+        return sum(1 for status, _ in results if status == "failed") / len(results)
+
+    def get_durations(self) -> Durations:
+        """
+        Get the most recent duration of each test.
+        """
+        tests = {}
+        for test_path, results in self.results.items():
+            for _, duration in results:
+                if duration is not None:
+                    tests[test_path] = duration
+                    break
+        return Durations(tests)
+
+
+def _get_report_signature(report_dir):
+    # a report being saved again (or replaced) gets a new signature
+    return max((entry.stat().st_mtime for entry in os.scandir(report_dir) if entry.is_file()), default=0)
+
+
+def get_report_dirs(project_dir: str) -> List[str]:
+    """
+    Get the report directories of the project: the last report and the archived ones, from the most recent one
+    to the oldest one.
+    """
+    paths = [osp.join(project_dir, DEFAULT_REPORT_DIR_NAME)]
+    archives_dir = osp.join(project_dir, ARCHIVES_DIR_NAME)
+    if osp.isdir(archives_dir):
+        paths.extend(entry.path for entry in os.scandir(archives_dir) if entry.is_dir())
+
+    # NB: the last report may be a symlink to an archived report
+    report_dirs = {}
+    for path in paths:
+        if osp.isdir(path):
+            report_dirs[osp.realpath(path)] = _get_report_signature(path)
+    return sorted(report_dirs, key=lambda path: report_dirs[path], reverse=True)
+
+
+def get_history_index_path(project_dir: str) -> str:
+    return osp.join(project_dir, CACHE_DIR, HISTORY_FILENAME)
+
+
+def _load_history_index(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)["reports"]
+    except (IOError, ValueError, KeyError):
+        return {}
+
+
+def _save_history_index(path, reports):
+    os.makedirs(osp.dirname(path), exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump({"reports": reports}, fh)
+
+
+def load_history(project_dir: str, depth: int = DEFAULT_HISTORY_DEPTH) -> History:
+    """
+    Load the history of the tests from the ``depth`` most recent reports of the project (see
+    :py:func:`get_report_dirs`).
+
+    The test results of each report are kept in an index file (along with the signature of the report) so that
+    only the new (or modified) reports are actually loaded.
+    """
+    index_path = get_history_index_path(project_dir)
+    index = _load_history_index(index_path)
+    new_index = {}
+    for report_dir in get_report_dirs(project_dir):
+        if len(new_index) == depth:
+            break
+        signature = _get_report_signature(report_dir)
+        entry = index.get(report_dir)
+        if entry is None or entry["signature"] != signature:
+            try:
+                report = load_report(report_dir)
+            except ReportLoadingError:
+                # the report may be incomplete or unreadable
+                continue
+            entry = {"signature": signature, "tests": History.get_test_results(report)}
+        new_index[report_dir] = entry
+
+    if new_index != index:
+        _save_history_index(index_path, new_index)
+
+    return History.from_test_results([entry["tests"] for entry in new_index.values()])
+
+
+def order_tests_by_failure_rate(suites: Sequence[Suite], history: History) -> List[Suite]:
+    """
+    Reorder (in place) the tests so that the tests that failed the most often in the history come first,
+    and then the shortest ones. A test is never ordered after the tests depending on it.
+
+    The tests dependencies must have been resolved (see :py:func:`resolve_tests_dependencies`).
+    """
+    durations = history.get_durations()
+    tests = {test.path: test for test in flatten_tests(suites)}
+    keys = {
+        test_path: (-history.get_failure_rate(test_path), durations.get_test_duration(test_path))
+        for test_path in tests
+    }
+
+    # a test takes the best key of the tests depending on it (directly or not): since the tests are visited from
+    # the best key to the worst one, the first key given to a test is the best one
+    effective_keys = {}
+    for test_path in sorted(tests, key=keys.get):
+        test_paths = [test_path]
+        while test_paths:
+            path = test_paths.pop()
+            if path not in effective_keys:
+                effective_keys[path] = keys[test_path]
+                test_paths.extend(dep.path for dep in tests[path].resolved_dependencies if dep.path in tests)
+
+    return sort_tests(suites, lambda test: effective_keys[test.path])
@@ -0,0 +1,170 @@
+"""
+Test impact analysis: select the tests affected by the files changed since a git revision or since a snapshot.
+
+The files a test depends on are the files of its suite (and parent suites), the files of the fixtures it uses
+(directly or not), the project file and the local modules (i.e. located in the project directory) imported by
+these files as recorded by :py:func:`lemoncheesecake.helpers.moduleimport.import_module`.
+"""
+
+import inspect
+import json
+import os
+import os.path as osp
+import subprocess
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from lemoncheesecake.exceptions import LemoncheesecakeException
+from lemoncheesecake.fixture import Fixture
+from lemoncheesecake.helpers.moduleimport import get_module_dependencies
+from lemoncheesecake.suite import Suite, Test
+from lemoncheesecake.testtree import filter_suites, flatten_tests
+
+CACHE_DIR = ".lcc_cache"
+DEPENDENCIES_FILENAME = "dependencies.json"
+
+
+def _get_object_file(obj):
+    if not (inspect.isclass(obj) or inspect.ismodule(obj) or inspect.isfunction(obj) or inspect.ismethod(obj)):
+        obj = type(obj)  # suites loaded from classes are instances
+    try:
+        return osp.abspath(inspect.getfile(obj))
+    except TypeError:  # builtin objects
+        return None
+
+
+class DependencyMap:
+    """
+    The files each test depends on.
+    """
+
+    def __init__(self, project_dir: str, project_file: Optional[str], fixtures: Iterable[Fixture]):
+        self.project_dir = project_dir
+        self._project_files = set(filter(None, [project_file]))
+        self._fixtures = {fixture.name: fixture for fixture in fixtures if isinstance(fixture, Fixture)}
+        self._module_dependencies = {}
+        self.tests: Dict[str, Set[str]] = {}
+
+    def _get_files_with_dependencies(self, files):
+        files_with_dependencies = set(files)
+        for file in files:
+            if file not in self._module_dependencies:
+                self._module_dependencies[file] = get_module_dependencies(file, self.project_dir)
+            files_with_dependencies.update(self._module_dependencies[file])
+        return files_with_dependencies
+
+    def _get_fixture_files(self, fixture_names):
+        files = set()
+        fixture_names = list(fixture_names)
+        visited_fixture_names = set()
+        while fixture_names:
+            fixture_name = fixture_names.pop()
+            if fixture_name in visited_fixture_names or fixture_name not in self._fixtures:
+                continue
+            visited_fixture_names.add(fixture_name)
+            fixture = self._fixtures[fixture_name]
+            files.add(_get_object_file(fixture.func))
+            fixture_names.extend(fixture.params)
+        return files
+
+    def add_test(self, test: Test):
+        files = set(self._project_files)
+        fixture_names = set(test.get_fixtures())
+        suite = test.parent_suite
+        while suite is not None:
+            if suite.obj is not None:
+                files.add(_get_object_file(suite.obj))
+            fixture_names.update(suite.get_fixtures())
+            suite = suite.parent_suite
+        files.update(self._get_fixture_files(fixture_names))
+        files.discard(None)
+        self.tests[test.path] = self._get_files_with_dependencies(files)
+
+    def get_files(self) -> Set[str]:
+        return set().union(*self.tests.values())
+
+    def save(self, path: str):
+        """
+        Save the dependency map along with the modification time of the files (that can then be used
+        as a snapshot, see :py:func:`get_files_changed_since_snapshot`).
+        """
+        os.makedirs(osp.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            json.dump(
+                {
+                    "tests": {path: sorted(files) for path, files in self.tests.items()},
+                    "mtimes": {file: osp.getmtime(file) for file in sorted(self.get_files()) if osp.exists(file)}
+                },
+                fh, indent=2
+            )
+
+
+def get_dependency_map_path(project_dir: str) -> str:
+    return osp.join(project_dir, CACHE_DIR, DEPENDENCIES_FILENAME)
+
+
+def get_files_changed_since_snapshot(snapshot_path: str, files: Iterable[str]) -> Set[str]:
+    """
+    Get the files whose modification time is not the same as in the snapshot (a dependency map file).
+    """
+    try:
+        with open(snapshot_path) as fh:
+            mtimes = json.load(fh)["mtimes"]
+    except (IOError, ValueError, KeyError) as excp:
+        raise LemoncheesecakeException("Cannot load snapshot '%s': %s" % (snapshot_path, excp))
+
+    return {file for file in files if not osp.exists(file) or osp.getmtime(file) != mtimes.get(file)}
+
+
+def _run_git(args, cwd):
+    try:
+        return subprocess.run(
+            ["git"] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+            universal_newlines=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as excp:
+        stderr = getattr(excp, "stderr", None)
+        raise LemoncheesecakeException(
+            "Cannot get the changed files with git: %s" % (stderr.strip() if stderr else excp)
+        )
+
+
+def get_files_changed_since_revision(revision: str, project_dir: str) -> Set[str]:
+    """
+    Get the files that changed since the git revision (including uncommitted and untracked files).
+    """
+    top_dir = _run_git(["rev-parse", "--show-toplevel"], project_dir).strip()
+    changed_files = _run_git(["diff", "--name-only", revision, "--"], project_dir).splitlines()
+    changed_files += _run_git(
+        ["ls-files", "--others", "--exclude-standard", "--full-name"], project_dir
+    ).splitlines()
+    return {osp.abspath(osp.join(top_dir, path)) for path in changed_files if path}
+
+
+def get_changed_files(changed_since: str, project_dir: str, files: Iterable[str]) -> Set[str]:
+    """
+    Get the changed files, ``changed_since`` being either the path of a snapshot (a dependency map file)
+    or a git revision.
+    """
+    if osp.isfile(changed_since):
+        return get_files_changed_since_snapshot(changed_since, files)
+    elif osp.abspath(changed_since) == get_dependency_map_path(project_dir):
+        # there is no snapshot yet, every file is considered as changed
+        return set(files)
+    else:
+        return get_files_changed_since_revision(changed_since, project_dir)
+
+
+def get_affected_suites(suites: Sequence[Suite], dependency_map: DependencyMap,
+                        changed_files: Set[str]) -> List[Suite]:
+    """
+    Get the suites containing only the tests depending on the changed files.
+    """
+    return filter_suites(suites, lambda test: not dependency_map.tests[test.path].isdisjoint(changed_files))
+
+
+def build_dependency_map(suites: Sequence[Suite], project_dir: str, project_file: Optional[str],
+                         fixtures: Iterable[Fixture]) -> DependencyMap:
+    dependency_map = DependencyMap(project_dir, project_file, fixtures)
+    for test in flatten_tests(suites):
+        dependency_map.add_test(test)
+    return dependency_map
@@ -0,0 +1,140 @@
+"""
+Fork worker processes.
+
+The worker processes are forked by a fork server, a process forked from the main process as soon as the project,
+the suites and the ``pre_run`` fixtures are loaded, before the main process starts any thread: forking a
+multi-threaded process is unsafe (a lock held by another thread at the time of the fork remains locked forever in
+the child process), the fork server is single-threaded and its children inherit (through copy-on-write) the state
+of the main process at the time the fork server has been started. The fork server also replaces the worker
+processes that are killed (on timeout for instance), since the main process cannot safely fork them itself.
+"""
+
+import os
+import sys
+import signal
+import threading
+import multiprocessing
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+
+from lemoncheesecake.exceptions import LemoncheesecakeException
+
+WORKER_TYPES = "thread", "process"
+
+
+def is_process_mode_available():
+    return hasattr(os, "fork")
+
+
+class WorkerProcessCrash(LemoncheesecakeException):
+    pass
+
+
+class WorkerProcessTimeout(WorkerProcessCrash):
+    pass
+
+
+def _describe_exit_status(status):
+    if os.WIFSIGNALED(status):
+        return "signal %d" % os.WTERMSIG(status)
+    else:
+        return "code %d" % os.WEXITSTATUS(status)
+
+
+def _fork(func):
+    # run func() in a forked process that never returns to the caller's code
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            func()
+        except BaseException:
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+    return pid
+
+
+class ForkServer:
+    """
+    Fork worker processes on demand from a single-threaded process, ``target`` is called in each worker
+    process with the :py:class:`Connection <multiprocessing.connection.Connection>` to the main process.
+    """
+
+    def __init__(self, target):
+        self._target = target
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        connection, server_connection = multiprocessing.Pipe()
+
+        def serve():
+            connection.close()
+            self._serve(server_connection)
+
+        self._pid = _fork(serve)
+        server_connection.close()
+        self._connection = connection
+
+    def _serve(self, connection):
+        # NB: this method is run in the fork server
+        while True:
+            try:
+                message_type, message = connection.recv()
+            except EOFError:
+                break
+            if message_type == "fork":
+                self._fork_worker(connection)
+            elif message_type == "wait":
+                _, status = os.waitpid(message, 0)
+                connection.send(_describe_exit_status(status))
+
+    def _fork_worker(self, server_connection):
+        worker_connection, connection = multiprocessing.Pipe()
+
+        def run_worker():
+            server_connection.close()
+            connection.close()
+            self._target(worker_connection)
+
+        pid = _fork(run_worker)
+        worker_connection.close()
+        # the worker's end of the connection is handed over to the main process
+        server_connection.send(pid)
+        reduction.send_handle(server_connection, connection.fileno(), os.getppid())
+        connection.close()
+
+    def fork_worker(self):
+        """
+        Fork a new worker process, return its pid along with the connection to it.
+        """
+        with self._lock:
+            self._connection.send(("fork", None))
+            pid = self._connection.recv()
+            return pid, Connection(reduction.recv_handle(self._connection))
+
+    def kill_worker(self, pid):
+        """
+        Kill the worker process and return the description of its exit status.
+        """
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return self.wait_worker(pid)
+
+    def wait_worker(self, pid):
+        """
+        Wait for the worker process to exit and return the description of its exit status.
+        """
+        with self._lock:
+            self._connection.send(("wait", pid))
+            return self._connection.recv()
+
+    def stop(self):
+        self._connection.close()
+        os.waitpid(self._pid, 0)
@@ -16,7 +16,7 @@ from typing import Any, Dict, Optional, Sequence, Tuple, List
 from lemoncheesecake.session import Session
 from lemoncheesecake.events import AsyncEventManager
 from lemoncheesecake.suite import load_suites_from_directory, Suite, resolve_tests_dependencies
-from lemoncheesecake.runner import run_suites
+from lemoncheesecake.runner import run_suites, is_run_parallelized
 from lemoncheesecake.fixture import load_fixtures_from_directory, Fixture, FixtureRegistry, BuiltinFixture
 from lemoncheesecake.metadatapolicy import MetadataPolicy
 from lemoncheesecake.reporting import get_reporting_backends, ReportingBackend
@@ -24,7 +24,7 @@ from lemoncheesecake.reporting.reportdir import create_report_dir_with_rotation
 from lemoncheesecake.exceptions import ProjectLoadingError, ProjectNotFound, ModuleImportError
 from lemoncheesecake.helpers.resources import get_resource_path
 from lemoncheesecake.helpers.moduleimport import import_module
-from lemoncheesecake.testtree import flatten_tests
+from lemoncheesecake.resultcache import DEFAULT_MAX_SIZE as DEFAULT_RESULT_CACHE_MAX_SIZE
 from lemoncheesecake.exceptions import UserError, LemoncheesecakeException, serialize_current_exception
 
 PROJECT_FILE = "project.py"
@@ -52,6 +52,10 @@ class Project:
         self.reporting_backends: Dict[str, ReportingBackend] = {b.get_name(): b for b in get_reporting_backends()}
         #: The list of default reporting backend (indicated by their name) that will be used by "lcc run"
         self.default_reporting_backend_names = list(DEFAULT_REPORTING_BACKENDS)
+        #: The maximum size (in bytes) of the result cache used by "lcc run --result-cache"
+        self.result_cache_max_size: int = DEFAULT_RESULT_CACHE_MAX_SIZE
+        #: The timeout (in seconds) of the tests that do not have their own timeout, ``None`` meaning no timeout
+        self.default_test_timeout: Optional[float] = None
 
     def add_cli_args(self, cli_parser: argparse.ArgumentParser) -> None:
         """
@@ -99,6 +103,13 @@ class Project:
         """
         return None
 
+    def build_result_cache_fingerprint(self) -> str:
+        """
+        Overridable. Build a fingerprint of the test environment (such as the version of the tested application)
+        as a string, the results cached by "lcc run --result-cache" are only reused with the same fingerprint.
+        """
+        return ""
+
     def build_report_info(self) -> List[Tuple[str, str]]:
         """
         Overridable. Build a list key/value pairs (expressed as a two items tuple)
@@ -238,7 +249,8 @@ class PreparedProject:
             report.add_info(key, value)
 
     def run(self, reporting_backends, report_dir, report_saving_strategy,
-            force_disabled=False, stop_on_failure=False, nb_threads=1):
+            force_disabled=False, stop_on_failure=False, nb_threads=1, worker_type="thread", durations=None,
+            coordinator=None, async_concurrency=1, result_cache=None, batch_size=1, test_timeout=None):
         # Handle "pre_run" hook
         try:
             self.project.pre_run(self.cli_args, report_dir)
@@ -253,7 +265,8 @@ class PreparedProject:
         # Create session
         session = Session.create(
             AsyncEventManager.load(), reporting_backends, report_dir, report_saving_strategy,
-            nb_threads=nb_threads, parallelized=nb_threads > 1 and len(list(flatten_tests(self.suites))) > 1
+            nb_threads=nb_threads,
+            parallelized=is_run_parallelized(self.suites, nb_threads, worker_type, coordinator, async_concurrency)
         )
         self._setup_report(session.report)
 
@@ -261,7 +274,9 @@ class PreparedProject:
         run_suites(
             self.suites, self.fixture_registry, session,
             force_disabled=force_disabled, stop_on_failure=stop_on_failure,
-            nb_threads=nb_threads
+            nb_threads=nb_threads, worker_type=worker_type, durations=durations, coordinator=coordinator,
+            async_concurrency=async_concurrency, result_cache=result_cache, batch_size=batch_size,
+            test_timeout=test_timeout
         )
 
         # Handle "post_run" hook
@@ -9,12 +9,20 @@ import time
 
 from lemoncheesecake.helpers.orderedset import OrderedSet
 from lemoncheesecake.exceptions import LemoncheesecakeException
+from lemoncheesecake.reporting.savingstrategy import get_report_saving_strategy_events
 
 _NEGATION_FLAGS = "-^~"
 
 
 class ReportingSession:
-    pass
+    # when set, the events are handled by the reporting session on its own thread through a queue of this size
+    # (instead of being handled on the thread shared by all the reporting sessions), it is meant for the reporting
+    # sessions that are slow to handle events and that do not depend on the state of the report at the time
+    # of the event
+    dispatch_queue_size = None
+    # when set, the reporting session is only subscribed to these events (instead of all the events it has
+    # a handler for)
+    subscribed_events = None
 
 
 class ReportingSessionBuilderMixin:
@@ -47,6 +55,10 @@ class FileReportSession(ReportingSession):
         self.backend = backend
         self.saving_strategy = saving_strategy
         self.last_saved_time = time.time()
+        # only subscribe to the events upon which the report may be saved
+        strategy_events = get_report_saving_strategy_events(saving_strategy)
+        if strategy_events is not None:
+            self.subscribed_events = ("test_session_end",) + tuple(strategy_events)
 
     def _save(self):
         self.backend.save_report(self.path, self.report)
@@ -71,6 +71,13 @@ def _make_test_status_label(status):
     return colored(label, test_status_to_color(status), attrs=["bold"])
 
 
+def _make_test_name(name, test_data):
+    # the details of a passed or failed test tell how it ended (e.g. "cached" or "cancelled")
+    if test_data.status in ("passed", "failed") and test_data.status_details:
+        return "%s (%s)" % (name, test_data.status_details)
+    return name
+
+
 def _make_test_result_line(name, num, status):
     line = " %s %2s # %s" % (_make_test_status_label(status), num, name)
     raw_line = "%s %2s # %s" % ("OK" if status == "passed" else "KO", num, name)
@@ -87,6 +94,8 @@ def _print_summary(stats, parallel=False):
     print(" * Tests: %d" % stats.tests_nb)
     print(" * Successes: %d (%d%%)" % (stats.tests_nb_by_status["passed"], stats.successful_tests_percentage))
     print(" * Failures: %d" % (stats.tests_nb_by_status["failed"]))
+    if stats.tests_cancelled_nb:
+        print(" * Cancelled: %d" % stats.tests_cancelled_nb)
     if stats.tests_nb_by_status["skipped"]:
         print(" * Skipped: %d" % (stats.tests_nb_by_status["skipped"]))
     if stats.tests_nb_by_status["disabled"]:
@@ -167,7 +176,7 @@ class SequentialConsoleReportingSession(ReportingSession):
         test_data = self.report.get_test(event.test)
 
         line, raw_line_len = _make_test_result_line(
-            self.get_test_label(event.test), self.current_test_idx, test_data.status
+            _make_test_name(self.get_test_label(event.test), test_data), self.current_test_idx, test_data.status
         )
 
         self.lp.print_line(line, force_len=raw_line_len)
@@ -208,7 +217,7 @@ class ParallelConsoleReportingSession(ReportingSession):
         test_data = self.report.get_test(event.test)
 
         line, _ = _make_test_result_line(
-            event.test.path, self.current_test_idx, test_data.status
+            _make_test_name(event.test.path, test_data), self.current_test_idx, test_data.status
         )
 
         print(line)
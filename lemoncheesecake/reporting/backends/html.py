@@ -7,23 +7,30 @@ from lemoncheesecake.reporting.backend import ReportingBackend, ReportingSession
 from lemoncheesecake.helpers.console import bold
 
 
+def copy_html_resources(report_dir):
+    """
+    Copy the HTML viewer (that displays the JSON report) into the report directory.
+    """
+    src_dir = get_resource_path("html")
+    resources_dir = osp.join(report_dir, ".html")
+
+    os.mkdir(resources_dir)
+    copy(osp.join(src_dir, "report.js"), resources_dir)
+    copy(osp.join(src_dir, "report.css"), resources_dir)
+    copy(osp.join(src_dir, "logo.png"), resources_dir)
+    copy(osp.join(src_dir, "bootstrap-icons.css"), resources_dir)
+    os.mkdir(osp.join(resources_dir, "fonts"))
+    copy(osp.join(src_dir, "fonts", "bootstrap-icons.woff"), osp.join(resources_dir, "fonts"))
+    copy(osp.join(src_dir, "fonts", "bootstrap-icons.woff2"), osp.join(resources_dir, "fonts"))
+    copy(osp.join(src_dir, "report.html"), report_dir)
+
+
 class HtmlReportWriter(ReportingSession):
     def __init__(self, report_dir):
         self.report_dir = report_dir
 
     def on_test_session_start(self, _):
-        src_dir = get_resource_path("html")
-        resources_dir = osp.join(self.report_dir, ".html")
-
-        os.mkdir(resources_dir)
-        copy(osp.join(src_dir, "report.js"), resources_dir)
-        copy(osp.join(src_dir, "report.css"), resources_dir)
-        copy(osp.join(src_dir, "logo.png"), resources_dir)
-        copy(osp.join(src_dir, "bootstrap-icons.css"), resources_dir)
-        os.mkdir(osp.join(resources_dir, "fonts"))
-        copy(osp.join(src_dir, "fonts", "bootstrap-icons.woff"), osp.join(resources_dir, "fonts"))
-        copy(osp.join(src_dir, "fonts", "bootstrap-icons.woff2"), osp.join(resources_dir, "fonts"))
-        copy(osp.join(src_dir, "report.html"), self.report_dir)
+        copy_html_resources(self.report_dir)
 
     def on_test_session_end(self, _):
         print("%s : file://%s/report.html" % (bold("HTML report"), self.report_dir))
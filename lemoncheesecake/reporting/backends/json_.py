@@ -11,7 +11,7 @@ import time
 import lemoncheesecake
 from lemoncheesecake.reporting.backend import FileReportBackend, ReportUnserializerMixin
 from lemoncheesecake.reporting.report import (
-    Report, Log, Check, Attachment, Url, Step, Result, TestResult, SuiteResult,
+    Report, Log, Check, Attachment, Url, Step, Result, TestResult, SuiteResult, TaskRun,
     format_time_as_iso8601, parse_iso8601_time
 )
 from lemoncheesecake.exceptions import ReportLoadingError
@@ -23,7 +23,10 @@ def _serialize_time(t):
     return format_time_as_iso8601(t) if t is not None else None
 
 
-def _serialize_steps(steps):
+def serialize_steps(steps):
+    """
+    Serialize the steps of a result into JSON-compatible data.
+    """
     json_steps = []
     for step in steps:
         json_step = {
@@ -84,7 +87,7 @@ def _serialize_result(result):
     return {
         "start_time": _serialize_time(result.start_time),
         "end_time": _serialize_time(result.end_time),
-        "steps": _serialize_steps(result.get_steps()),
+        "steps": serialize_steps(result.get_steps()),
         "status": result.status,
         "status_details": result.status_details
     }
@@ -112,6 +115,18 @@ def _serialize_suite_result(suite):
     return json_suite
 
 
+def _serialize_task_run(task_run):
+    return {
+        "name": task_run.name,
+        "dependencies": task_run.dependencies,
+        "worker": task_run.worker,
+        "ready_time": _serialize_time(task_run.ready_time),
+        "dispatch_time": _serialize_time(task_run.dispatch_time),
+        "start_time": _serialize_time(task_run.start_time),
+        "end_time": _serialize_time(task_run.end_time)
+    }
+
+
 def serialize_report_into_json(report):
     json_report = {
         "lemoncheesecake_version": lemoncheesecake.__version__,
@@ -132,6 +147,9 @@ def serialize_report_into_json(report):
     if report.test_session_teardown:
         json_report["test_session_teardown"] = _serialize_result(report.test_session_teardown)
 
+    if report.task_runs:
+        json_report["task_runs"] = list(map(_serialize_task_run, report.task_runs))
+
     return json_report
 
 
@@ -150,7 +168,10 @@ def _unserialize_time(t):
     return parse_iso8601_time(t) if t is not None else None
 
 
-def _unserialize_step(json_step):
+def unserialize_step(json_step):
+    """
+    Re-create a step serialized (along with the other steps of its result) by :py:func:`serialize_steps`.
+    """
     step = Step(json_step["description"])
     step.start_time = _unserialize_time(json_step["start_time"])
     step.end_time = _unserialize_time(json_step["end_time"])
@@ -186,7 +207,7 @@ def _unserialize_result(json_result, result):
     result.start_time = _unserialize_time(json_result["start_time"])
     result.end_time = _unserialize_time(json_result["end_time"])
     for json_step in json_result["steps"]:
-        result.add_step(_unserialize_step(json_step))
+        result.add_step(unserialize_step(json_step))
 
     return result
 
@@ -227,6 +248,14 @@ def _unserialize_suite_result(json_suite):
     return suite
 
 
+def _unserialize_task_run(json_task_run):
+    return TaskRun(
+        json_task_run["name"], json_task_run["dependencies"], json_task_run["worker"],
+        _unserialize_time(json_task_run["ready_time"]), _unserialize_time(json_task_run["dispatch_time"]),
+        _unserialize_time(json_task_run["start_time"]), _unserialize_time(json_task_run["end_time"])
+    )
+
+
 def _unserialize_report(json_report):
     report = Report()
 
@@ -248,6 +277,8 @@ def _unserialize_report(json_report):
         report.test_session_teardown = Result()
         _unserialize_result(json_report["test_session_teardown"], report.test_session_teardown)
 
+    report.task_runs = list(map(_unserialize_task_run, json_report.get("task_runs", [])))
+
     return report
 
 
@@ -27,6 +27,9 @@ def make_tags_from_test_tree_node(node):
 
 
 class ReportPortalReportingSession(ReportingSession):
+    # each event results in an HTTP call, they must not hold up the other reporting sessions
+    dispatch_queue_size = 1000
+
     def __init__(self, url, auth_token, project, launch_name, launch_description, report_dir, report):
         self.service = reportportal_client.RPClient(
             endpoint=url, project=project, api_key=auth_token, error_handler=self._handle_rp_error
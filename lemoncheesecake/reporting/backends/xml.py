@@ -4,7 +4,7 @@ import xml.etree.ElementTree as ET
 import lemoncheesecake
 from lemoncheesecake.reporting.backend import FileReportBackend, ReportUnserializerMixin
 from lemoncheesecake.reporting.report import (
-    Report, Log, Check, Attachment, Url, Step, Result, TestResult, SuiteResult,
+    Report, Log, Check, Attachment, Url, Step, Result, TestResult, SuiteResult, TaskRun,
     format_time_as_iso8601, parse_iso8601_time
 )
 from lemoncheesecake.exceptions import ReportLoadingError
@@ -160,6 +160,19 @@ def _serialize_suite_result(suite):
     return xml_suite
 
 
+def _serialize_task_run(task_run):
+    xml_task_run = make_xml_node(
+        "task-run", "name", task_run.name, "dependencies", " ".join(map(str, task_run.dependencies))
+    )
+    if task_run.worker is not None:
+        xml_task_run.attrib["worker"] = task_run.worker
+    for attr_name, value in (("ready-time", task_run.ready_time), ("dispatch-time", task_run.dispatch_time),
+                             ("start-time", task_run.start_time), ("end-time", task_run.end_time)):
+        if value is not None:
+            xml_task_run.attrib[attr_name] = _serialize_time(value)
+    return xml_task_run
+
+
 def serialize_report_as_xml_tree(report):
     xml_report = ET.Element("lemoncheesecake-report")
     xml_report.attrib["lemoncheesecake-version"] = lemoncheesecake.__version__
@@ -184,6 +197,8 @@ def serialize_report_as_xml_tree(report):
     if report.test_session_teardown:
         _serialize_result(report.test_session_teardown, make_xml_child(xml_report, "test-session-teardown"))
 
+    xml_report.extend(map(_serialize_task_run, report.task_runs))
+
     return xml_report
 
 
@@ -291,6 +306,17 @@ def _unserialize_suite_result(xml_suite):
     return suite
 
 
+def _unserialize_task_run(xml_task_run):
+    def get_time(attr_name):
+        return _unserialize_time(xml_task_run.attrib[attr_name]) if attr_name in xml_task_run.attrib else None
+
+    return TaskRun(
+        xml_task_run.attrib["name"], list(map(int, xml_task_run.attrib["dependencies"].split())),
+        xml_task_run.attrib.get("worker"),
+        get_time("ready-time"), get_time("dispatch-time"), get_time("start-time"), get_time("end-time")
+    )
+
+
 def _unserialize_report(xml_report):
     report = Report()
 
@@ -314,6 +340,8 @@ def _unserialize_report(xml_report):
         report.test_session_teardown = Result()
         _unserialize_result(xml_teardown, report.test_session_teardown)
 
+    report.task_runs = list(map(_unserialize_task_run, xml_report.findall("task-run")))
+
     return report
 
 
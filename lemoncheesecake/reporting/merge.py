@@ -0,0 +1,176 @@
+"""
+Merge several reports (such as the reports of ``lcc run --shard``) into a single one.
+"""
+
+import os
+import os.path as osp
+import posixpath
+import shutil
+from typing import Iterable, Optional, Sequence
+
+from lemoncheesecake.exceptions import LemoncheesecakeException
+from lemoncheesecake.reporting.report import Report, SuiteResult, Result, Attachment
+from lemoncheesecake.reporting.loader import load_report
+from lemoncheesecake.reporting.backend import ReportingBackend
+from lemoncheesecake.reporting.backends.json_ import JsonBackend
+from lemoncheesecake.reporting.backends.html import copy_html_resources
+
+# from the "worst" status to the "best" one
+_STATUS_PRIORITIES = "failed", "skipped", "passed", "disabled"
+
+
+def _min(*values):
+    return min((value for value in values if value is not None), default=None)
+
+
+def _max(*values):
+    return max((value for value in values if value is not None), default=None)
+
+
+def _merge_statuses(status, other_status):
+    if status is None or other_status is None:
+        return status or other_status
+    return min(status, other_status, key=_STATUS_PRIORITIES.index)
+
+
+def _merge_results(result: Optional[Result], other: Optional[Result]) -> Optional[Result]:
+    # two setup (or teardown) results of the same scope are combined into a single one
+    if result is None or other is None:
+        return result or other
+
+    for step in other.get_steps():
+        result.add_step(step)
+    result.start_time = _min(result.start_time, other.start_time)
+    result.end_time = _max(result.end_time, other.end_time)
+    result.status = _merge_statuses(result.status, other.status)
+    if other.status_details and other.status_details != result.status_details:
+        result.status_details = "\n".join(filter(None, (result.status_details, other.status_details)))
+    return result
+
+
+class ReportMerger:
+    """
+    Merge reports one after the other into a single report: suites are merged by path, a test
+    present in several reports is taken from the last one, setup and teardown results of the same
+    scope are combined.
+    """
+
+    def __init__(self):
+        self.report = None
+        self._suites = {}
+
+    def _merge_suite(self, suite: SuiteResult, parent_suite: Optional[SuiteResult]):
+        merged_suite = self._suites.get(suite.path)
+        if merged_suite is None:
+            # the suite is not yet in the merged report, take it as is along with its sub suites
+            if parent_suite:
+                parent_suite.add_suite(suite)
+            else:
+                self.report.add_suite(suite)
+            self._index_suite(suite)
+            return
+
+        merged_suite.start_time = _min(merged_suite.start_time, suite.start_time)
+        merged_suite.end_time = _max(merged_suite.end_time, suite.end_time)
+        merged_suite.suite_setup = _merge_results(merged_suite.suite_setup, suite.suite_setup)
+        merged_suite.suite_teardown = _merge_results(merged_suite.suite_teardown, suite.suite_teardown)
+        for test in suite.get_tests():
+            merged_suite.add_test(test)
+        for sub_suite in suite.get_suites():
+            self._merge_suite(sub_suite, merged_suite)
+
+    def _index_suite(self, suite):
+        self._suites[suite.path] = suite
+        for sub_suite in suite.get_suites():
+            self._index_suite(sub_suite)
+
+    def add_report(self, report: Report):
+        if self.report is None:
+            self.report = report
+            for suite in report.get_suites():
+                self._index_suite(suite)
+            return
+
+        self.report.start_time = _min(self.report.start_time, report.start_time)
+        self.report.end_time = _max(self.report.end_time, report.end_time)
+        self.report.saving_time = _max(self.report.saving_time, report.saving_time)
+        self.report.nb_threads += report.nb_threads
+        # the scheduling data of distinct test runs cannot be combined
+        self.report.task_runs = []
+        for info in report.info:
+            if info not in self.report.info:
+                self.report.info.append(info)
+        self.report.test_session_setup = _merge_results(self.report.test_session_setup, report.test_session_setup)
+        for suite in report.get_suites():
+            self._merge_suite(suite, None)
+        self.report.test_session_teardown = _merge_results(
+            self.report.test_session_teardown, report.test_session_teardown
+        )
+
+
+def merge_reports(reports: Iterable[Report]) -> Report:
+    """
+    Merge the reports (see :py:class:`ReportMerger`) and return the resulting report.
+    """
+    merger = ReportMerger()
+    for report in reports:
+        merger.add_report(report)
+    if merger.report is None:
+        raise LemoncheesecakeException("There is no report to merge")
+    return merger.report
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+
+def _move_attachments(report, report_dir, out_dir, used_filenames):
+    for step in report.all_steps():
+        for log in step.get_logs():
+            if not isinstance(log, Attachment):
+                continue
+            # attachments of different reports may have the same filename
+            dirname, basename = posixpath.split(log.filename)
+            filename, counter = log.filename, 1
+            while filename in used_filenames:
+                filename = posixpath.join(dirname, "%d_%s" % (counter, basename))
+                counter += 1
+            used_filenames.add(filename)
+
+            src = osp.join(report_dir, log.filename)
+            if osp.exists(src):
+                os.makedirs(osp.dirname(osp.join(out_dir, filename)), exist_ok=True)
+                _link_or_copy(src, osp.join(out_dir, filename))
+            log.filename = filename
+
+
+def merge_reports_into_dir(report_paths: Sequence[str], out_dir: str,
+                           backends: Sequence[ReportingBackend] = None) -> Report:
+    """
+    Merge the reports found at ``report_paths`` into a new report directory ``out_dir``, the reports are loaded
+    one after the other and their attachments are hard-linked (or copied) into ``out_dir``.
+    The resulting report is saved as a JSON report along with the HTML viewer.
+    """
+    if osp.exists(out_dir) and os.listdir(out_dir):
+        raise LemoncheesecakeException("Directory '%s' already exists and is not empty" % out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    used_filenames = set()
+
+    def load_reports():
+        for report_path in report_paths:
+            report = load_report(report_path, backends)
+            report_dir = report_path if osp.isdir(report_path) else osp.dirname(report_path)
+            _move_attachments(report, report_dir, out_dir, used_filenames)
+            yield report
+
+    report = merge_reports(load_reports())
+
+    json_backend = JsonBackend()
+    json_backend.save_report(osp.join(out_dir, json_backend.get_report_filename()), report)
+    copy_html_resources(out_dir)
+
+    return report
@@ -54,7 +54,7 @@ def _replay_test_events(test: TestResult, eventmgr: EventManager) -> None:
         eventmgr.fire(events.TestStartEvent(test, test.start_time))
         _replay_steps_events(ReportLocation.in_test(test), test.get_steps(), eventmgr)
         if test.end_time:
-            eventmgr.fire(events.TestEndEvent(test, test.end_time))
+            eventmgr.fire(events.TestEndEvent(test, test.end_time, test.status_details))
     elif test.status == "skipped":
         eventmgr.fire(events.TestSkippedEvent(test, test.status_details, test.start_time))
     elif test.status == "disabled":
@@ -8,13 +8,20 @@ from __future__ import annotations
 
 import time
 from functools import reduce
-from typing import Union, List, Iterator, Iterable, Optional, Callable
+from typing import Union, List, Iterator, Iterable, Optional, Callable, TYPE_CHECKING
 from datetime import datetime, timezone
 
 from lemoncheesecake.helpers.time import humanize_duration
-from lemoncheesecake.testtree import BaseTest, BaseSuite, flatten_tests, flatten_suites, find_test, find_suite, \
-    normalize_node_hierarchy, TreeNodeHierarchy
-from lemoncheesecake.reporting.backend import ReportSerializerMixin
+from lemoncheesecake.testtree import BaseTest, BaseSuite, BaseTreeNode, flatten_tests, flatten_suites, find_test, \
+    find_suite, normalize_node_hierarchy, TreeNodeHierarchy
+
+if TYPE_CHECKING:
+    # NB: the backend module depends on this one (through the report saving strategies)
+    from lemoncheesecake.reporting.backend import ReportSerializerMixin
+
+#: The status details of the (failed) tests that have been cancelled because of the failure of another test
+#: and ``--stop-on-failure``.
+CANCELLED_STATUS_DETAILS = "cancelled"
 
 
 def format_time_as_iso8601(ts: float) -> str:
@@ -332,6 +339,8 @@ class SuiteResult(BaseSuite):
 
 
 class ReportLocation:
+    __slots__ = ("node_type", "node_hierarchy", "_hash")
+
     _TEST_SESSION_SETUP = 0
     _TEST_SESSION_TEARDOWN = 1
     _SUITE_SETUP = 2
@@ -341,6 +350,22 @@ class ReportLocation:
     def __init__(self, node_type, node_hierarchy=None):
         self.node_type = node_type
         self.node_hierarchy = node_hierarchy
+        self._hash = hash((node_type, node_hierarchy))
+
+    def __reduce__(self):
+        # NB: the hash is not pickled, since it's not stable across processes
+        return self.__class__, (self.node_type, self.node_hierarchy)
+
+    @classmethod
+    def _for_node(cls, node_type, node):
+        if not isinstance(node, BaseTreeNode):
+            return cls(node_type, normalize_node_hierarchy(node))
+        # the locations of a node are cached on the node, since they are looked up several times
+        # for each test being run
+        location = node.cached_locations.get(node_type)
+        if location is None:
+            location = node.cached_locations[node_type] = cls(node_type, normalize_node_hierarchy(node))
+        return location
 
     @classmethod
     def in_test_session_setup(cls) -> ReportLocation:
@@ -352,15 +377,18 @@ class ReportLocation:
 
     @classmethod
     def in_suite_setup(cls, suite: TreeNodeHierarchy) -> ReportLocation:
-        return cls(cls._SUITE_SETUP, normalize_node_hierarchy(suite))
+        return cls._for_node(cls._SUITE_SETUP, suite)
 
     @classmethod
     def in_suite_teardown(cls, suite: TreeNodeHierarchy) -> ReportLocation:
-        return cls(cls._SUITE_TEARDOWN, normalize_node_hierarchy(suite))
+        return cls._for_node(cls._SUITE_TEARDOWN, suite)
 
     @classmethod
     def in_test(cls, test: TreeNodeHierarchy) -> ReportLocation:
-        return cls(cls._TEST, normalize_node_hierarchy(test))
+        return cls._for_node(cls._TEST, test)
+
+    def is_setup(self) -> bool:
+        return self.node_type in (self._TEST_SESSION_SETUP, self._SUITE_SETUP)
 
     def get(self, report: Report) -> Union[Result, SuiteResult, TestResult, None]:
         if self.node_type == self._TEST_SESSION_SETUP:
@@ -379,14 +407,14 @@ class ReportLocation:
             raise Exception("Unknown self type %s" % self.node_type)
 
     def __eq__(self, other):
-        return all((
-            isinstance(other, ReportLocation),
-            self.node_type == other.node_type,
+        return self is other or (
+            isinstance(other, ReportLocation) and
+            self.node_type == other.node_type and
             self.node_hierarchy == other.node_hierarchy
-        ))
+        )
 
     def __hash__(self):
-        return hash((self.node_type, self.node_hierarchy))
+        return self._hash
 
     def __str__(self):
         ret = ""
@@ -406,6 +434,40 @@ def flatten_results(suites: Iterable[SuiteResult]) -> Iterator[Result]:
             yield suite.suite_teardown
 
 
+class TaskRun:
+    """
+    The scheduling data of a task (a test, a suite setup, etc...) of the test run.
+    """
+
+    def __init__(self, name: str, dependencies: List[int], worker: Optional[str], ready_time: Optional[float],
+                 dispatch_time: Optional[float], start_time: Optional[float], end_time: Optional[float]) -> None:
+        #: The task name, such as "test mysuite.mytest".
+        self.name = name
+        #: The tasks the task depends on (as indexes in :py:attr:`Report.task_runs`).
+        self.dependencies = dependencies
+        #: The name of the worker (thread) that ran the task.
+        self.worker = worker
+        #: The time when the task became ready to be run.
+        self.ready_time = ready_time
+        #: The time when the task was handed to a worker.
+        self.dispatch_time = dispatch_time
+        #: The time when the task was started by the worker.
+        self.start_time = start_time
+        #: The time when the task ended.
+        self.end_time = end_time
+
+    @property
+    def duration(self) -> Optional[float]:
+        return _get_duration(self.start_time, self.end_time)
+
+    @property
+    def wait_duration(self) -> Optional[float]:
+        """
+        The time spent by the task waiting for a worker once ready to be run.
+        """
+        return _get_duration(self.ready_time, self.start_time)
+
+
 class Report:
     DEFAULT_TITLE = "Test Report"
 
@@ -424,6 +486,8 @@ class Report:
         self.title = Report.DEFAULT_TITLE
         #: The number of threads used for the test run.
         self.nb_threads = 1
+        #: The scheduling data of the tasks of the test run (*new in version 1.16.0*).
+        self.task_runs: List[TaskRun] = []
         # both attributes enable the report to be saved back if Report.bind() as been called
         self.backend = None
         self.path = None
@@ -596,6 +660,8 @@ class ReportStats:
     def __init__(self):
         self.tests_nb = 0
         self.tests_nb_by_status = {s: 0 for s in Result.STATUSES}
+        #: The number of failed tests that have been cancelled (*new in version 1.16.0*).
+        self.tests_cancelled_nb = 0
         self.duration = None
         self.duration_cumulative = 0
 
@@ -629,6 +695,8 @@ class ReportStats:
         for test in tests:
             if test.status:
                 stats.tests_nb_by_status[test.status] += 1
+            if test.status == "failed" and test.status_details == CANCELLED_STATUS_DETAILS:
+                stats.tests_cancelled_nb += 1
 
         return stats
 
@@ -2,11 +2,17 @@ import re
 import time
 
 from lemoncheesecake.events import TestSessionSetupEndEvent, TestSessionTeardownEndEvent, \
-    TestEndEvent, SuiteSetupEndEvent, SuiteTeardownEndEvent, SuiteEndEvent, SteppedEvent
+    TestEndEvent, SuiteSetupEndEvent, SuiteTeardownEndEvent, SuiteEndEvent, SteppedEvent, \
+    LogEvent, CheckEvent, LogUrlEvent, LogAttachmentEvent
 from lemoncheesecake.reporting.report import ReportLocation
 
 DEFAULT_REPORT_SAVING_STRATEGY = "at_each_failed_test"
 
+_END_OF_RESULT_EVENTS = (
+    TestEndEvent, SuiteSetupEndEvent, SuiteTeardownEndEvent, TestSessionSetupEndEvent, TestSessionTeardownEndEvent
+)
+_LOG_EVENTS = (LogEvent, CheckEvent, LogUrlEvent, LogAttachmentEvent)
+
 
 def _is_end_of_result_event(event):
     if isinstance(event, TestEndEvent):
@@ -56,6 +62,22 @@ class SaveAtInterval:
         return last_saved_time + self.interval < time.time()
 
 
+def get_report_saving_strategy_events(strategy):
+    """
+    Get the event classes upon which the strategy may save the report, None means that the strategy
+    may save the report upon any event.
+    """
+    if strategy is None:
+        return ()
+    if strategy is save_at_each_suite_strategy:
+        return SuiteEndEvent,
+    if strategy in (save_at_each_test_strategy, save_at_each_failed_test_strategy):
+        return _END_OF_RESULT_EVENTS
+    if strategy is save_at_each_log_strategy:
+        return _LOG_EVENTS
+    return None
+
+
 def make_report_saving_strategy(expression):
     # first, try with a static expression
     static_expressions = {
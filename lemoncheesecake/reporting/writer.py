@@ -114,6 +114,8 @@ class ReportWriter:
     def on_test_end(self, event):
         test_result = self._get_test_result(event.test)
         self._finalize_result(test_result, event.time)
+        if event.status_details:
+            test_result.status_details = event.status_details
 
     def _bypass_test(self, test, status, status_details, time):
         test_result = self._initialize_test_result(test, time)
@@ -0,0 +1,165 @@
+"""
+Cache the results of the passed tests so that they are not run again as long as their inputs are unchanged.
+
+A test is identified in the cache by a key computed from its path, the source code of its callback, its parameters,
+the source code of the hooks of its suites, the source code of the fixtures it uses (directly or not) and the
+environment fingerprint of the project. The cached tests are reported as passed (with "cached" as status details)
+and their steps are replayed from the cache.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import os.path as osp
+import threading
+from typing import List, Optional
+
+from lemoncheesecake.fixture import FixtureRegistry, Fixture
+from lemoncheesecake.impact import CACHE_DIR
+from lemoncheesecake.reporting import Report, Step, Attachment
+from lemoncheesecake.reporting.backends.json_ import serialize_steps, unserialize_step
+from lemoncheesecake.suite import Test
+from lemoncheesecake.suite.core import SUITE_HOOKS
+
+RESULTS_DIR = "results"
+DEFAULT_MAX_SIZE = 50 * 1024 * 1024
+CACHED_STATUS_DETAILS = "cached"
+
+
+def _get_source(func):
+    func = inspect.unwrap(getattr(func, "__func__", func))
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        code = getattr(func, "__code__", None)
+        return code.co_code.hex() if code else repr(func)
+
+
+def _get_fixture_names(test, fixture_registry):
+    names = set(test.get_fixtures())
+    suite = test.parent_suite
+    while suite is not None:
+        names.update(suite.get_fixtures())
+        suite = suite.parent_suite
+    for name in list(names):
+        names.update(fixture_registry.get_fixture_dependencies(name))
+    return sorted(names)
+
+
+def _get_hook_sources(test):
+    # the hooks of the suites the test belongs to are run along with the test
+    sources = []
+    suite = test.parent_suite
+    while suite is not None:
+        for hook_name in SUITE_HOOKS:
+            if suite.has_hook(hook_name):
+                sources.append("%s.%s:%s" % (suite.path, hook_name, _get_source(suite.get_hook(hook_name))))
+        suite = suite.parent_suite
+    return sources
+
+
+def compute_test_key(test: Test, fixture_registry: FixtureRegistry, fingerprint: str = "") -> str:
+    key = hashlib.sha256()
+    for value in (
+        test.path, _get_source(test.callback), repr(sorted(test.parameters.items(), key=lambda item: item[0])),
+        fingerprint, *_get_hook_sources(test)
+    ):
+        key.update(value.encode("utf-8", "replace"))
+        key.update(b"\0")
+    for fixture_name in _get_fixture_names(test, fixture_registry):
+        fixture = fixture_registry.get_fixture(fixture_name)
+        # builtin fixtures (such as cli_args) are not taken into account
+        if isinstance(fixture, Fixture):
+            key.update(("%s:%s" % (fixture_name, _get_source(fixture.func))).encode("utf-8", "replace"))
+            key.update(b"\0")
+    return key.hexdigest()
+
+
+def _has_attachments(steps):
+    return any(isinstance(log, Attachment) for step in steps for log in step.get_logs())
+
+
+class ResultCache:
+    """
+    A local on-disk cache of passed test results (one file per test), the least recently used entries
+    are evicted when the total size of the cache exceeds ``max_size`` bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE, fingerprint: str = ""):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        # the keys of the tests that are not in the cache (yet), by test path
+        self._missed_keys = {}
+
+    @classmethod
+    def for_project_dir(cls, project_dir: str, max_size: int = DEFAULT_MAX_SIZE, fingerprint: str = ""):
+        return cls(osp.join(project_dir, CACHE_DIR, RESULTS_DIR), max_size, fingerprint)
+
+    def _get_entry_path(self, key):
+        return osp.join(self.cache_dir, "%s.json" % key)
+
+    def get_cached_steps(self, test: Test, fixture_registry: FixtureRegistry) -> Optional[List[Step]]:
+        """
+        Get the steps of the test if it is in the cache, ``None`` otherwise.
+        """
+        key = compute_test_key(test, fixture_registry, self.fingerprint)
+        path = self._get_entry_path(key)
+        try:
+            with open(path) as fh:
+                entry = json.load(fh)
+            steps = [unserialize_step(json_step) for json_step in entry["steps"]]
+        except (IOError, ValueError, KeyError):
+            with self._lock:
+                self._missed_keys[test.path] = key
+            return None
+
+        # the modification time of the entries is used to evict the least recently used ones
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return steps
+
+    def save_results(self, report: Report):
+        """
+        Put the passed tests of the report that were not in the cache into the cache.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for test in report.all_tests():
+            key = self._missed_keys.get(test.path)
+            # the attachments files belong to the report directory, the tests having attachments are not cached
+            if key is None or test.status != "passed" or _has_attachments(test.get_steps()):
+                continue
+            with open(self._get_entry_path(key), "w") as fh:
+                json.dump({"path": test.path, "steps": serialize_steps(test.get_steps())}, fh)
+        self._missed_keys.clear()
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits into its maximum size.
+        """
+        if not osp.isdir(self.cache_dir):
+            return
+
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            path = osp.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
@@ -4,36 +4,79 @@ Created on Jan 24, 2016
 @author: nicolas
 '''
 
+import asyncio
+import contextvars
+import inspect
 import traceback
 import itertools
+import threading
+import time
 
 from lemoncheesecake.exceptions import AbortTest, AbortSuite, AbortAllTests, LemoncheesecakeException, \
-    UserError, TaskFailure, serialize_current_exception
-from lemoncheesecake.testtree import flatten_tests
-from lemoncheesecake.reporting import ReportLocation
-from lemoncheesecake.task import BaseTask, TaskContext, run_tasks
+    UserError, TaskFailure, CancelTest, serialize_current_exception
+from lemoncheesecake.testtree import flatten_tests, flatten_suites, flatten_tests_as_dict
+from lemoncheesecake.reporting import ReportLocation, Log, Check, Url, TaskRun
+from lemoncheesecake.task import BaseTask, TaskContext, TaskTiming, run_tasks, order_tasks_by_longest_path
 from lemoncheesecake.fixture import initialize_fixture_cache
+from lemoncheesecake.events import unserialize_event, TestStartEvent, TestEndEvent, RuntimeEvent, \
+    SuiteSetupStartEvent, SuiteSetupEndEvent, TestSessionSetupStartEvent, TestSessionSetupEndEvent
+from lemoncheesecake.process import is_process_mode_available, WorkerProcessCrash
+from lemoncheesecake.resultcache import CACHED_STATUS_DETAILS
+from lemoncheesecake.helpers.asyncio import run_coroutine, stop_event_loop_thread
+
+
+async def _await_if_needed(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def _get_setup_location(event):
+    if isinstance(event, (TestSessionSetupStartEvent, TestSessionSetupEndEvent)):
+        return ReportLocation.in_test_session_setup()
+    if isinstance(event, (SuiteSetupStartEvent, SuiteSetupEndEvent)):
+        return ReportLocation.in_suite_setup(event.suite)
+    if isinstance(event, RuntimeEvent) and event.location.is_setup():
+        return event.location
+    return None
 
 
 class RunContext(TaskContext):
-    def __init__(self, session, fixture_registry, force_disabled, stop_on_failure):
+    def __init__(self, session, fixture_registry, force_disabled, stop_on_failure, worker_type="thread", suites=(),
+                 coordinator=None, result_cache=None):
         super().__init__()
         self.session = session
         self.fixture_registry = fixture_registry
         self.force_disabled = force_disabled
         self.stop_on_failure = stop_on_failure
+        self.worker_type = worker_type
+        self.coordinator = coordinator
+        self.result_cache = result_cache
         self._aborted_session = False
         self._aborted_suites = set()
+        # the per-thread setups of prewarmed fixtures as (name, task having triggered the setup, timing) tuples
+        self.per_thread_setups = []
+        self._per_thread_setups_lock = threading.Lock()
+        # the errors of the per-thread setups by thread id, they are reported by the next test run by the thread
+        self._per_thread_setup_errors = {}
+        # used to look up the tests & suites of the events fired by worker processes (local or remote):
+        self._tests = flatten_tests_as_dict(suites)
+        self._suites = {suite.path: suite for suite in flatten_suites(suites)}
+        # the setups run by the worker processes, as location => run of the test having forwarded its events
+        self._worker_setups = {}
+        self._worker_setups_lock = threading.Lock()
 
     def handle_exception(self, excp, suite=None):
-        if isinstance(excp, AbortTest):
+        if isinstance(excp, CancelTest):
+            self.session.log_error("The test has been cancelled: %s" % excp)
+        elif isinstance(excp, AbortTest):
             self.session.log_error("The test has been aborted: %s" % excp)
         elif isinstance(excp, AbortSuite):
             self.session.log_error("The suite has been aborted: %s" % excp)
-            self._aborted_suites.add(suite)
+            self.abort_suite(suite)
         elif isinstance(excp, AbortAllTests):
             self.session.log_error("All tests have been aborted: %s" % excp)
-            self._aborted_session = True
+            self.abort_session()
         else:
             # FIXME: use exception instead of last implicit stacktrace
             self.session.log_error("Caught unexpected exception while running test: " + traceback.format_exc())
@@ -64,6 +107,105 @@ class RunContext(TaskContext):
                 except Exception as e:
                     self.handle_exception(e)
 
+    def prewarm_fixtures(self, fixture_results, task):
+        # in process mode or with remote workers, the tests are not run by the threads of this process
+        if self.worker_type == "process" or self.coordinator:
+            return
+
+        for name, result in fixture_results:
+            self.run_on_each_worker(self._make_per_thread_setup(name, result, task))
+
+    def _make_per_thread_setup(self, name, result, task):
+        ready_time = time.time()
+
+        def setup():
+            # NB: the same function is called by every worker
+            timing = TaskTiming()
+            timing.ready_time = timing.dispatch_time = ready_time
+            timing.worker = threading.current_thread().name
+            timing.start_time = time.time()
+            try:
+                # the setup is not bound to any report location: it must not inherit the cursor of the last task
+                # run by the thread
+                contextvars.Context().run(result.prewarm)
+            except Exception:
+                # the fixture will be set up again (and its error reported) by the first test using it
+                error = "Cannot prewarm per-thread fixture '%s' on %s (it is set up again by the first test " \
+                        "using it):%s" % (
+                            name, threading.current_thread().name, serialize_current_exception(show_stacktrace=True)
+                        )
+                with self._per_thread_setups_lock:
+                    self._per_thread_setup_errors.setdefault(threading.get_ident(), []).append(error)
+            timing.end_time = time.time()
+            with self._per_thread_setups_lock:
+                self.per_thread_setups.append(("per-thread setup %s" % name, task, timing))
+
+        return setup
+
+    def log_per_thread_setup_errors(self):
+        """
+        Log (as warnings) the errors of the per-thread setups run by the current thread since its previous test.
+        """
+        with self._per_thread_setups_lock:
+            errors = self._per_thread_setup_errors.pop(threading.get_ident(), ())
+        for error in errors:
+            self.session.log_warning(error)
+
+    # the async variants of run_setup_funcs & run_teardown_funcs accept functions returning awaitables
+
+    async def run_setup_funcs_async(self, funcs, location):
+        teardown_funcs = []
+        for setup_func, teardown_func in funcs:
+            if setup_func:
+                try:
+                    await _await_if_needed(setup_func())
+                except Exception as e:
+                    self.handle_exception(e)
+                    break
+                else:
+                    if not self.session.is_successful(location):
+                        break
+                    else:
+                        teardown_funcs.append(teardown_func)
+            else:
+                teardown_funcs.append(teardown_func)
+        return teardown_funcs
+
+    async def run_teardown_funcs_async(self, teardown_funcs):
+        for teardown_func in reversed(teardown_funcs):
+            if teardown_func:
+                try:
+                    await _await_if_needed(teardown_func())
+                except Exception as e:
+                    self.handle_exception(e)
+
+    def is_suite_aborted(self, suite):
+        return suite in self._aborted_suites
+
+    def abort_suite(self, suite):
+        self._aborted_suites.add(suite)
+
+    def is_session_aborted(self):
+        return self._aborted_session
+
+    def abort_session(self):
+        self._aborted_session = True
+
+    def forward_event(self, serialized_event, test_run=None):
+        """
+        Forward an event fired by a worker process while running a test (``test_run`` identifying this run),
+        the events of a setup run by the worker process are dropped if the setup has already been reported
+        through another run. The forwarded event is returned (``None`` if dropped).
+        """
+        event = unserialize_event(serialized_event, self.session.event_manager, self._tests, self._suites)
+        setup_location = _get_setup_location(event)
+        if setup_location is not None:
+            with self._worker_setups_lock:
+                if self._worker_setups.setdefault(setup_location, test_run) is not test_run:
+                    return None
+        self.session.forward_event(event)
+        return event
+
     def enable_task_abort(self):
         super().enable_task_abort()
         self.session.aborted = True
@@ -80,12 +222,12 @@ class RunContext(TaskContext):
             return str(exception)
 
         # check for test session abort
-        if self._aborted_session:
+        if self.is_session_aborted():
             return "tests have been aborted"
 
         # check for suite abort
         if isinstance(task, TestTask):
-            if task.test.parent_suite in self._aborted_suites:
+            if self.is_suite_aborted(task.test.parent_suite):
                 return "the tests of this test suite have been aborted"
 
         # check for --stop-on-failure
@@ -96,15 +238,48 @@ class RunContext(TaskContext):
 
 
 class TestTask(BaseTask):
-    def __init__(self, test, suite_scheduled_fixtures, dependency=None):
+    def __init__(self, test, suite_scheduled_fixtures, dependency=None, timeout=None):
         BaseTask.__init__(self)
         self.test = test
         self.suite_scheduled_fixtures = suite_scheduled_fixtures
         self.dependencies = [dependency] if dependency else []
+        self.timeout = timeout
 
     def get_on_success_dependencies(self):
         return self.dependencies
 
+    def is_async(self):
+        return inspect.iscoroutinefunction(self.test.callback)
+
+    def get_resources(self):
+        resources = self.test.get_resources()
+        # the max_workers of a suite is enforced as a resource shared by the tests of the suite
+        # and of its sub suites
+        suite = self.test.parent_suite
+        while suite is not None:
+            if suite.max_workers:
+                resources[("max_workers", suite.path)] = suite.max_workers
+            suite = suite.parent_suite
+        return resources
+
+    def get_timeout(self, context):
+        # in process mode, the worker process running a test is killed on timeout by the worker pool,
+        # timeouts are not enforced on tests run by remote workers
+        if context.coordinator:
+            return None
+        return self.timeout
+
+    def get_async_timeout(self, context):
+        # the timeout only applies to the test itself, see _run_test_async
+        return None
+
+    def abandon(self, context, stacktrace):
+        reason = "The test has timed out after %s seconds" % self.timeout
+        if stacktrace:
+            reason += ", it was stuck at:\n" + stacktrace
+        context.session.abandon_test(self.test, reason)
+        raise TaskFailure("test '%s' has timed out" % self.test.path)
+
     def _is_test_disabled(self, context):
         return self.test.is_disabled() and not context.force_disabled
 
@@ -130,6 +305,36 @@ class TestTask(BaseTask):
 
         return args
 
+    @staticmethod
+    async def _prepare_test_args_async(test, scheduled_fixtures):
+        args = {}
+        for arg_name in test.get_arguments():
+            if arg_name in test.parameters:
+                args[arg_name] = test.parameters[arg_name]
+            else:
+                args[arg_name] = await scheduled_fixtures.get_fixture_result_async(arg_name)
+
+        return args
+
+    def _get_cached_steps(self, context):
+        if context.result_cache is None:
+            return None
+        return context.result_cache.get_cached_steps(self.test, context.fixture_registry)
+
+    def _replay_cached_test(self, context, steps):
+        session = context.session
+        session.start_test(self.test)
+        for step in steps:
+            session.set_step(step.description)
+            for log in step.get_logs():
+                if isinstance(log, Log):
+                    session.log(log.level, log.message)
+                elif isinstance(log, Check):
+                    session.log_check(log.description, log.is_successful, log.details)
+                elif isinstance(log, Url):
+                    session.log_url(log.url, log.description)
+        session.end_test(self.test, CACHED_STATUS_DETAILS)
+
     def run(self, context):
         ###
         # Checker whether the test must be executed or not
@@ -138,14 +343,74 @@ class TestTask(BaseTask):
             self._handle_disabled_test(context)
             return
 
-        ###
-        # Begin test
-        ###
-        context.session.start_test(self.test)
+        cached_steps = self._get_cached_steps(context)
+        if cached_steps is not None:
+            self._replay_cached_test(context, cached_steps)
+            return
 
-        ###
-        # Setup test (setup and fixtures)
-        ###
+        if context.coordinator:
+            self._run_test_in_worker(context)
+        else:
+            self._run_test(context)
+
+    def run_and_get_outcome(self, context):
+        """
+        Run the (enabled) test in the current process and return a picklable (failure, suite_aborted, session_aborted)
+        tuple describing its outcome, it is meant to be called by worker processes.
+        """
+        try:
+            self._run_test(context)
+        except TaskFailure as excp:
+            failure = str(excp)
+        else:
+            failure = None
+        return failure, context.is_suite_aborted(self.test.parent_suite), context.is_session_aborted()
+
+    def _run_test_in_worker(self, context):
+        suite = self.test.parent_suite
+        test_events = []
+        test_run = object()
+
+        def handle_event(serialized_event):
+            event = context.forward_event(serialized_event, test_run)
+            if isinstance(event, (TestStartEvent, TestEndEvent)):
+                test_events.append(event.__class__)
+
+        try:
+            failure, suite_aborted, session_aborted = context.coordinator.run_test(
+                self.test.path, context.session, handle_event, self.timeout
+            )
+        except WorkerProcessCrash as excp:
+            if TestEndEvent not in test_events:
+                if TestStartEvent in test_events:
+                    context.session.resume_test(self.test)
+                else:
+                    context.session.start_test(self.test)
+                context.session.set_step("Run test in worker process")
+                context.session.log_error("The %s" % excp)
+                context.session.end_test(self.test)
+            raise TaskFailure("test '%s' failed: %s" % (self.test.path, excp))
+
+        if suite_aborted:
+            context.abort_suite(suite)
+        if session_aborted:
+            context.abort_session()
+        if failure:
+            raise TaskFailure(failure)
+
+    async def run_async(self, context):
+        if self._is_test_disabled(context):
+            self._handle_disabled_test(context)
+            return
+
+        cached_steps = self._get_cached_steps(context)
+        if cached_steps is not None:
+            self._replay_cached_test(context, cached_steps)
+            return
+
+        await self._run_test_async(context)
+
+    def _get_setup_teardown_funcs(self, context, scheduled_fixtures, async_fixtures=False):
         suite = self.test.parent_suite
 
         if suite.has_hook("setup_test"):
@@ -163,12 +428,35 @@ class TestTask(BaseTask):
 
         setup_teardown_funcs = list()
         setup_teardown_funcs.append((setup_test_wrapper, teardown_test_wrapper))
+        if async_fixtures:
+            setup_teardown_funcs.extend(scheduled_fixtures.get_async_setup_teardown_pairs())
+        else:
+            setup_teardown_funcs.extend(scheduled_fixtures.get_setup_teardown_pairs())
+        return setup_teardown_funcs
+
+    def _end_test(self, context):
+        context.session.end_test(self.test)
+
+        if not context.session.is_successful(ReportLocation.in_test(self.test)):
+            raise TaskFailure("test '%s' failed" % self.test.path)
+
+    def _run_test(self, context):
+        ###
+        # Begin test
+        ###
+        context.session.start_test(self.test)
+
+        ###
+        # Setup test (setup and fixtures)
+        ###
+        suite = self.test.parent_suite
         scheduled_fixtures = context.fixture_registry.get_fixtures_scheduled_for_test(
             self.test, self.suite_scheduled_fixtures
         )
-        setup_teardown_funcs.extend(scheduled_fixtures.get_setup_teardown_pairs())
+        setup_teardown_funcs = self._get_setup_teardown_funcs(context, scheduled_fixtures)
 
         context.session.set_step("Setup test")
+        context.log_per_thread_setup_errors()
 
         if any(setup for setup, _ in setup_teardown_funcs):
             teardown_funcs = context.run_setup_funcs(setup_teardown_funcs, ReportLocation.in_test(self.test))
@@ -181,10 +469,17 @@ class TestTask(BaseTask):
         if context.session.is_successful(ReportLocation.in_test(self.test)):
             test_args = self._prepare_test_args(self.test, scheduled_fixtures)
             context.session.set_step(self.test.description)
+            # the test (but not its teardown) is cancelled on the next logging call if another test fails
+            # on --stop-on-failure
+            context.session.cursor.cancellable = True
             try:
-                self.test.callback(**test_args)
+                result = self.test.callback(**test_args)
+                if inspect.iscoroutine(result):
+                    run_coroutine(result)
             except Exception as e:
+                context.session.cursor.cancellable = False
                 context.handle_exception(e, suite)
+            context.session.cursor.cancellable = False
 
         ###
         # Teardown
@@ -193,22 +488,159 @@ class TestTask(BaseTask):
             context.session.set_step("Teardown test")
             context.run_teardown_funcs(teardown_funcs)
 
-        context.session.end_test(self.test)
+        self._end_test(context)
 
-        if not context.session.is_successful(ReportLocation.in_test(self.test)):
-            raise TaskFailure("test '%s' failed" % self.test.path)
+    async def _run_test_async(self, context):
+        # NB: this is the same as _run_test, but run on the event loop
+        context.session.start_test(self.test)
+
+        suite = self.test.parent_suite
+        scheduled_fixtures = context.fixture_registry.get_fixtures_scheduled_for_test(
+            self.test, self.suite_scheduled_fixtures
+        )
+        setup_teardown_funcs = self._get_setup_teardown_funcs(context, scheduled_fixtures, async_fixtures=True)
+
+        context.session.set_step("Setup test")
+        teardown_funcs = await context.run_setup_funcs_async(
+            setup_teardown_funcs, ReportLocation.in_test(self.test)
+        )
+
+        if context.session.is_successful(ReportLocation.in_test(self.test)):
+            test_args = await self._prepare_test_args_async(self.test, scheduled_fixtures)
+            context.session.set_step(self.test.description)
+            context.session.cursor.cancellable = True
+            timeout = self.get_timeout(context)
+            try:
+                # the test is cancelled on timeout, but not its teardown
+                await asyncio.wait_for(self.test.callback(**test_args), timeout)
+            except asyncio.TimeoutError as e:
+                context.session.cursor.cancellable = False
+                if timeout is None:
+                    context.handle_exception(e, suite)
+                else:
+                    context.session.log_error("The test has timed out after %s seconds" % timeout)
+            except Exception as e:
+                context.session.cursor.cancellable = False
+                context.handle_exception(e, suite)
+            context.session.cursor.cancellable = False
+
+        if any(teardown_funcs):
+            context.session.set_step("Teardown test")
+            await context.run_teardown_funcs_async(teardown_funcs)
+
+        self._end_test(context)
 
     def __str__(self):
         return "<%s %s>" % (self.__class__.__name__, self.test.path)
 
 
-def build_test_task(test, suite_scheduled_fixtures, dependency):
-    return TestTask(test, suite_scheduled_fixtures, dependency)
+def build_test_task(test, suite_scheduled_fixtures, dependency, default_timeout=None):
+    timeout = test.get_timeout()
+    return TestTask(
+        test, suite_scheduled_fixtures, dependency, timeout=timeout if timeout is not None else default_timeout
+    )
+
+
+class TestBatchTask(BaseTask):
+    """
+    Run several tests one after the other in the same worker thread, it saves the scheduling overhead of
+    very small tests. Each test still gets its own result and events.
+    """
+
+    def __init__(self, test_tasks):
+        BaseTask.__init__(self)
+        self.test_tasks = test_tasks
+
+    def get_on_success_dependencies(self):
+        # the tests of a batch have the same dependencies
+        return self.test_tasks[0].get_on_success_dependencies()
+
+    def get_resources(self):
+        # the tests of a batch use the same resources
+        return self.test_tasks[0].get_resources()
+
+    def skip(self, context, reason=None):
+        for test_task in self.test_tasks:
+            test_task.skip(context, reason)
+
+    def run(self, context):
+        failures = []
+        for test_task in self.test_tasks:
+            # a test of the batch may have to be skipped because of a previous test (--stop-on-failure, abort, etc...)
+            skip_reason = context.is_task_to_be_skipped(test_task)
+            if skip_reason:
+                test_task.skip(context, skip_reason)
+                continue
+            try:
+                test_task.run(context)
+            except TaskFailure as excp:
+                failures.append(str(excp))
+            except Exception as excp:
+                # like an exception raised by a test, an unexpected exception only fails the test being run,
+                # so that every test of the batch ends with a result
+                self._end_test_on_exception(test_task.test, context, excp)
+                failures.append("test '%s' failed" % test_task.test.path)
+
+        if failures:
+            raise TaskFailure(", ".join(failures))
+
+    @staticmethod
+    def _end_test_on_exception(test, context, excp):
+        if context.session.get_current_location() == ReportLocation.in_test(test):
+            context.session.set_step("Unexpected error")
+        else:
+            context.session.start_test(test)
+            context.session.set_step("Run test")
+        context.handle_exception(excp, test.parent_suite)
+        context.session.end_test(test)
+
+    def __str__(self):
+        return "<%s %s>" % (self.__class__.__name__, ", ".join(task.test.path for task in self.test_tasks))
+
+
+def _is_test_task_batchable(test_task, unbatchable_test_paths):
+    return not test_task.is_async() and test_task.timeout is None and \
+        test_task.test.path not in unbatchable_test_paths
+
+
+def _can_add_test_task_to_batch(test_task, batch):
+    return test_task.test.get_fixtures() == batch[0].test.get_fixtures() and \
+        test_task.get_resources() == batch[0].get_resources()
+
+
+def batch_test_tasks(test_tasks, batch_size, unbatchable_test_paths=()):
+    """
+    Group the consecutive test tasks using the same fixtures and resources into batches of at most ``batch_size``
+    tests. The async tests, the tests having a timeout and the tests whose path is in ``unbatchable_test_paths``
+    are kept as is.
+    """
+    tasks = []
+    batch = []
+
+    def flush_batch():
+        if len(batch) > 1:
+            tasks.append(TestBatchTask(list(batch)))
+        else:
+            tasks.extend(batch)
+        batch.clear()
+
+    for test_task in test_tasks:
+        if not _is_test_task_batchable(test_task, unbatchable_test_paths):
+            flush_batch()
+            tasks.append(test_task)
+            continue
+        if batch and (len(batch) == batch_size or not _can_add_test_task_to_batch(test_task, batch)):
+            flush_batch()
+        batch.append(test_task)
+    flush_batch()
+
+    return tasks
 
 
 def build_suite_tasks(
         suite, fixture_registry, session_scheduled_fixtures, test_session_setup_task,
-        parent_suite_beginning_task=None, force_disabled=False):
+        parent_suite_beginning_task=None, force_disabled=False, batch_size=1, unbatchable_test_paths=(),
+        test_timeout=None):
     ###
     # Build suite beginning task
     ###
@@ -231,9 +663,11 @@ def build_suite_tasks(
     ###
     test_dependency = suite_setup_task if suite_setup_task else suite_beginning_task
     test_tasks = [
-        build_test_task(test, suite_scheduled_fixtures, test_dependency)
+        build_test_task(test, suite_scheduled_fixtures, test_dependency, test_timeout)
         for test in suite.get_tests()
     ]
+    if batch_size > 1:
+        test_tasks = batch_test_tasks(test_tasks, batch_size, unbatchable_test_paths)
 
     ###
     # Build suite teardown task (if any)
@@ -244,13 +678,15 @@ def build_suite_tasks(
     # Build sub suite tasks
     ###
     sub_suite_tasks = []
+    sub_suite_ending_tasks = []
     for sub_suite in suite.get_suites():
-        sub_suite_tasks.extend(
-            build_suite_tasks(
-                sub_suite, fixture_registry, session_scheduled_fixtures, test_session_setup_task, suite_beginning_task,
-                force_disabled
-            )
+        tasks = build_suite_tasks(
+            sub_suite, fixture_registry, session_scheduled_fixtures, test_session_setup_task, suite_beginning_task,
+            force_disabled, batch_size, unbatchable_test_paths, test_timeout
         )
+        sub_suite_tasks.extend(tasks)
+        # the suite ending task is always the last task of a suite
+        sub_suite_ending_tasks.append(tasks[-1])
 
     ###
     # Build suite ending task
@@ -259,9 +695,7 @@ def build_suite_tasks(
     suite_ending_dependencies.extend(test_tasks)
     if suite_teardown_task:
         suite_ending_dependencies.append(suite_teardown_task)
-    suite_ending_dependencies.extend(
-        task for task in sub_suite_tasks if isinstance(task, SuiteEndingTask) and task.suite in suite.get_suites()
-    )
+    suite_ending_dependencies.extend(sub_suite_ending_tasks)
     suite_ending_task = build_suite_ending_task(suite, suite_ending_dependencies)
 
     ###
@@ -299,17 +733,25 @@ def build_suite_beginning_task(suite, dependencies):
 
 
 class SuiteInitializationTask(BaseTask):
-    def __init__(self, suite, setup_teardown_funcs, dependencies):
+    def __init__(self, suite, setup_teardown_funcs, dependencies, scheduled_fixtures=None):
         BaseTask.__init__(self)
         self.suite = suite
         self.setup_teardown_funcs = setup_teardown_funcs
         self._dependencies = dependencies
+        self.scheduled_fixtures = scheduled_fixtures
         self.teardown_funcs = []
 
     def get_on_success_dependencies(self):
         return self._dependencies
 
+    def get_resources(self):
+        return self.suite.get_resources()
+
     def run(self, context):
+        # the suite setup is run (and reported) by the worker processes running the tests
+        if context.coordinator:
+            return
+
         if any(setup for setup, _ in self.setup_teardown_funcs):
             # before actual initialization
             context.session.start_suite_setup(self.suite)
@@ -325,6 +767,9 @@ class SuiteInitializationTask(BaseTask):
         else:
             self.teardown_funcs = [teardown for _, teardown in self.setup_teardown_funcs if teardown]
 
+        if self.scheduled_fixtures:
+            context.prewarm_fixtures(self.scheduled_fixtures.get_fixture_results_to_prewarm(), self)
+
     def __str__(self):
         return "<%s %s>" % (self.__class__.__name__, self.suite.path)
 
@@ -363,7 +808,10 @@ def build_suite_initialization_task(suite, scheduled_fixtures, dependencies, for
             suite.get_hook("teardown_suite")
         ])
 
-    return SuiteInitializationTask(suite, setup_teardown_funcs, dependencies) if setup_teardown_funcs else None
+    if not setup_teardown_funcs:
+        return None
+
+    return SuiteInitializationTask(suite, setup_teardown_funcs, dependencies, scheduled_fixtures)
 
 
 class SuiteEndingTask(BaseTask):
@@ -399,6 +847,9 @@ class SuiteTeardownTask(BaseTask):
     def get_on_completion_dependencies(self):
         return self._dependencies
 
+    def get_resources(self):
+        return self.suite.get_resources()
+
     def run(self, context):
         if any(self.suite_setup_task.teardown_funcs):
             # before actual teardown
@@ -427,6 +878,10 @@ class TestSessionSetupTask(BaseTask):
         self.teardown_funcs = []
 
     def run(self, context):
+        # the test session setup is run (and reported) by the worker processes running the tests
+        if context.coordinator:
+            return
+
         setup_teardown_funcs = self.scheduled_fixtures.get_setup_teardown_pairs()
 
         if any(setup for setup, _ in setup_teardown_funcs):
@@ -442,6 +897,8 @@ class TestSessionSetupTask(BaseTask):
         else:
             self.teardown_funcs = [teardown for _, teardown in setup_teardown_funcs if teardown]
 
+        context.prewarm_fixtures(self.scheduled_fixtures.get_fixture_results_to_prewarm(), self)
+
 
 def build_test_session_setup_task(scheduled_fixtures):
     return TestSessionSetupTask(scheduled_fixtures) if not scheduled_fixtures.is_empty() else None
@@ -474,41 +931,64 @@ def build_test_session_teardown_task(test_session_setup_task, dependencies):
     return TestSessionTeardownTask(test_session_setup_task, dependencies) if test_session_setup_task else None
 
 
-def lookup_test_task(tasks, test_path):
+def _index_test_tasks_by_path(tasks):
+    # the path of a test is built upon the path of its suite, which is computed only once per suite
+    suite_paths = {}
+    test_tasks_by_path = {}
+    for task in tasks:
+        if isinstance(task, TestTask):
+            suite = task.test.parent_suite
+            if suite not in suite_paths:
+                suite_paths[suite] = suite.path
+            test_tasks_by_path["%s.%s" % (suite_paths[suite], task.test.name)] = task
+    return test_tasks_by_path
+
+
+def lookup_test_task(test_tasks_by_path, test_path):
     try:
-        return next(task for task in tasks if isinstance(task, TestTask) and task.test.path == test_path)
-    except StopIteration:
+        return test_tasks_by_path[test_path]
+    except KeyError:
         raise LookupError("Cannot find test '%s' in tasks" % test_path)
 
 
-def build_tasks(suites, fixture_registry, session_scheduled_fixtures, force_disabled):
+def _get_tests_with_dependencies(suites):
+    test_paths = set()
+    for test in flatten_tests(suites):
+        if test.resolved_dependencies:
+            test_paths.add(test.path)
+            test_paths.update(test_dep.path for test_dep in test.resolved_dependencies)
+    return test_paths
+
+
+def build_tasks(suites, fixture_registry, session_scheduled_fixtures, force_disabled, batch_size=1,
+                test_timeout=None):
     ###
     # Build test session setup task
     ###
     test_session_setup_task = build_test_session_setup_task(session_scheduled_fixtures)
 
+    # the tests depending on other tests (or being depended on) are not batched, they keep their own task
+    unbatchable_test_paths = _get_tests_with_dependencies(suites) if batch_size > 1 else ()
+
     ###
     # Build suite tasks
     ###
     suite_tasks = []
+    suite_ending_tasks = []
     for suite in suites:
-        suite_tasks.extend(
-            build_suite_tasks(
-                suite, fixture_registry, session_scheduled_fixtures, test_session_setup_task,
-                force_disabled=force_disabled
-            )
+        tasks = build_suite_tasks(
+            suite, fixture_registry, session_scheduled_fixtures, test_session_setup_task,
+            force_disabled=force_disabled, batch_size=batch_size, unbatchable_test_paths=unbatchable_test_paths,
+            test_timeout=test_timeout
         )
+        suite_tasks.extend(tasks)
+        suite_ending_tasks.append(tasks[-1])
 
     ###
     # Build test session teardown task
     ###
     if test_session_setup_task:
-        test_session_teardown_dependencies = [
-            task for task in suite_tasks if isinstance(task, SuiteEndingTask) and task.suite in suites
-        ]
-        test_session_teardown_task = build_test_session_teardown_task(
-            test_session_setup_task, test_session_teardown_dependencies
-        )
+        test_session_teardown_task = build_test_session_teardown_task(test_session_setup_task, suite_ending_tasks)
     else:
         test_session_teardown_task = None
 
@@ -521,12 +1001,12 @@ def build_tasks(suites, fixture_registry, session_scheduled_fixtures, force_disa
     ###
     # Add extra dependencies in tasks for tests that depend on other tests
     ###
-    for test in flatten_tests(suites):
-        if not test.resolved_dependencies:
-            continue
-        test_task = lookup_test_task(tasks, test.path)
+    tests_with_dependencies = [test for test in flatten_tests(suites) if test.resolved_dependencies]
+    test_tasks_by_path = _index_test_tasks_by_path(tasks) if tests_with_dependencies else {}
+    for test in tests_with_dependencies:
+        test_task = lookup_test_task(test_tasks_by_path, test.path)
         test_task.dependencies.extend(
-            lookup_test_task(tasks, test_dep.path) for test_dep in test.resolved_dependencies
+            lookup_test_task(test_tasks_by_path, test_dep.path) for test_dep in test.resolved_dependencies
         )
 
     ###
@@ -535,18 +1015,133 @@ def build_tasks(suites, fixture_registry, session_scheduled_fixtures, force_disa
     return tasks
 
 
+def _get_task_name(task):
+    if isinstance(task, TestTask):
+        return "test %s" % task.test.path
+    elif isinstance(task, TestBatchTask):
+        return "tests %s (+%d)" % (task.test_tasks[0].test.path, len(task.test_tasks) - 1)
+    elif isinstance(task, SuiteInitializationTask):
+        return "suite setup %s" % task.suite.path
+    elif isinstance(task, SuiteTeardownTask):
+        return "suite teardown %s" % task.suite.path
+    elif isinstance(task, TestSessionSetupTask):
+        return "test session setup"
+    elif isinstance(task, TestSessionTeardownTask):
+        return "test session teardown"
+    else:
+        # the beginning and ending tasks of suites do not do any actual work
+        return None
+
+
+def build_task_runs(tasks, per_thread_setups=()):
+    """
+    Build the scheduling data of the tasks once they have been run, the tasks that do not do any actual work are
+    left out (the tasks depending on them depend on their own dependencies instead).
+
+    The per-thread setups of prewarmed fixtures (see :py:meth:`RunContext.prewarm_fixtures`) are appended as
+    task runs depending on the task having triggered them.
+    """
+    indexes = {}
+    for task in tasks:
+        if _get_task_name(task):
+            indexes[task] = len(indexes)
+
+    dependencies = {}
+
+    def get_dependencies(task):
+        if task not in dependencies:
+            task_dependencies = set()
+            for dependency in task.get_all_dependencies():
+                if dependency in indexes:
+                    task_dependencies.add(indexes[dependency])
+                else:
+                    task_dependencies.update(get_dependencies(dependency))
+            dependencies[task] = task_dependencies
+        return dependencies[task]
+
+    task_runs = [
+        TaskRun(
+            _get_task_name(task), sorted(get_dependencies(task)), task.timing.worker,
+            task.timing.ready_time, task.timing.dispatch_time, task.timing.start_time, task.timing.end_time
+        )
+        for task in indexes
+    ]
+    for name, task, timing in per_thread_setups:
+        task_runs.append(TaskRun(
+            name, [indexes[task]] if task in indexes else [], timing.worker,
+            timing.ready_time, timing.dispatch_time, timing.start_time, timing.end_time
+        ))
+    return task_runs
+
+
+def _get_task_duration(task, durations):
+    if isinstance(task, TestTask):
+        return durations.get_test_duration(task.test.path)
+    elif isinstance(task, TestBatchTask):
+        return sum(durations.get_test_duration(test_task.test.path) for test_task in task.test_tasks)
+    elif isinstance(task, SuiteInitializationTask):
+        return durations.get_suite_setup_duration(task.suite.path)
+    elif isinstance(task, SuiteTeardownTask):
+        return durations.get_suite_teardown_duration(task.suite.path)
+    else:
+        return 0
+
+
+def order_tasks_by_duration(tasks, durations):
+    """
+    Order tasks so that the longest work (according to the given durations) is handed first to the workers.
+    """
+    return order_tasks_by_longest_path(tasks, lambda task: _get_task_duration(task, durations))
+
+
+def _has_async_capacity(worker_type, coordinator, async_concurrency):
+    return worker_type != "process" and not coordinator and async_concurrency > 1
+
+
+def is_run_parallelized(suites, nb_threads=1, worker_type="thread", coordinator=None, async_concurrency=1):
+    """
+    Tell whether some tests of the suites may overlap when they are run with the given settings.
+    """
+    tests = list(flatten_tests(suites))
+    if len(tests) < 2:
+        return False
+    if nb_threads > 1:
+        return True
+    return _has_async_capacity(worker_type, coordinator, async_concurrency) and \
+        any(inspect.iscoroutinefunction(test.callback) for test in tests)
+
+
 def _run_suites(suites, fixture_registry, pre_run_scheduled_fixtures, session,
-                force_disabled=False, stop_on_failure=False, nb_threads=1):
+                force_disabled=False, stop_on_failure=False, nb_threads=1, worker_type="thread", durations=None,
+                coordinator=None, async_concurrency=1, result_cache=None, batch_size=1, test_timeout=None):
     # build tasks and run context
     session_scheduled_fixtures = fixture_registry.get_fixtures_scheduled_for_session(
         suites, pre_run_scheduled_fixtures, force_disabled
     )
-    tasks = build_tasks(suites, fixture_registry, session_scheduled_fixtures, force_disabled)
-    context = RunContext(session, fixture_registry, force_disabled, stop_on_failure)
+    tasks = build_tasks(
+        suites, fixture_registry, session_scheduled_fixtures, force_disabled, batch_size, test_timeout
+    )
+    if durations is not None:
+        tasks = order_tasks_by_duration(tasks, durations)
+    context = RunContext(
+        session, fixture_registry, force_disabled, stop_on_failure,
+        worker_type=worker_type, suites=suites if worker_type == "process" or coordinator else (),
+        coordinator=coordinator, result_cache=result_cache
+    )
+    # the tests being run are cancelled as soon as a failure occurs, they are not only prevented from starting
+    session.cancel_tests_on_failure = stop_on_failure
+    if coordinator:
+        session.cancel_worker_tests = coordinator.cancel_tests
 
     with session.event_manager.handle_events():
         session.start_test_session()
-        run_tasks(tasks, context, nb_threads)
+        # async tests only get their own capacity on the event loop when the async concurrency is explicitly
+        # raised, otherwise they are run by the threads (and by the worker processes) like the other tests
+        # so that they never overlap more tests than there are threads
+        if not _has_async_capacity(worker_type, coordinator, async_concurrency):
+            async_concurrency = 0
+        run_tasks(tasks, context, nb_threads, async_concurrency=async_concurrency)
+        session.report.task_runs = build_task_runs(tasks, context.per_thread_setups)
         session.end_test_session()
 
     exception, serialized_exception = session.event_manager.get_pending_failure()
@@ -554,12 +1149,26 @@ def _run_suites(suites, fixture_registry, pre_run_scheduled_fixtures, session,
         raise exception.__class__(serialized_exception)
 
 
-def run_suites(suites, fixture_registry, session, force_disabled=False, stop_on_failure=False, nb_threads=1):
-    fixture_teardowns = []
+def _check_process_worker_type(suites, fixture_registry, force_disabled):
+    if not is_process_mode_available():
+        raise LemoncheesecakeException("Running tests in worker processes is not supported on this platform")
 
-    # setup of 'pre_run' fixtures
+    for suite in suites:
+        for fixture_name in fixture_registry.get_fixtures_used_in_suite_recursively(suite, force_disabled):
+            for name in [fixture_name] + list(fixture_registry.get_fixture_dependencies(fixture_name)):
+                if fixture_registry.get_fixture(name).per_thread:
+                    raise LemoncheesecakeException(
+                        "Per-thread fixture '%s' cannot be used when running tests in worker processes" % name
+                    )
+
+
+def setup_pre_run_fixtures(scheduled_fixtures):
+    """
+    Setup the given 'pre_run' fixtures, return the teardown functions of the fixtures that have been set up
+    and the errors (if any).
+    """
+    teardowns = []
     errors = []
-    scheduled_fixtures = fixture_registry.get_fixtures_scheduled_for_pre_run(suites, force_disabled)
     initialize_fixture_cache(scheduled_fixtures)
     for setup, teardown in scheduled_fixtures.get_setup_teardown_pairs():
         try:
@@ -571,16 +1180,17 @@ def run_suites(suites, fixture_registry, session, force_disabled=False, stop_on_
                 serialize_current_exception(show_stacktrace=True)
             ))
             break
-        fixture_teardowns.append(teardown)
+        teardowns.append(teardown)
+    return teardowns, errors
 
-    if not errors:
-        _run_suites(
-            suites, fixture_registry, scheduled_fixtures, session,
-            force_disabled=force_disabled, stop_on_failure=stop_on_failure, nb_threads=nb_threads
-        )
 
-    # teardown of 'pre_run' fixtures
-    for teardown in reversed(fixture_teardowns):
+def teardown_pre_run_fixtures(teardowns):
+    """
+    Teardown 'pre_run' fixtures using the teardown functions returned by :py:func:`setup_pre_run_fixtures`,
+    return the errors (if any).
+    """
+    errors = []
+    for teardown in reversed(teardowns):
         try:
             teardown()
         except UserError:
@@ -589,6 +1199,54 @@ def run_suites(suites, fixture_registry, session, force_disabled=False, stop_on_
             errors.append("Got the following exception on fixture teardown (scope 'pre_run')%s" % (
                 serialize_current_exception(show_stacktrace=True)
             ))
+    return errors
+
+
+def run_suites(suites, fixture_registry, session, force_disabled=False, stop_on_failure=False, nb_threads=1,
+               worker_type="thread", durations=None, coordinator=None, async_concurrency=1, result_cache=None,
+               batch_size=1, test_timeout=None):
+    if worker_type == "process":
+        _check_process_worker_type(suites, fixture_registry, force_disabled)
+
+    try:
+        # setup of 'pre_run' fixtures
+        scheduled_fixtures = fixture_registry.get_fixtures_scheduled_for_pre_run(suites, force_disabled)
+        if coordinator:
+            # the remote worker processes set up their own 'pre_run' fixtures
+            fixture_teardowns, errors = [], []
+        else:
+            fixture_teardowns, errors = setup_pre_run_fixtures(scheduled_fixtures)
+
+        if not errors:
+            if worker_type == "process":
+                # the worker processes are forked (and inherit the 'pre_run' fixtures) before this process
+                # starts any thread
+                from lemoncheesecake.distributed import ProcessWorkerPool
+                coordinator = ProcessWorkerPool(
+                    nb_threads, suites, fixture_registry, force_disabled, scheduled_fixtures
+                )
+            if coordinator:
+                coordinator.start()
+            try:
+                _run_suites(
+                    suites, fixture_registry, scheduled_fixtures, session,
+                    force_disabled=force_disabled, stop_on_failure=stop_on_failure, nb_threads=nb_threads,
+                    worker_type=worker_type, durations=durations, coordinator=coordinator,
+                    async_concurrency=async_concurrency, result_cache=result_cache, batch_size=batch_size,
+                    test_timeout=test_timeout
+                )
+            finally:
+                if coordinator:
+                    errors.extend(coordinator.stop())
+
+            if result_cache:
+                result_cache.save_results(session.report)
+
+        # teardown of 'pre_run' fixtures
+        errors.extend(teardown_pre_run_fixtures(fixture_teardowns))
+    finally:
+        # the event loop (if any) used by async tests & fixtures
+        stop_event_loop_thread()
 
     if errors:
         raise LemoncheesecakeException("\n".join(errors))
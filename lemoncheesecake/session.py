@@ -5,6 +5,8 @@ Created on Jan 24, 2016
 '''
 
 import os.path
+import asyncio
+import contextvars
 from contextlib import contextmanager
 import shutil
 import threading
@@ -13,16 +15,21 @@ from typing import Optional
 import warnings
 import functools
 
-from lemoncheesecake.reporting import Report, ReportWriter, ReportLocation, Log
+from lemoncheesecake.reporting import Report, ReportWriter, ReportLocation, Log, CANCELLED_STATUS_DETAILS
 from lemoncheesecake import events
 from lemoncheesecake.helpers.typecheck import check_type_string, check_type_bool
-from lemoncheesecake.exceptions import AbortTest
+from lemoncheesecake.exceptions import AbortTest, CancelTest
 
 _ATTACHMENTS_DIR = "attachments"
 
 
 def _get_thread_id():
-    return threading.current_thread().ident
+    # async tests run concurrently by the same thread are told apart using their asyncio task
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task else threading.current_thread().ident
 
 
 class _Cursor:
@@ -30,6 +37,20 @@ class _Cursor:
         self.location = location
         self.step = step
         self.pending_events = []
+        self.thread_id = None
+        # whether the code being run can be cancelled (see Session.cancel_test_if_needed)
+        self.cancellable = False
+
+
+class _AttachmentCounter:
+    def __init__(self, value=0):
+        self.value = value
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            self.value += 1
+            return self.value
 
 
 class Session:
@@ -40,11 +61,19 @@ class Session:
         self.report_dir = report_dir
         self.report = report
         self.aborted = False
+        # when set, the first failure cancels the tests being run (see cancel_test_if_needed)
+        self.cancel_tests_on_failure = False
+        # when set, it is called on the first failure (if cancel_tests_on_failure is set) to cancel
+        # the tests being run by worker processes
+        self.cancel_worker_tests = None
+        self._tests_cancelled = False
         self._attachments_dir = os.path.join(self.report_dir, _ATTACHMENTS_DIR)
-        self._attachment_count = 0
-        self._attachment_lock = threading.Lock()
+        self._attachment_count = _AttachmentCounter()
         self._failures = set()
-        self._local = threading.local()
+        self._abandoned_locations = set()
+        self._cancelled_locations = set()
+        # the cursor is local to the current thread (or asyncio task)
+        self._cursor = contextvars.ContextVar("cursor")
 
     @classmethod
     def create(cls, event_manager, reporting_backends, report_dir, report_saving_strategy,
@@ -74,18 +103,26 @@ class Session:
 
     @property
     def cursor(self) -> _Cursor:
-        return self._local.cursor
+        return self._cursor.get()
 
     @cursor.setter
     def cursor(self, cursor):
-        self._local.cursor = cursor
+        # the events are bound to the thread (or asyncio task) that set the cursor, even if they are
+        # fired from a coroutine run on the event loop thread on behalf of this thread
+        cursor.thread_id = _get_thread_id()
+        self._cursor.set(cursor)
+
+    def _fire_at_cursor(self, event):
+        # the events fired by a thread on behalf of an abandoned test (see abandon_test) are discarded
+        if self.cursor.location not in self._abandoned_locations:
+            self.event_manager.fire(event)
 
     def _hold_event(self, event):
         self.cursor.pending_events.append(event)
 
     def _flush_pending_events(self):
         for event in self.cursor.pending_events:
-            self.event_manager.fire(event)
+            self._fire_at_cursor(event)
         del self.cursor.pending_events[:]
 
     def _discard_pending_event_if_any(self, event_class):
@@ -98,10 +135,45 @@ class Session:
     def _discard_or_fire_event(self, event_class, event):
         discarded = self._discard_pending_event_if_any(event_class)
         if not discarded:
-            self.event_manager.fire(event)
+            self._fire_at_cursor(event)
 
     def _mark_location_as_failed(self, location):
+        first_failure = not self._failures
         self._failures.add(location)
+        if first_failure and self.cancel_tests_on_failure and self.cancel_worker_tests:
+            self.cancel_worker_tests()
+
+    def forward_event(self, event):
+        """
+        Fire an event that has been generated outside of this session (in another process for instance).
+        """
+        if isinstance(event, events.LogEvent) and event.log_level == Log.LEVEL_ERROR:
+            self._mark_location_as_failed(event.location)
+        elif isinstance(event, events.CheckEvent) and event.check_is_successful is False:
+            self._mark_location_as_failed(event.location)
+        self.event_manager.fire(event)
+
+    def cancel_test_if_needed(self):
+        """
+        Raise :py:class:`CancelTest <lemoncheesecake.exceptions.CancelTest>` if the test being run by
+        the current thread (or asyncio task) has to be cancelled because of the failure of another test.
+        """
+        if not (self._tests_cancelled or (self.cancel_tests_on_failure and self._failures)):
+            return
+        cursor = self._cursor.get(None)
+        # the failed tests themselves are not cancelled
+        if cursor is None or not cursor.cancellable or cursor.location in self._failures:
+            return
+        cursor.cancellable = False
+        self._cancelled_locations.add(cursor.location)
+        raise CancelTest("tests have been aborted on --stop-on-failure")
+
+    def cancel_tests(self):
+        """
+        Make the tests being run (and the next ones) cancelled as if another test had failed, it is used
+        by worker processes when a test run by another process has failed.
+        """
+        self._tests_cancelled = True
 
     def is_successful(self, location=None):
         if location:
@@ -113,14 +185,14 @@ class Session:
         self._end_step_if_any()
         self.cursor.step = description
         self._hold_event(
-            events.StepStartEvent(self.cursor.location, description, _get_thread_id())
+            events.StepStartEvent(self.cursor.location, description, self.cursor.thread_id)
         )
     set_step = start_step
 
     def end_step(self):
         assert self.cursor.step, "There is no started step"
         self._discard_or_fire_event(
-            events.StepStartEvent, events.StepEndEvent(self.cursor.location, self.cursor.step, _get_thread_id())
+            events.StepStartEvent, events.StepEndEvent(self.cursor.location, self.cursor.step, self.cursor.thread_id)
         )
         self.cursor.step = None
 
@@ -128,56 +200,66 @@ class Session:
         if self.cursor.step:
             self.end_step()
 
-    def _log(self, level, content):
+    def log(self, level, content):
         self._flush_pending_events()
         if level == Log.LEVEL_ERROR:
             self._mark_location_as_failed(self.cursor.location)
-        self.event_manager.fire(
-            events.LogEvent(self.cursor.location, self.cursor.step, _get_thread_id(), level, content)
+        self._fire_at_cursor(
+            events.LogEvent(self.cursor.location, self.cursor.step, self.cursor.thread_id, level, content)
         )
 
     def log_debug(self, content):
-        return self._log(Log.LEVEL_DEBUG, content)
+        return self.log(Log.LEVEL_DEBUG, content)
 
     def log_info(self, content):
-        return self._log(Log.LEVEL_INFO, content)
+        return self.log(Log.LEVEL_INFO, content)
 
     def log_warning(self, content):
-        return self._log(Log.LEVEL_WARN, content)
+        return self.log(Log.LEVEL_WARN, content)
 
     def log_error(self, content):
-        return self._log(Log.LEVEL_ERROR, content)
+        return self.log(Log.LEVEL_ERROR, content)
 
     def log_check(self, description, is_successful, details):
         self._flush_pending_events()
         if is_successful is False:
             self._mark_location_as_failed(self.cursor.location)
-        self.event_manager.fire(events.CheckEvent(
-            self.cursor.location, self.cursor.step, _get_thread_id(), description, is_successful, details
+        self._fire_at_cursor(events.CheckEvent(
+            self.cursor.location, self.cursor.step, self.cursor.thread_id, description, is_successful, details
         ))
 
     def log_url(self, url, description):
         self._flush_pending_events()
-        self.event_manager.fire(
-            events.LogUrlEvent(self.cursor.location, self.cursor.step, _get_thread_id(), url, description)
+        self._fire_at_cursor(
+            events.LogUrlEvent(self.cursor.location, self.cursor.step, self.cursor.thread_id, url, description)
         )
 
+    def _make_attachment_filename(self, filename):
+        os.makedirs(self._attachments_dir, exist_ok=True)
+        return "%04d_%s" % (self._attachment_count.increment(), filename)
+
     @contextmanager
     def prepare_attachment(self, filename, description, as_image=False):
-        with self._attachment_lock:
-            attachment_filename = "%04d_%s" % (self._attachment_count + 1, filename)
-            self._attachment_count += 1
-            if not os.path.exists(self._attachments_dir):
-                os.mkdir(self._attachments_dir)
+        attachment_filename = self._make_attachment_filename(filename)
 
         yield os.path.join(self._attachments_dir, attachment_filename)
 
         self._flush_pending_events()
-        self.event_manager.fire(events.LogAttachmentEvent(
-            self.cursor.location, self.cursor.step, _get_thread_id(),
+        self._fire_at_cursor(events.LogAttachmentEvent(
+            self.cursor.location, self.cursor.step, self.cursor.thread_id,
             "%s/%s" % (_ATTACHMENTS_DIR, attachment_filename), description, as_image
         ))
 
+    def store_attachment(self, filename, content):
+        """
+        Store the content of an attachment that has been generated outside of this session (by a remote worker
+        for instance) and return its path relative to the report directory.
+        """
+        attachment_filename = self._make_attachment_filename(filename)
+        with open(os.path.join(self._attachments_dir, attachment_filename), "wb") as fh:
+            fh.write(content)
+        return "%s/%s" % (_ATTACHMENTS_DIR, attachment_filename)
+
     def start_test_session(self):
         self.event_manager.fire(events.TestSessionStartEvent(self.report))
 
@@ -222,12 +304,38 @@ class Session:
         self._end_step_if_any()
         self._discard_or_fire_event(events.SuiteTeardownStartEvent, events.SuiteTeardownEndEvent(suite))
 
+    def get_current_location(self):
+        """
+        Return the report location of the current thread (or asyncio task), ``None`` if there is none.
+        """
+        cursor = self._cursor.get(None)
+        return cursor.location if cursor else None
+
     def start_test(self, test):
         self.event_manager.fire(events.TestStartEvent(test))
         self.cursor = _Cursor(ReportLocation.in_test(test))
 
-    def end_test(self, test):
+    def resume_test(self, test):
+        self.cursor = _Cursor(ReportLocation.in_test(test))
+
+    def end_test(self, test, status_details=None):
         self._end_step_if_any()
+        if status_details is None and self.cursor.location in self._cancelled_locations:
+            status_details = CANCELLED_STATUS_DETAILS
+        self._fire_at_cursor(events.TestEndEvent(test, status_details=status_details))
+
+    def abandon_test(self, test, reason):
+        """
+        End the test on behalf of the thread running it (this thread being stuck), the events fired afterwards
+        by this thread for this test are discarded.
+        """
+        location = ReportLocation.in_test(test)
+        self._abandoned_locations.add(location)
+        self._mark_location_as_failed(location)
+        thread_id = _get_thread_id()
+        self.event_manager.fire(events.StepStartEvent(location, "Timeout", thread_id))
+        self.event_manager.fire(events.LogEvent(location, "Timeout", thread_id, Log.LEVEL_ERROR, reason))
+        self.event_manager.fire(events.StepEndEvent(location, "Timeout", thread_id))
         self.event_manager.fire(events.TestEndEvent(test))
 
     def skip_test(self, test, reason):
@@ -241,8 +349,10 @@ class Session:
 def _interruptible(wrapped):
     @functools.wraps(wrapped)
     def wrapper(*args, **kwargs):
-        if Session.get().aborted:
+        session = Session.get()
+        if session.aborted:
             raise AbortTest("tests have been manually stopped")
+        session.cancel_test_if_needed()
         return wrapped(*args, **kwargs)
     wrapper.__doc__ = wrapped.__doc__
     return wrapper
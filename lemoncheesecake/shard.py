@@ -0,0 +1,129 @@
+"""
+Split the tests of a test session into shards (for instance, to fan out a test session over several CI jobs).
+"""
+
+import heapq
+from typing import List, Optional, Sequence, Tuple
+
+from lemoncheesecake.exceptions import LemoncheesecakeException
+from lemoncheesecake.filter import FromTestsFilter
+from lemoncheesecake.history import Durations
+from lemoncheesecake.suite import Suite, Test, resolve_tests_dependencies
+from lemoncheesecake.testtree import filter_suites, flatten_suites, flatten_tests
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """
+    Parse a "i/n" shard expression into a (i, n) tuple (where i starts at 1).
+    """
+    index, _, nb_shards = shard.partition("/")
+    try:
+        index, nb_shards = int(index), int(nb_shards)
+    except ValueError:
+        raise LemoncheesecakeException("Invalid shard '%s' (expect i/n)" % shard)
+    if nb_shards < 1 or not 1 <= index <= nb_shards:
+        raise LemoncheesecakeException("Invalid shard '%s' (expect 1 <= i <= n)" % shard)
+    return index, nb_shards
+
+
+def _has_suite_setup(suite):
+    return suite.has_hook("setup_suite") or len(suite.get_fixtures()) > 0
+
+
+class _TestGroup:
+    def __init__(self, rank):
+        self.rank = rank
+        self.tests = []
+        self.suites = set()
+
+    def get_weight(self, durations):
+        if durations is None:
+            return len(self.tests)
+        return sum(durations.get_test_duration(test.path) for test in self.tests) + \
+            sum(durations.get_suite_setup_duration(suite.path) + durations.get_suite_teardown_duration(suite.path)
+                for suite in self.suites)
+
+
+def _group_tests(suites):
+    # union-find over the tests, the tests that must be run in the same shard end up with the same root
+    parents = {}
+
+    def find(test):
+        while parents[test] is not test:
+            parents[test] = parents[parents[test]]
+            test = parents[test]
+        return test
+
+    def union(test, other_test):
+        parents[find(other_test)] = find(test)
+
+    tests = list(flatten_tests(suites))
+    for test in tests:
+        parents[test] = test
+
+    # the tests depending on each other must be run together...
+    for test in tests:
+        for dependency in test.resolved_dependencies:
+            union(test, dependency)
+
+    # ... and the tests of a suite that has a setup as well, so that it is not run by several shards
+    suites_with_setup = set()
+    for suite in flatten_suites(suites):
+        if _has_suite_setup(suite):
+            suites_with_setup.add(suite)
+            suite_tests = suite.get_tests()
+            for test in suite_tests[1:]:
+                union(suite_tests[0], test)
+
+    groups = {}
+    for rank, test in enumerate(tests):
+        group = groups.setdefault(find(test), _TestGroup(rank))
+        group.tests.append(test)
+        if test.parent_suite in suites_with_setup:
+            group.suites.add(test.parent_suite)
+
+    return list(groups.values())
+
+
+def split_tests_into_shards(suites: Sequence[Suite], nb_shards: int,
+                            durations: Optional[Durations] = None) -> List[List[Test]]:
+    """
+    Split the tests into ``nb_shards`` shards. The tests depending on each other and the tests of a suite
+    having a setup are kept in the same shard. The shards are balanced using the given durations if any,
+    or using the number of tests otherwise. The split only depends on the tests (and durations), meaning
+    that it is the same across the invocations of ``lcc run --shard i/n``.
+
+    The tests dependencies must have been resolved (see :py:func:`resolve_tests_dependencies`).
+    """
+    groups = _group_tests(suites)
+    if durations is not None and durations.is_empty():
+        durations = None
+
+    # longest processing time first: each group (from the heaviest to the lightest one) goes to the
+    # least loaded shard, ties are broken using the number of tests of the shards and then their index
+    shards = [(0, 0, index, []) for index in range(nb_shards)]
+    for group in sorted(groups, key=lambda g: (-g.get_weight(durations), g.rank)):
+        load, nb_tests, index, groups_of_shard = heapq.heappop(shards)
+        groups_of_shard.append(group)
+        heapq.heappush(
+            shards, (load + group.get_weight(durations), nb_tests + len(group.tests), index, groups_of_shard)
+        )
+
+    return [
+        [test for group in sorted(groups_of_shard, key=lambda g: g.rank) for test in group.tests]
+        for _, _, _, groups_of_shard in sorted(shards, key=lambda shard: shard[2])
+    ]
+
+
+def get_shard_suites(suites: Sequence[Suite], all_suites: Sequence[Suite], shard: Tuple[int, int],
+                     durations: Optional[Durations] = None) -> List[Suite]:
+    """
+    Get the suites of the given (i, n) shard of ``suites``, the shard is empty if there are less groups
+    of tests than shards.
+    """
+    index, nb_shards = shard
+    resolve_tests_dependencies(suites, all_suites)
+    tests = split_tests_into_shards(suites, nb_shards, durations)[index - 1]
+    if not tests:
+        return []
+    return filter_suites(suites, FromTestsFilter(tests))
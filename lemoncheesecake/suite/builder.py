@@ -9,7 +9,7 @@ import copy
 
 from typing import Any, Iterable, Callable, Optional, Tuple, Sequence, Union
 
-from lemoncheesecake.suite.core import InjectedFixture, Test
+from lemoncheesecake.suite.core import InjectedFixture, Test, TestsWithTag, TestsInSuite
 
 
 class Metadata:
@@ -28,6 +28,9 @@ class Metadata:
         self.disabled = False
         self.condition = None
         self.parametrized = None
+        self.resources = {}
+        self.max_workers = None
+        self.timeout = None
 
 
 def _get_metadata_next_rank():
@@ -70,14 +73,21 @@ def get_metadata(obj):
         return obj._lccmetadata
 
 
-def suite(description=None, name=None, rank=None):
+def suite(description=None, name=None, rank=None, max_workers=None, parallel=True):
     """
     Decorator, mark a class as a suite class.
 
     :param description: suite's description (by default, the suite's description is built from the name)
     :param name: suite's name (by default, the suite's name is taken from the class's name)
     :param rank: this value is used to order suites of the same hierarchy level
+    :param max_workers: the maximum number of tests of the suite (including the tests of its sub suites)
+        run at the same time when tests are run in parallel (*new in version 1.16.0*)
+    :param parallel: ``False`` is a shortcut for ``max_workers=1``, the tests of the suite are run one after the other
+        (*new in version 1.16.0*)
     """
+    assert max_workers is None or max_workers >= 1, "'max_workers' must be greater or equal to 1"
+    assert parallel or max_workers in (None, 1), "'parallel=False' cannot be used along with 'max_workers' > 1"
+
     def wrapper(klass):
         assert inspect.isclass(klass), "%s is not a class (suite decorator can only be used on a class)" % klass
         md = get_metadata(klass)
@@ -86,6 +96,7 @@ def suite(description=None, name=None, rank=None):
         md.rank = rank if rank is not None else _get_metadata_next_rank()
         md.name = name or klass.__name__
         md.description = description or build_description_from_name(md.name)
+        md.max_workers = 1 if not parallel else max_workers
         return klass
     return wrapper
 
@@ -178,7 +189,13 @@ def depends_on(*deps: Union[str, Callable]) -> Any:
 
             @lcc.depends(lambda test: "mytag" in test.tags)
 
+        - a declarative selection of tests, see :py:func:`tests_with_tag` and :py:func:`tests_in_suite`::
+
+            @lcc.depends(lcc.tests_with_tag("mytag"))
+
         .. versionadded:: 1.14.1 callable syntax
+
+        .. versionadded:: 1.16.0 declarative selection of tests
     """
     def wrapper(obj):
         md = get_metadata(obj)
@@ -188,6 +205,71 @@ def depends_on(*deps: Union[str, Callable]) -> Any:
     return wrapper
 
 
+def tests_with_tag(tag: str) -> Callable[[Test], bool]:
+    """
+    To be used with :py:func:`depends_on`, the test depends on all the tests having the given tag (either directly or
+    through their suites). Unlike an equivalent callable, such a dependency is resolved through an index of the tests
+    by tag instead of being evaluated against every test of the project.
+
+    .. versionadded:: 1.16.0
+    """
+    return TestsWithTag(tag)
+
+
+def tests_in_suite(path: str) -> Callable[[Test], bool]:
+    """
+    To be used with :py:func:`depends_on`, the test depends on all the tests of the suite whose path is given
+    (including the tests of its sub suites). Unlike an equivalent callable, such a dependency is resolved through
+    an index of the tests by suite instead of being evaluated against every test of the project.
+
+    .. versionadded:: 1.16.0
+    """
+    return TestsInSuite(path)
+
+
+def resource(name: str, exclusive: bool = False, max_concurrent: Optional[int] = None) -> Any:
+    """
+    Decorator, declare that a test (or all the tests of a suite) use a resource (a database, a device, a port, etc...)
+    whose concurrent usage is limited. The tests that would exceed the limit of a resource are held back until
+    the resource is available while the other tests keep being run.
+
+    :param name: the resource name
+    :param exclusive: the test is not run at the same time as any other test using the resource
+    :param max_concurrent: the test is not run if it would make more than ``max_concurrent`` tests using
+        the resource at the same time
+
+    If neither ``exclusive`` nor ``max_concurrent`` is set, the test can share the resource with any test as long as
+    the limits of these tests are honored.
+
+    .. versionadded:: 1.16.0
+    """
+    assert not (exclusive and max_concurrent), "'exclusive' and 'max_concurrent' cannot be used together"
+    assert max_concurrent is None or max_concurrent >= 1, "'max_concurrent' must be greater or equal to 1"
+
+    def wrapper(obj):
+        md = get_metadata(obj)
+        md.resources[name] = 1 if exclusive else max_concurrent
+        return obj
+    return wrapper
+
+
+def timeout(seconds: float) -> Any:
+    """
+    Decorator, set a timeout (in seconds) on a test (or on all the tests of a suite). A test that is still running
+    after its timeout is marked as failed (with the stack of the stuck thread) and the thread running it is replaced
+    by a new one (or the worker process running it is killed).
+
+    .. versionadded:: 1.16.0
+    """
+    assert seconds > 0, "'seconds' must be greater than 0"
+
+    def wrapper(obj):
+        md = get_metadata(obj)
+        md.timeout = seconds
+        return obj
+    return wrapper
+
+
 def inject_fixture(fixture_name: str = None):
     """
     Inject a fixture into a suite. If no fixture name is specified then the name of the variable holding
@@ -1,4 +1,4 @@
-from typing import Dict, Iterable, Sequence
+from typing import Dict, Iterable
 
 from lemoncheesecake.exceptions import SuiteLoadingError, ValidationError
 from lemoncheesecake.helpers.orderedset import OrderedSet
@@ -16,6 +16,25 @@ def _is_node_disabled(node):
     return False
 
 
+def _get_node_resources(node):
+    # the resources of a node override the resources (of the same name) of its parent suites
+    resources = {}
+    while node is not None:
+        for name, max_concurrent in node.resources.items():
+            resources.setdefault(name, max_concurrent)
+        node = node.parent_suite
+    return resources
+
+
+def _get_node_timeout(node):
+    # the timeout of a node overrides the timeout of its parent suites
+    while node is not None:
+        if node.timeout is not None:
+            return node.timeout
+        node = node.parent_suite
+    return None
+
+
 class Test(BaseTest):
     """
     Internal representation of a test.
@@ -29,15 +48,37 @@ class Test(BaseTest):
         self.dependencies = []
         self.resolved_dependencies = []
         self.parameters = {}
+        self.resources = {}
+        self.timeout = None
+        # the introspection of the callback is costly while its arguments are looked up several times
+        self._callback_arguments = None, None
 
     def is_disabled(self):
         return _is_node_disabled(self)
 
+    def get_resources(self):
+        """
+        Get the resources used by the test (including the resources of its suites) as a dict
+        whose values are the maximum number of concurrent usages (``None`` meaning no limit).
+        """
+        return _get_node_resources(self)
+
+    def get_timeout(self):
+        """
+        Get the timeout (in seconds) of the test (or of its closest suite having a timeout), ``None`` if there is
+        no timeout.
+        """
+        return _get_node_timeout(self)
+
     def is_enabled(self):
         return not self.is_disabled()
 
     def get_arguments(self):
-        return get_callable_args(self.callback)
+        callback, arguments = self._callback_arguments
+        if callback is not self.callback:
+            arguments = get_callable_args(self.callback)
+            self._callback_arguments = self.callback, arguments
+        return list(arguments)
 
     def get_fixtures(self):
         return list(filter(lambda arg: arg not in self.parameters, self.get_arguments()))
@@ -58,6 +99,9 @@ class Suite(BaseSuite):
         self.rank = 0
         self.disabled = False
         self.hidden = False
+        self.resources = {}
+        self.max_workers = None
+        self.timeout = None
         self._hooks = {}
         self._injected_fixtures = self._load_injected_fixtures(obj) if obj else {}
         # to optimize unique constraint checks on test/suite name/description, keep those
@@ -82,6 +126,9 @@ class Suite(BaseSuite):
     def is_disabled(self):
         return _is_node_disabled(self)
 
+    def get_resources(self):
+        return _get_node_resources(self)
+
     def has_enabled_tests(self):
         return any(test.is_enabled() for test in self.get_tests())
 
@@ -156,45 +203,143 @@ class Suite(BaseSuite):
         return fixtures
 
 
-def _normalize_test_dependencies(test: Test, all_tests: Dict[str, Test]):
+class TestsWithTag:
+    """
+    Test dependency matching the tests having a given tag (either directly or through their suites),
+    see :py:func:`tests_with_tag <lemoncheesecake.api.tests_with_tag>`.
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    def __call__(self, test):
+        return self.tag in test.hierarchy_tags
+
+    def lookup(self, tests_index):
+        return tests_index.get_tests_with_tag(self.tag)
+
+    def __repr__(self):
+        return "tests_with_tag(%r)" % self.tag
+
+
+class TestsInSuite:
+    """
+    Test dependency matching the tests of a given suite (including the tests of its sub suites),
+    see :py:func:`tests_in_suite <lemoncheesecake.api.tests_in_suite>`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, test):
+        return test.path.startswith(self.path + ".")
+
+    def lookup(self, tests_index):
+        return tests_index.get_tests_in_suite(self.path)
+
+    def __repr__(self):
+        return "tests_in_suite(%r)" % self.path
+
+
+class _TestsIndex:
+    # the tag and suite path indexes are only built if a declarative test dependency needs them
+    def __init__(self, tests: Dict[str, Test]):
+        self.tests = tests
+        self._tests_by_tag = None
+        self._tests_by_suite_path = None
+
+    def get_tests_with_tag(self, tag):
+        if self._tests_by_tag is None:
+            self._tests_by_tag = {}
+            for test in self.tests.values():
+                for test_tag in test.hierarchy_tags:
+                    self._tests_by_tag.setdefault(test_tag, []).append(test)
+        return self._tests_by_tag.get(tag, [])
+
+    def get_tests_in_suite(self, path):
+        if self._tests_by_suite_path is None:
+            self._tests_by_suite_path = {}
+            for test_path, test in self.tests.items():
+                suite_path = test_path
+                while "." in suite_path:
+                    suite_path = suite_path.rsplit(".", 1)[0]
+                    self._tests_by_suite_path.setdefault(suite_path, []).append(test)
+        return self._tests_by_suite_path.get(path, [])
+
+
+def _normalize_test_dependencies(test: Test, all_tests: _TestsIndex):
+    # NB: the scheduled tests may be copies of the tests of all_tests, a test is then compared to the other
+    # tests through its path
     for test_dep in test.dependencies:
-        if callable(test_dep):
-            for other_test in all_tests.values():
-                if other_test != test and test_dep(other_test):
+        if isinstance(test_dep, (TestsWithTag, TestsInSuite)):
+            for other_test in test_dep.lookup(all_tests):
+                if other_test.path != test.path:
+                    yield other_test
+        elif callable(test_dep):
+            for other_test in all_tests.tests.values():
+                if test_dep(other_test) and other_test.path != test.path:
                     yield other_test
         else:
             try:
-                yield all_tests[test_dep]
+                yield all_tests.tests[test_dep]
             except KeyError:
                 raise ValidationError(
                     f"Cannot find dependency test '{test_dep}' for '{test.path}'"
                 )
 
 
-def _resolve_test_dependencies(test: Test, scheduled_tests: Dict[str, Test], all_tests: Dict[str, Test],
-                               ref_tests: Sequence[str] = ()):
-    # NB: the all_tests vs scheduled_tests distinction is here to make sure that an existing test dependency
-    # (i.e present in all_tests) is really going to be run (i.e present in scheduled_tests)
-    ref_tests = [test.path] + list(ref_tests)
-    resolved_dependencies = []
-
-    for dep_test in _normalize_test_dependencies(test, all_tests):
-        if dep_test.path in ref_tests:
-            raise ValidationError(f"Got circular dependency on test {test.path} through test {dep_test.path}")
-        if dep_test.path not in scheduled_tests:
-            raise ValidationError(
-                f"Error: test dependency '{dep_test.path}' of '{test.path}' "
-                "is not going to be run"
-            )
+_VISITING = 1
+_VISITED = 2
 
-        resolved_dependencies.append(dep_test)
-        _resolve_test_dependencies(dep_test, scheduled_tests, all_tests, ref_tests)
 
-    return resolved_dependencies
+class _TestDependencyResolver:
+    # NB: the all_tests vs scheduled_tests distinction is here to make sure that an existing test dependency
+    # (i.e present in all_tests) is really going to be run (i.e present in scheduled_tests)
+    def __init__(self, scheduled_tests: Dict[str, Test], all_tests: Dict[str, Test]):
+        self.scheduled_tests = scheduled_tests
+        self.all_tests = _TestsIndex(all_tests)
+        self._dependencies = {}
+        # the dependency closure of a test is only checked once, whatever the number of tests depending on it
+        self._states = {}
+
+    def get_dependencies(self, test):
+        if test.path not in self._dependencies:
+            self._dependencies[test.path] = list(_normalize_test_dependencies(test, self.all_tests))
+        return self._dependencies[test.path]
+
+    def resolve(self, test):
+        if test.path not in self._states:
+            self._check_dependency_closure(test)
+        return self.get_dependencies(test)
+
+    def _check_dependency_closure(self, root_test):
+        self._states[root_test.path] = _VISITING
+        test_path = [root_test]
+        dependency_iters = [iter(self.get_dependencies(root_test))]
+        while dependency_iters:
+            dep_test = next(dependency_iters[-1], None)
+            if dep_test is None:
+                dependency_iters.pop()
+                self._states[test_path.pop().path] = _VISITED
+                continue
+
+            test = test_path[-1]
+            state = self._states.get(dep_test.path)
+            if state == _VISITING:
+                raise ValidationError(f"Got circular dependency on test {test.path} through test {dep_test.path}")
+            if dep_test.path not in self.scheduled_tests:
+                raise ValidationError(
+                    f"Error: test dependency '{dep_test.path}' of '{test.path}' "
+                    "is not going to be run"
+                )
+            if state is None:
+                self._states[dep_test.path] = _VISITING
+                test_path.append(dep_test)
+                dependency_iters.append(iter(self.get_dependencies(dep_test)))
 
 
 def resolve_tests_dependencies(scheduled_suites: Iterable[Suite], all_suites: Iterable[Suite]):
     scheduled_tests = flatten_tests_as_dict(scheduled_suites)
-    all_tests = flatten_tests_as_dict(all_suites)
+    resolver = _TestDependencyResolver(scheduled_tests, flatten_tests_as_dict(all_suites))
     for test in scheduled_tests.values():
-        test.resolved_dependencies = _resolve_test_dependencies(test, scheduled_tests, all_tests)
+        test.resolved_dependencies = resolver.resolve(test)
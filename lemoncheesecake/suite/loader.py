@@ -62,6 +62,8 @@ def _load_test(obj):
     test.hidden = md.condition and not md.condition(obj)
     test.rank = md.rank
     test.dependencies.extend(md.dependencies)
+    test.resources.update(md.resources)
+    test.timeout = md.timeout
 
     try:
         _check_test_tree_node_types(test)
@@ -166,6 +168,9 @@ def load_suite_from_class(class_: Any) -> Suite:
     suite.rank = md.rank
     suite.disabled = md.disabled
     suite.hidden = md.condition and not md.condition(suite_obj)
+    suite.resources.update(md.resources)
+    suite.max_workers = md.max_workers
+    suite.timeout = md.timeout
 
     try:
         _check_test_tree_node_types(suite)
@@ -1,7 +1,14 @@
-import itertools
-from multiprocessing.dummy import Pool, Queue
+import asyncio
+import collections
+import heapq
+import queue
+import sys
+import threading
+import time
+import traceback
 
 from lemoncheesecake.exceptions import LemoncheesecakeException, TaskFailure, serialize_current_exception
+from lemoncheesecake.helpers.asyncio import get_event_loop_thread
 
 DEBUG = False
 _KEYBOARD_INTERRUPT_ERROR_MESSAGE = "tests have been interrupted by the user"
@@ -31,9 +38,26 @@ class TaskResultException:
         self.stacktrace = stacktrace
 
 
+class TaskTiming:
+    """
+    The scheduling timestamps of a task: when it became ready to be run, when it was handed to a worker,
+    when the worker started and ended it, along with the name of this worker (thread).
+    """
+
+    def __init__(self):
+        self.ready_time = None
+        self.dispatch_time = None
+        self.start_time = None
+        self.end_time = None
+        self.worker = None
+
+
 class BaseTask:
     def __init__(self):
         self.result = None
+        self.timing = TaskTiming()
+        # whether the task has been abandoned on timeout (see abandon_task)
+        self.abandoned = False
 
     def get_all_dependencies(self):
         return self.get_on_completion_dependencies() + self.get_on_success_dependencies()
@@ -44,20 +68,70 @@ class BaseTask:
     def get_on_completion_dependencies(self):
         return []
 
+    def is_async(self):
+        """
+        Whether the task can be run on the event loop through :py:meth:`run_async`.
+        """
+        return False
+
+    def get_resources(self):
+        """
+        The resources used by the task as a dict whose values are the maximum number of tasks using
+        the resource at the same time (``None`` meaning no limit).
+        """
+        return {}
+
+    def get_timeout(self, context):
+        """
+        The timeout (in seconds) after which the task is abandoned (see :py:meth:`abandon`) by the scheduler,
+        ``None`` meaning no timeout.
+        """
+        return None
+
+    def get_async_timeout(self, context):
+        """
+        The timeout (in seconds) after which :py:meth:`run_async` is cancelled and the task abandoned,
+        by default the same as :py:meth:`get_timeout`. A task enforcing its timeout by itself (so that it can
+        still clean up after a timeout) returns ``None``.
+        """
+        return self.get_timeout(context)
+
     def run(self, context):
         pass
 
+    async def run_async(self, context):
+        self.run(context)
+
     def skip(self, context, reason):
         pass
 
+    def abandon(self, context, stacktrace):
+        """
+        Called when the task has timed out, ``stacktrace`` is the stack of the (stuck) thread running the task
+        (if available). Like :py:meth:`run`, it may raise
+        :py:class:`TaskFailure <lemoncheesecake.exceptions.TaskFailure>`.
+        """
+        pass
+
 
 class TaskContext:
     def __init__(self):
         self._tasks_aborted = False
+        self._pool = None
 
     def enable_task_abort(self):
         self._tasks_aborted = True
 
+    def run_on_each_worker(self, func):
+        """
+        Have ``func`` called (without blocking) by each worker of the pool running the tasks, a worker calls it
+        before running its next task. Outside of :py:func:`run_tasks`, ``func`` is directly called.
+        """
+        if self._pool:
+            self._pool.run_on_each_worker(func)
+        else:
+            func()
+
     def is_task_to_be_skipped(self, task):
         if self._tasks_aborted:
             return "tests have been manually stopped"
@@ -65,24 +139,328 @@ class TaskContext:
             return None
 
 
-def pop_runnable_tasks(remaining_tasks, completed_tasks, nb_tasks):
-    runnable_tasks = list(
-        itertools.islice(
-            filter(lambda t: set(t.get_all_dependencies()).issubset(completed_tasks), remaining_tasks),
-            0, nb_tasks
+class _ResourceUsages:
+    """
+    Keep track of the resources used by the running tasks. A task can use a resource if it does not make
+    the number of tasks using the resource exceed its own limit and the limits of these tasks.
+    """
+
+    def __init__(self):
+        # the limits of the running tasks using the resource, by resource name
+        self._limits = {}
+
+    def can_acquire(self, resources):
+        for name, limit in resources.items():
+            limits = self._limits.get(name, [])
+            nb_usages = len(limits) + 1
+            if any(lim is not None and nb_usages > lim for lim in limits + [limit]):
+                return False
+        return True
+
+    def acquire(self, resources):
+        for name, limit in resources.items():
+            self._limits.setdefault(name, []).append(limit)
+
+    def release(self, resources):
+        for name, limit in resources.items():
+            self._limits[name].remove(limit)
+
+
+class _ThreadPool:
+    """
+    A minimal thread pool whose workers can be replaced: a worker stuck on a task that has timed out is abandoned
+    (it exits once its task is over, if ever) and a new worker takes its place.
+
+    Besides the shared queue of items, each worker has its own inbox of functions (see :py:meth:`run_on_each_worker`)
+    that takes precedence over the shared queue.
+    """
+
+    def __init__(self, nb_threads):
+        self._condition = threading.Condition()
+        self._queue = collections.deque()
+        self._inboxes = {}
+        self._abandoned_thread_ids = set()
+        self._nb_workers = 0
+        self._nb_started_workers = 0
+        for _ in range(nb_threads):
+            self._start_worker()
+
+    def _start_worker(self):
+        self._nb_started_workers += 1
+        inbox = collections.deque()
+        thread = threading.Thread(
+            target=self._work, args=(inbox,), name="worker-%d" % self._nb_started_workers, daemon=True
+        )
+        thread.start()
+        with self._condition:
+            self._inboxes[thread.ident] = inbox
+        self._nb_workers += 1
+
+    def _get_next_item(self, inbox):
+        with self._condition:
+            while not (inbox or self._queue):
+                self._condition.wait()
+            return (inbox.popleft(), ()) if inbox else self._queue.popleft()
+
+    def _work(self, inbox):
+        while True:
+            item = self._get_next_item(inbox)
+            if item is None:
+                break
+            func, args = item
+            func(*args)
+            if threading.get_ident() in self._abandoned_thread_ids:
+                break
+
+    def _put(self, item):
+        with self._condition:
+            self._queue.append(item)
+            self._condition.notify()
+
+    def apply_async(self, func, args=()):
+        self._put((func, args))
+
+    def run_on_each_worker(self, func):
+        with self._condition:
+            for inbox in self._inboxes.values():
+                inbox.append(func)
+            self._condition.notify_all()
+
+    def replace_worker(self, thread_id):
+        self._abandoned_thread_ids.add(thread_id)
+        with self._condition:
+            self._inboxes.pop(thread_id, None)
+        self._nb_workers -= 1
+        self._start_worker()
+
+    def close(self):
+        for _ in range(self._nb_workers):
+            self._put(None)
+
+
+class _Watchdog:
+    """
+    Keep track of the deadlines of the running tasks that have a timeout (see :py:meth:`BaseTask.get_timeout`).
+
+    The timeout of a task starts when a thread actually starts running it (and not when it is dispatched,
+    since it may wait for its worker to be available), ``wakeup`` is called at that moment so that the
+    scheduler takes the new deadline into account.
+    """
+
+    def __init__(self, wakeup=None):
+        self._lock = threading.Lock()
+        self._timeouts = {}
+        self._deadlines = {}
+        self._wakeup = wakeup
+
+    def watch(self, task, timeout):
+        with self._lock:
+            self._timeouts[task] = timeout
+
+    def bind_current_thread(self, task):
+        # NB: this method is called by the thread running the task
+        with self._lock:
+            timeout = self._timeouts.pop(task, None)
+            if timeout is None:
+                return
+            self._deadlines[task] = time.monotonic() + timeout, threading.get_ident()
+        if self._wakeup:
+            self._wakeup()
+
+    def unwatch(self, task):
+        with self._lock:
+            self._timeouts.pop(task, None)
+            self._deadlines.pop(task, None)
+
+    def get_delay_before_next_deadline(self):
+        with self._lock:
+            if not self._deadlines:
+                return None
+            return max(min(deadline for deadline, _ in self._deadlines.values()) - time.monotonic(), 0)
+
+    def pop_timed_out_tasks(self):
+        now = time.monotonic()
+        with self._lock:
+            timed_out_tasks = [
+                (task, thread_id) for task, (deadline, thread_id) in self._deadlines.items() if deadline <= now
+            ]
+            for task, _ in timed_out_tasks:
+                del self._deadlines[task]
+        # a task having a result is over and about to be handled as a completed task
+        return [(task, thread_id) for task, thread_id in timed_out_tasks if task.result is None]
+
+
+class TaskScheduler:
+    """
+    Keep track of the tasks that are ready to be run.
+
+    Each task holds a counter of its unfinished dependencies and a reverse-dependency index is
+    maintained, so that a completed task only releases its own dependents. Ready tasks are popped
+    according to their rank in the original task list, the tasks matching ``is_async_task`` (if any)
+    being kept in a separate ready queue. A ready task whose resources (see :py:meth:`BaseTask.get_resources`)
+    are not available is held back in its queue until a task using these resources completes.
+    """
+
+    def __init__(self, tasks, is_async_task=None):
+        self._ranks = {}
+        self._dependents = {}
+        self._nb_pending_dependencies = {}
+        self._ready_tasks = []
+        self._ready_async_tasks = []
+        self._is_async_task = is_async_task
+        self._resources = {}
+        self._resource_usages = _ResourceUsages()
+        self._tasks_using_resources = set()
+
+        for rank, task in enumerate(tasks):
+            self._ranks[task] = rank
+            self._dependents[task] = []
+            resources = task.get_resources()
+            if resources:
+                self._resources[task] = resources
+
+        for task in tasks:
+            dependencies = set(task.get_all_dependencies())
+            for dependency in dependencies:
+                self._dependents[dependency].append(task)
+            if dependencies:
+                self._nb_pending_dependencies[task] = len(dependencies)
+            else:
+                self._push_ready_task(task)
+
+    def _push_ready_task(self, task):
+        task.timing.ready_time = time.time()
+        if self._is_async_task and self._is_async_task(task):
+            heapq.heappush(self._ready_async_tasks, (self._ranks[task], task))
+        else:
+            heapq.heappush(self._ready_tasks, (self._ranks[task], task))
+
+    def has_ready_tasks(self):
+        return len(self._ready_tasks) > 0 or len(self._ready_async_tasks) > 0
+
+    def pop_ready_tasks(self, nb_tasks, async_tasks=False):
+        ready_tasks = self._ready_async_tasks if async_tasks else self._ready_tasks
+        tasks = []
+        held_back_tasks = []
+        while ready_tasks and len(tasks) < nb_tasks:
+            rank, task = heapq.heappop(ready_tasks)
+            resources = self._resources.get(task)
+            if resources:
+                if not self._resource_usages.can_acquire(resources):
+                    _debug("hold back task %s" % task)
+                    held_back_tasks.append((rank, task))
+                    continue
+                self._resource_usages.acquire(resources)
+                self._tasks_using_resources.add(task)
+            _debug("pop runnable task %s" % task)
+            tasks.append(task)
+        for item in held_back_tasks:
+            heapq.heappush(ready_tasks, item)
+        return tasks
+
+    def mark_task_as_completed(self, task):
+        if task in self._tasks_using_resources:
+            self._tasks_using_resources.remove(task)
+            self._resource_usages.release(self._resources[task])
+
+        for dependent in self._dependents[task]:
+            if dependent not in self._nb_pending_dependencies:
+                continue
+            self._nb_pending_dependencies[dependent] -= 1
+            if self._nb_pending_dependencies[dependent] == 0:
+                del self._nb_pending_dependencies[dependent]
+                self._push_ready_task(dependent)
+
+    def pop_remaining_tasks(self):
+        """
+        Pop all the tasks that have not been popped yet (whether they are ready or not).
+        """
+        tasks = [task for _, task in self._ready_tasks + self._ready_async_tasks]
+        tasks.extend(self._nb_pending_dependencies)
+        self._ready_tasks = []
+        self._ready_async_tasks = []
+        self._nb_pending_dependencies = {}
+        return sorted(tasks, key=lambda task: self._ranks[task])
+
+
+def order_tasks_by_longest_path(tasks, get_task_duration):
+    """
+    Order tasks so that the tasks with the longest remaining path (the task duration plus the longest chain of
+    durations of the tasks depending on it) come first. The original order is kept for tasks having the same
+    remaining path duration, since a task cannot have a shorter remaining path than its dependents, this
+    order is compatible with the dependencies between tasks.
+    """
+    dependents = {task: [] for task in tasks}
+    for task in tasks:
+        for dependency in set(task.get_all_dependencies()):
+            dependents[dependency].append(task)
+
+    nb_unvisited_dependents = {task: len(task_dependents) for task, task_dependents in dependents.items()}
+    longest_paths = {}
+    tasks_to_visit = [task for task in tasks if not dependents[task]]
+    while tasks_to_visit:
+        task = tasks_to_visit.pop()
+        longest_paths[task] = get_task_duration(task) + max(
+            (longest_paths[dependent] for dependent in dependents[task]), default=0
         )
-    )
+        for dependency in set(task.get_all_dependencies()):
+            nb_unvisited_dependents[dependency] -= 1
+            if nb_unvisited_dependents[dependency] == 0:
+                tasks_to_visit.append(dependency)
+
+    ranks = {task: rank for rank, task in enumerate(tasks)}
+    return sorted(tasks, key=lambda task: (-longest_paths[task], ranks[task]))
+
+
+def _start_task(task):
+    task.timing.start_time = time.time()
+    task.timing.worker = threading.current_thread().name
+
 
-    for task in runnable_tasks:
-        remaining_tasks.remove(task)
-        _debug("pop runnable task %s" % task)
-        yield task
+# guard the handoff between a worker completing a task and the scheduler abandoning it on timeout
+_abandon_lock = threading.Lock()
+
+
+def _complete_task(task, completed_task_queue):
+    # an abandoned task has already been handled as completed when it timed out, the late completion
+    # of the thread that was running it is dropped
+    with _abandon_lock:
+        if task.abandoned:
+            return
+    task.timing.end_time = time.time()
+    completed_task_queue.put(task)
+
+
+def _set_task_result(task, result):
+    # the result of a task that has been abandoned on timeout has already been set
+    with _abandon_lock:
+        if not task.abandoned:
+            task.result = result
 
 
 def run_task(task, context, completed_task_queue):
     _debug("run task %s" % task)
     try:
         task.run(context)
+    except TaskFailure as excp:
+        _set_task_result(task, TaskResultFailure(str(excp)))
+    except Exception:
+        _set_task_result(task, TaskResultException(serialize_current_exception()))
+    else:
+        _set_task_result(task, TaskResultSuccess())
+
+    _complete_task(task, completed_task_queue)
+
+
+async def run_task_async(task, context, completed_task_queue):
+    _debug("run async task %s" % task)
+    try:
+        # NB: asyncio.wait_for does not enforce any timeout if timeout is None
+        await asyncio.wait_for(task.run_async(context), task.get_async_timeout(context))
+    except asyncio.TimeoutError:
+        # the task has been cancelled, there is no stuck thread to get the stack from
+        task.timing.end_time = time.time()
+        task.result = _get_abandoned_task_result(task, context, None)
     except TaskFailure as excp:
         task.result = TaskResultFailure(str(excp))
     except Exception:
@@ -90,12 +468,45 @@ def run_task(task, context, completed_task_queue):
     else:
         task.result = TaskResultSuccess()
 
-    completed_task_queue.put(task)
-
+    _complete_task(task, completed_task_queue)
 
-def handle_task(task, context, completed_task_queue):
-    _debug("handle task %s" % task)
 
+def _get_abandoned_task_result(task, context, stacktrace):
+    try:
+        task.abandon(context, stacktrace)
+    except TaskFailure as excp:
+        return TaskResultFailure(str(excp))
+    except Exception:
+        return TaskResultException(serialize_current_exception())
+    else:
+        return TaskResultFailure("task %s has timed out" % task)
+
+
+def abandon_task(task, context, stacktrace):
+    """
+    Abandon a task that has timed out while being run by a thread, return False if the task has been
+    completed in the meantime (in that case, the task is not abandoned).
+    """
+    with _abandon_lock:
+        if task.result is not None:
+            return False
+        task.abandoned = True
+    _debug("abandon task %s" % task)
+    task.timing.end_time = time.time()
+    task.result = _get_abandoned_task_result(task, context, stacktrace)
+    return True
+
+
+def _get_thread_stacktrace(thread_id):
+    frame = sys._current_frames().get(thread_id)
+    return "".join(traceback.format_stack(frame)) if frame else None
+
+
+def skip_task_if_needed(task, context, completed_task_queue):
+    """
+    Skip the task if one of its dependencies did not succeed or on external trigger,
+    return whether the task has been skipped or not.
+    """
     # skip task on dependency failure if any
     for dep_task in task.get_on_success_dependencies():
         if not isinstance(dep_task.result, TaskResultSuccess):
@@ -104,21 +515,35 @@ def handle_task(task, context, completed_task_queue):
             else:
                 reason = None
             skip_task(task, context, completed_task_queue, reason)
-            return
+            return True
 
     # skip task on external trigger if any
     skip_reason = context.is_task_to_be_skipped(task)
     if skip_reason:
         skip_task(task, context, completed_task_queue, reason=skip_reason)
-        return
+        return True
 
-    # run task when all conditions are met
-    run_task(task, context, completed_task_queue)
+    return False
 
 
-def schedule_tasks_to_be_run(tasks, context, pool, completed_tasks_queue):
-    for task in tasks:
-        pool.apply_async(handle_task, args=(task, context, completed_tasks_queue))
+def handle_task(task, context, completed_task_queue, watchdog=None):
+    _debug("handle task %s" % task)
+    _start_task(task)
+
+    if not skip_task_if_needed(task, context, completed_task_queue):
+        # run task when all conditions are met
+        if watchdog:
+            watchdog.bind_current_thread(task)
+        run_task(task, context, completed_task_queue)
+
+
+async def handle_task_async(task, context, completed_task_queue):
+    _debug("handle async task %s" % task)
+    _start_task(task)
+
+    if not skip_task_if_needed(task, context, completed_task_queue):
+        # run task when all conditions are met
+        await run_task_async(task, context, completed_task_queue)
 
 
 def skip_task(task, context, completed_task_queue, reason=""):
@@ -130,54 +555,99 @@ def skip_task(task, context, completed_task_queue, reason=""):
     else:
         task.result = TaskResultSkipped(reason)
 
-    completed_task_queue.put(task)
+    _complete_task(task, completed_task_queue)
 
 
-def skip_all_tasks(tasks, remaining_tasks, completed_tasks, context, pool, completed_tasks_queue, reason):
-    # schedule all tasks to be skipped...
+def skip_all_tasks(scheduler, nb_running_tasks, context, pool, completed_tasks_queue, reason):
+    # schedule all remaining tasks to be skipped...
+    remaining_tasks = scheduler.pop_remaining_tasks()
     for task in remaining_tasks:
         pool.apply_async(skip_task, args=(task, context, completed_tasks_queue, reason))
 
-    # ... and wait for their completion
-    while len(completed_tasks) != len(tasks):
-        completed_task = completed_tasks_queue.get()
-        completed_tasks.add(completed_task)
+    # ... and wait for their completion (alongside the completion of the already running tasks),
+    # NB: the queue may also hold the wake-ups of the watchdog
+    nb_tasks_to_complete = len(remaining_tasks) + nb_running_tasks
+    while nb_tasks_to_complete > 0:
+        if completed_tasks_queue.get() is not None:
+            nb_tasks_to_complete -= 1
+
+
+def _wait_for_completed_tasks(completed_tasks_queue, context, pool, watchdog):
+    while True:
+        try:
+            task = completed_tasks_queue.get(timeout=watchdog.get_delay_before_next_deadline())
+        except queue.Empty:
+            abandoned_tasks = []
+            for task, thread_id in watchdog.pop_timed_out_tasks():
+                if abandon_task(task, context, _get_thread_stacktrace(thread_id)):
+                    pool.replace_worker(thread_id)
+                    abandoned_tasks.append(task)
+            if abandoned_tasks:
+                return abandoned_tasks
+        else:
+            # None is a wake-up of the watchdog, a new deadline has to be taken into account
+            if task is not None:
+                watchdog.unwatch(task)
+                return [task]
 
 
-def run_tasks(tasks, context, nb_threads=1):
-    for task in tasks:
-        check_task_dependencies(task)
+def run_tasks(tasks, context, nb_threads=1, async_concurrency=0):
+    """
+    Run the tasks using ``nb_threads`` threads. If ``async_concurrency`` is set, the async tasks
+    (see :py:meth:`BaseTask.is_async`) are run on an event loop, up to ``async_concurrency`` at once,
+    otherwise they are run by the threads like any other task.
 
-    remaining_tasks = list(tasks)
-    completed_tasks = set()
+    A task still running after its timeout (see :py:meth:`BaseTask.get_timeout`) is abandoned: it is handled
+    as a failed task and the thread running it is replaced by a new one.
+    """
+    check_tasks_dependencies(tasks)
 
-    pool = Pool(nb_threads)
-    completed_tasks_queue = Queue()
+    scheduler = TaskScheduler(tasks, is_async_task=(lambda t: t.is_async()) if async_concurrency else None)
+    nb_completed_tasks = 0
+    nb_running_tasks = 0
+    running_async_tasks = set()
 
-    try:
-        schedule_tasks_to_be_run(
-            pop_runnable_tasks(remaining_tasks, completed_tasks, nb_threads),
-            context, pool, completed_tasks_queue
-        )
+    pool = _ThreadPool(nb_threads)
+    context._pool = pool
+    completed_tasks_queue = queue.Queue()
+    watchdog = _Watchdog(wakeup=lambda: completed_tasks_queue.put(None))
 
-        while len(completed_tasks) != len(tasks):
-            # wait for one task to complete
-            completed_task = completed_tasks_queue.get()
-            completed_tasks.add(completed_task)
-
-            # schedule tasks to be run waiting for task success or simple completion
-            tasks_to_be_run = pop_runnable_tasks(remaining_tasks, completed_tasks, nb_threads)
-            schedule_tasks_to_be_run(tasks_to_be_run, context, pool, completed_tasks_queue)
+    try:
+        while nb_completed_tasks != len(tasks):
+            # schedule tasks to be run as long as there are ready tasks and available threads
+            for task in scheduler.pop_ready_tasks(nb_threads - (nb_running_tasks - len(running_async_tasks))):
+                timeout = task.get_timeout(context)
+                if timeout is not None:
+                    watchdog.watch(task, timeout)
+                task.timing.dispatch_time = time.time()
+                pool.apply_async(handle_task, args=(task, context, completed_tasks_queue, watchdog))
+                nb_running_tasks += 1
+
+            # same thing for async tasks on the event loop
+            for task in scheduler.pop_ready_tasks(async_concurrency - len(running_async_tasks), async_tasks=True):
+                task.timing.dispatch_time = time.time()
+                get_event_loop_thread().submit(handle_task_async(task, context, completed_tasks_queue))
+                running_async_tasks.add(task)
+                nb_running_tasks += 1
+
+            # wait for one task to complete (or time out), it releases the tasks waiting for its success
+            # or simple completion
+            for completed_task in _wait_for_completed_tasks(completed_tasks_queue, context, pool, watchdog):
+                nb_running_tasks -= 1
+                nb_completed_tasks += 1
+                running_async_tasks.discard(completed_task)
+                scheduler.mark_task_as_completed(completed_task)
 
     except KeyboardInterrupt:
         context.enable_task_abort()
         skip_all_tasks(
-            tasks, remaining_tasks, completed_tasks, context, pool, completed_tasks_queue,
+            scheduler, nb_running_tasks, context, pool, completed_tasks_queue,
             _KEYBOARD_INTERRUPT_ERROR_MESSAGE
         )
 
     finally:
         pool.close()
+        context._pool = None
 
     exceptions = [task.result.stacktrace for task in tasks if isinstance(task.result, TaskResultException)]
     if exceptions:
@@ -186,10 +656,34 @@ def run_tasks(tasks, context, nb_threads=1):
         )
 
 
-def check_task_dependencies(task, task_path=()):
-    for task_in_path in task_path:
-        if task_in_path in task.get_all_dependencies():
-            raise AssertionError("Task %s has a circular dependency on task %s" % (task, task_in_path))
-
-    for dependency in task.get_all_dependencies():
-        check_task_dependencies(dependency, task_path=(task,) + task_path)
+_VISITING = 1
+_VISITED = 2
+
+
+def check_tasks_dependencies(tasks):
+    """
+    Check that there is no circular dependency between the tasks (and the tasks they depend on). The dependency
+    graph is walked depth-first (iteratively) visiting each task only once, the first cycle found is reported
+    with all the tasks it goes through.
+    """
+    states = {}
+    for root_task in tasks:
+        if root_task in states:
+            continue
+        states[root_task] = _VISITING
+        task_path = [root_task]
+        dependency_iters = [iter(root_task.get_all_dependencies())]
+        while dependency_iters:
+            dependency = next(dependency_iters[-1], None)
+            if dependency is None:
+                dependency_iters.pop()
+                states[task_path.pop()] = _VISITED
+            elif dependency not in states:
+                states[dependency] = _VISITING
+                task_path.append(dependency)
+                dependency_iters.append(iter(dependency.get_all_dependencies()))
+            elif states[dependency] == _VISITING:
+                cycle = task_path[task_path.index(dependency):] + [dependency]
+                raise AssertionError(
+                    "Task %s has a circular dependency: %s" % (dependency, " -> ".join(map(str, cycle)))
+                )
@@ -8,7 +8,7 @@ from __future__ import annotations
 
 import copy
 
-from typing import Union, Tuple, List, Dict, Sequence, TypeVar, Iterator, Iterable
+from typing import Any, Union, Tuple, List, Dict, Sequence, TypeVar, Iterator, Iterable, Callable
 
 from lemoncheesecake.helpers.orderedset import OrderedSet
 
@@ -23,9 +23,11 @@ class BaseTreeNode:
     """
 
     def __init__(self, name, description):
-        self.parent_suite = None
-        #: name
-        self.name = name
+        self._parent_suite = None
+        self._name = name
+        # the locations of the node (see ReportLocation) by location type, they are computed once
+        # and reset whenever the node (or one of its ancestors) is renamed or moved
+        self.cached_locations = {}
         #: description
         self.description = description
         #: tags, as a list
@@ -35,6 +37,31 @@ class BaseTreeNode:
         #: links, as a list
         self.links = []
 
+    @property
+    def name(self) -> str:
+        """
+        name
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        self._reset_cached_locations()
+
+    @property
+    def parent_suite(self):
+        return self._parent_suite
+
+    @parent_suite.setter
+    def parent_suite(self, parent_suite):
+        self._parent_suite = parent_suite
+        self._reset_cached_locations()
+
+    def _reset_cached_locations(self):
+        # NB: the dict is replaced and not cleared, since it may be shared with a copy of the node (see pull_node)
+        self.cached_locations = {}
+
     @property
     def hierarchy(self):
         if self.parent_suite is not None:
@@ -123,6 +150,13 @@ class BaseSuite(BaseTreeNode):
         self._tests = {}
         self._suites = []
 
+    def _reset_cached_locations(self):
+        BaseTreeNode._reset_cached_locations(self)
+        for test in self._tests.values():
+            test._reset_cached_locations()
+        for suite in self._suites:
+            suite._reset_cached_locations()
+
     def add_test(self, test):
         """
         Add test to the suite.
@@ -189,6 +223,38 @@ def filter_suites(suites, test_filter):
 S = TypeVar("S", bound=BaseSuite)
 
 
+def sort_tests(suites: Sequence[S], key: Callable[[T], Any]) -> List[S]:
+    """
+    Reorder (in place) the tests and sub suites according to ``key`` (a function taking a test), a suite being
+    ordered according to the smallest key of its tests. The original order is kept for equal keys.
+    The reordered suites are returned.
+    """
+    def get_suite_key(suite_key):
+        # suites without any test come last
+        return suite_key is None, suite_key
+
+    def sort_suite(suite):
+        suite_keys = {sub_suite: sort_suite(sub_suite) for sub_suite in suite._suites}
+        suite._suites.sort(key=lambda s: get_suite_key(suite_keys[s]))
+        test_keys = {test: key(test) for test in suite._tests.values()}
+        tests = sorted(suite._tests.values(), key=test_keys.get)
+        suite._tests = {test.name: test for test in tests}
+        return min(
+            [test_keys[test] for test in tests] + [k for k in suite_keys.values() if k is not None], default=None
+        )
+
+    suite_keys = {suite: sort_suite(suite) for suite in suites}
+    return sorted(suites, key=lambda s: get_suite_key(suite_keys[s]))
+
+
+def prioritize_tests(suites: Sequence[S], is_prioritized: Callable[[T], bool]) -> List[S]:
+    """
+    Reorder (in place) the tests and sub suites so that the prioritized tests, and the suites containing
+    such tests, come first. The original order is kept otherwise. The reordered suites are returned.
+    """
+    return sort_tests(suites, lambda test: not is_prioritized(test))
+
+
 def flatten_suites(suites: Iterable[S]) -> Iterator[S]:
     for suite in suites:
         yield suite
@@ -428,6 +428,25 @@ def assert_suite_data(actual, expected):
     assert_hook_data(actual.suite_teardown, expected.suite_teardown)
 
 
+def _assert_optional_time(actual, expected):
+    if expected is None:
+        assert actual is None
+    else:
+        assert_time(actual, expected)
+
+
+def assert_task_runs(actual, expected):
+    assert len(actual) == len(expected)
+    for actual_task_run, expected_task_run in zip(actual, expected):
+        assert actual_task_run.name == expected_task_run.name
+        assert actual_task_run.dependencies == expected_task_run.dependencies
+        assert actual_task_run.worker == expected_task_run.worker
+        _assert_optional_time(actual_task_run.ready_time, expected_task_run.ready_time)
+        _assert_optional_time(actual_task_run.dispatch_time, expected_task_run.dispatch_time)
+        _assert_optional_time(actual_task_run.start_time, expected_task_run.start_time)
+        _assert_optional_time(actual_task_run.end_time, expected_task_run.end_time)
+
+
 def assert_report(actual, expected, is_persisted=True):
     assert actual.title == expected.title
     assert actual.info == expected.info
@@ -450,6 +469,8 @@ def assert_report(actual, expected, is_persisted=True):
 
     assert_hook_data(actual.test_session_teardown, expected.test_session_teardown)
 
+    assert_task_runs(actual.task_runs, expected.task_runs)
+
 
 def assert_steps_data(steps):
     for step in steps:
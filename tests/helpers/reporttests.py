@@ -14,7 +14,7 @@ import pytest
 
 import lemoncheesecake.api as lcc
 from lemoncheesecake.matching import *
-from lemoncheesecake.reporting import Report
+from lemoncheesecake.reporting import Report, TaskRun
 from lemoncheesecake.reporting.savingstrategy import make_report_saving_strategy
 
 from helpers.runner import run_suite_classes
@@ -475,5 +475,20 @@ class ReportSerializationTests(ReportingSessionTests):
 
         self.do_test_report_serialization(report)
 
+    def test_task_runs(self):
+        report = Report()
+        report.start_time = time.time()
+        report.end_time = report.start_time
+        report.saving_time = report.start_time
+        ts = report.start_time
+        report.task_runs = [
+            TaskRun("test session setup", [], "worker-1", ts, ts + 0.1, ts + 0.2, ts + 1.0),
+            TaskRun("test suite.test_1", [0], "worker-1", ts + 1.0, ts + 1.0, ts + 1.1, ts + 2.0),
+            TaskRun("test suite.test_2", [0], "worker-2", ts + 1.0, ts + 1.0, ts + 1.2, ts + 2.5),
+            TaskRun("test suite.test_3", [1, 2], None, ts + 2.5, None, None, None),
+        ]
+
+        self.do_test_report_serialization(report)
+
     def test_report_in_progress(self, report_in_progress):
         self.do_test_report_serialization(report_in_progress)
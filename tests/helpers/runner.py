@@ -94,7 +94,9 @@ def build_fixture_registry(*funcs):
 
 
 def run_suites(suites, fixtures=None, backends=None, tmpdir=None, force_disabled=False, stop_on_failure=False,
-               report_saving_strategy=None, nb_threads=1):
+               report_saving_strategy=None, nb_threads=1, worker_type="thread", durations=None,
+               async_concurrency=1, result_cache=None, batch_size=1,
+               test_timeout=None):
     if fixtures is None:
         fixture_registry = FixtureRegistry()
     else:
@@ -115,7 +117,9 @@ def run_suites(suites, fixtures=None, backends=None, tmpdir=None, force_disabled
         )
         runner.run_suites(
             suites, fixture_registry, session,
-            force_disabled=force_disabled, stop_on_failure=stop_on_failure, nb_threads=nb_threads
+            force_disabled=force_disabled, stop_on_failure=stop_on_failure, nb_threads=nb_threads,
+            worker_type=worker_type, durations=durations, async_concurrency=async_concurrency,
+            result_cache=result_cache, batch_size=batch_size, test_timeout=test_timeout
         )
     else:
         report_dir = tempfile.mkdtemp()
@@ -125,7 +129,9 @@ def run_suites(suites, fixtures=None, backends=None, tmpdir=None, force_disabled
         try:
             runner.run_suites(
                 suites, fixture_registry, session,
-                force_disabled=force_disabled, stop_on_failure=stop_on_failure, nb_threads=nb_threads
+                force_disabled=force_disabled, stop_on_failure=stop_on_failure, nb_threads=nb_threads,
+                worker_type=worker_type, durations=durations, async_concurrency=async_concurrency,
+                result_cache=result_cache, batch_size=batch_size, test_timeout=test_timeout
             )
         finally:
             shutil.rmtree(report_dir)
@@ -136,31 +142,43 @@ def run_suites(suites, fixtures=None, backends=None, tmpdir=None, force_disabled
 
 
 def run_suite_classes(suite_classes, fixtures=None, backends=None, tmpdir=None,
-                      force_disabled=False, stop_on_failure=False, report_saving_strategy=None, nb_threads=1):
+                      force_disabled=False, stop_on_failure=False, report_saving_strategy=None, nb_threads=1,
+                      worker_type="thread", durations=None, async_concurrency=1, result_cache=None, batch_size=1,
+                      test_timeout=None):
     suites = load_suites_from_classes(suite_classes)
     return run_suites(
         suites, fixtures=fixtures, backends=backends, tmpdir=tmpdir,
         force_disabled=force_disabled, stop_on_failure=stop_on_failure,
-        report_saving_strategy=report_saving_strategy, nb_threads=nb_threads
+        report_saving_strategy=report_saving_strategy, nb_threads=nb_threads, worker_type=worker_type,
+        durations=durations, async_concurrency=async_concurrency, result_cache=result_cache,
+        batch_size=batch_size, test_timeout=test_timeout
     )
 
 
 def run_suite(suite, fixtures=None, backends=[], tmpdir=None, force_disabled=False, stop_on_failure=False,
-              report_saving_strategy=None, nb_threads=1):
+              report_saving_strategy=None, nb_threads=1, worker_type="thread", durations=None, async_concurrency=1,
+              result_cache=None, batch_size=1,
+              test_timeout=None):
     return run_suites(
         [suite], fixtures=fixtures, backends=backends, tmpdir=tmpdir,
         force_disabled=force_disabled, stop_on_failure=stop_on_failure,
-        report_saving_strategy=report_saving_strategy, nb_threads=nb_threads
+        report_saving_strategy=report_saving_strategy, nb_threads=nb_threads, worker_type=worker_type,
+        durations=durations, async_concurrency=async_concurrency, result_cache=result_cache,
+        batch_size=batch_size, test_timeout=test_timeout
     )
 
 
 def run_suite_class(suite_class, fixtures=None, backends=[], tmpdir=None,
-                    force_disabled=False, stop_on_failure=False, report_saving_strategy=None, nb_threads=1):
+                    force_disabled=False, stop_on_failure=False, report_saving_strategy=None, nb_threads=1,
+                    worker_type="thread", durations=None, async_concurrency=1, result_cache=None, batch_size=1,
+                    test_timeout=None):
     suite = load_suite_from_class(suite_class)
     return run_suite(
         suite, fixtures=fixtures, backends=backends, tmpdir=tmpdir,
         force_disabled=force_disabled, stop_on_failure=stop_on_failure,
-        report_saving_strategy=report_saving_strategy, nb_threads=nb_threads
+        report_saving_strategy=report_saving_strategy, nb_threads=nb_threads, worker_type=worker_type,
+        durations=durations, async_concurrency=async_concurrency, result_cache=result_cache,
+        batch_size=batch_size, test_timeout=test_timeout
     )
 
 
@@ -0,0 +1,269 @@
+import pytest
+
+import lemoncheesecake.api as lcc
+from lemoncheesecake.budget import parse_time_budget, get_test_priority, select_tests_within_budget, \
+    get_time_budget_suites
+from lemoncheesecake.suite import load_suites_from_classes, resolve_tests_dependencies
+from lemoncheesecake.history import Durations
+from lemoncheesecake.testtree import flatten_tests
+from lemoncheesecake.reporting import load_report
+from lemoncheesecake.exceptions import LemoncheesecakeException, UserError
+
+from helpers.runner import generate_project, run_main
+from helpers.cli import cmdout
+from helpers.utils import tmp_cwd
+
+
+def _select(suite_classes, budget, durations, nb_threads=1):
+    suites = load_suites_from_classes(suite_classes)
+    resolve_tests_dependencies(suites, suites)
+    tests, estimated_duration = select_tests_within_budget(suites, budget, nb_threads, durations)
+    return [test.path for test in tests], estimated_duration
+
+
+@pytest.mark.parametrize("time_budget,expected", (
+    ("90", 90), ("90s", 90), ("10m", 600), ("1h30m", 5400), ("1h", 3600), ("1.5m", 90), ("0.5s", 0.5)
+))
+def test_parse_time_budget(time_budget, expected):
+    assert parse_time_budget(time_budget) == expected
+
+
+@pytest.mark.parametrize("time_budget", ("", "foo", "10x", "m", "0s", "-1m"))
+def test_parse_time_budget_invalid(time_budget):
+    with pytest.raises(LemoncheesecakeException, match="Invalid time budget"):
+        parse_time_budget(time_budget)
+
+
+def test_get_test_priority():
+    @lcc.suite()
+    @lcc.prop("priority", "5")
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        @lcc.prop("priority", "2.5")
+        def test_2(self):
+            pass
+
+    test_1, test_2 = flatten_tests(load_suites_from_classes([suite]))
+    assert get_test_priority(test_1) == 5
+    assert get_test_priority(test_2) == 2.5
+
+
+def test_get_test_priority_invalid():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.prop("priority", "high")
+        def test(self):
+            pass
+
+    test = next(flatten_tests(load_suites_from_classes([suite])))
+    with pytest.raises(LemoncheesecakeException, match="Invalid priority"):
+        get_test_priority(test)
+
+
+def test_select_tests_within_budget():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+    durations = Durations({"suite.test_1": 5.0, "suite.test_2": 2.0, "suite.test_3": 3.0})
+    assert _select([suite], 6, durations) == (["suite.test_2", "suite.test_3"], 5.0)
+
+
+def test_select_tests_within_budget_using_priority():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.prop("priority", "10")
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+    durations = Durations({"suite.test_1": 5.0, "suite.test_2": 2.0, "suite.test_3": 3.0})
+    assert _select([suite], 6, durations) == (["suite.test_1"], 5.0)
+
+
+def test_select_tests_within_budget_using_threads():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+    durations = Durations({"suite.test_1": 5.0, "suite.test_2": 2.0, "suite.test_3": 3.0})
+    assert _select([suite], 5, durations, nb_threads=2) == (["suite.test_1", "suite.test_2", "suite.test_3"], 5.0)
+
+
+def test_select_tests_within_budget_with_dependencies():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        @lcc.depends_on("suite.test_1")
+        @lcc.prop("priority", "10")
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+    # test_2 cannot be run without test_1
+    durations = Durations({"suite.test_1": 4.0, "suite.test_2": 1.0, "suite.test_3": 1.0})
+    assert _select([suite], 3, durations) == (["suite.test_3"], 1.0)
+    assert _select([suite], 5, durations) == (["suite.test_1", "suite.test_2"], 5.0)
+
+
+def test_select_tests_within_budget_with_suite_setup():
+    @lcc.suite()
+    class suite_a:
+        def setup_suite(self):
+            pass
+
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    @lcc.suite()
+    class suite_b:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+    durations = Durations(
+        {"suite_a.test_1": 1.0, "suite_a.test_2": 1.0, "suite_b.test_1": 2.0},
+        suite_setups={"suite_a": 3.0}
+    )
+    # the suite setup is only counted once
+    assert _select([suite_a, suite_b], 7, durations) == (
+        ["suite_a.test_1", "suite_a.test_2", "suite_b.test_1"], 7.0
+    )
+    assert _select([suite_a, suite_b], 4, durations) == (["suite_b.test_1"], 2.0)
+
+
+def test_select_tests_within_budget_prefers_best_single_test():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        @lcc.prop("priority", "9")
+        def test_2(self):
+            pass
+
+    # test_1 has the best priority per second but leaves no room for test_2
+    durations = Durations({"suite.test_1": 1.0, "suite.test_2": 10.0})
+    assert _select([suite], 10, durations) == (["suite.test_2"], 10.0)
+
+
+def test_get_time_budget_suites():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    suites = load_suites_from_classes([suite])
+    durations = Durations({"suite.test_1": 5.0, "suite.test_2": 1.0})
+    selected_suites, dropped_tests, estimated_duration = get_time_budget_suites(suites, suites, 2, 1, durations)
+
+    assert [test.path for test in flatten_tests(selected_suites)] == ["suite.test_2"]
+    assert [test.path for test in dropped_tests] == ["suite.test_1"]
+    assert estimated_duration == 1.0
+
+
+def test_get_time_budget_suites_no_test_fits():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    suites = load_suites_from_classes([suite])
+    with pytest.raises(UserError, match="No test fits within the time budget"):
+        get_time_budget_suites(suites, suites, 1, 1, Durations({"suite.test": 2.0}))
+
+
+TEST_MODULE = """import time
+import lemoncheesecake.api as lcc
+
+@lcc.suite()
+class mysuite:
+    @lcc.test()
+    def mytest1(self):
+        time.sleep(0.5)
+
+    @lcc.test()
+    def mytest2(self):
+        pass
+
+"""
+
+
+@pytest.fixture()
+def project(tmp_cwd):
+    generate_project(tmp_cwd, "mysuite", TEST_MODULE)
+
+
+def test_run_time_budget(project, cmdout):
+    assert run_main(["run"]) == 0
+    assert run_main(["run", "--time-budget", "0.2s"]) == 0
+
+    cmdout.assert_substrs_anywhere(["1 test(s) dropped"])
+    cmdout.assert_substrs_anywhere(["  - mysuite.mytest1"])
+    report = load_report("report")
+    assert [test.path for test in report.all_tests()] == ["mysuite.mytest2"]
+
+
+def test_run_time_budget_without_previous_report(project, cmdout):
+    assert run_main(["run", "--time-budget", "0.2s"]) == 0
+
+    cmdout.assert_substrs_anywhere(["running all the tests"])
+    report = load_report("report")
+    assert len(list(report.all_tests())) == 2
+
+
+def test_run_time_budget_invalid(project):
+    assert "Invalid time budget" in run_main(["run", "--time-budget", "soon"])
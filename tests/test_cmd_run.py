@@ -7,11 +7,11 @@ import pytest
 from callee import Any, Matcher
 
 import lemoncheesecake.api as lcc
-from lemoncheesecake.project import Project
+from lemoncheesecake.project import Project, load_project
 from lemoncheesecake.suite import load_suite_from_class
 from lemoncheesecake.cli import build_cli_args
-from lemoncheesecake.cli.commands.run import run_suites_from_project
-from lemoncheesecake.reporting import savingstrategy
+from lemoncheesecake.cli.commands.run import run_suites_from_project, get_suites, get_durations, get_history
+from lemoncheesecake.reporting import savingstrategy, load_report
 from lemoncheesecake.exceptions import LemoncheesecakeException
 
 from helpers.runner import generate_project, run_main
@@ -101,6 +101,110 @@ def test_project_path(tmpdir, cmdout):
     assert_run_output(cmdout, "mysuite", successful_tests=["mytest2"], failed_tests=["mytest1"])
 
 
+def test_schedule_duration(project, cmdout):
+    assert run_main(["run"]) == 0
+    assert run_main(["run", "--schedule", "duration"]) == 0
+    assert_run_output(cmdout, "mysuite", successful_tests=["mytest2"], failed_tests=["mytest1"])
+
+
+def test_schedule_duration_without_previous_report(project, cmdout):
+    assert run_main(["run", "--schedule", "duration"]) == 0
+    assert_run_output(cmdout, "mysuite", successful_tests=["mytest2"], failed_tests=["mytest1"])
+
+
+def test_schedule_duration_with_invalid_previous_report(project, cmdout):
+    assert "Cannot load previous report" in \
+        run_main(["run", "--schedule", "duration", "--previous-report", "does_not_exist"])
+
+
+def test_last_failed(project):
+    assert run_main(["run"]) == 0
+    assert run_main(["run", "--last-failed"]) == 0
+
+    report = load_report("report")
+    assert [test.path for test in report.all_tests()] == ["mysuite.mytest1"]
+
+
+def test_last_failed_combined_with_filter(project):
+    assert run_main(["run"]) == 0
+    assert run_main(["run", "--last-failed", "mysuite.mytest2"]) == 0
+
+    # none of the selected tests failed, they are all run
+    report = load_report("report")
+    assert [test.path for test in report.all_tests()] == ["mysuite.mytest2"]
+
+
+def test_last_failed_without_previous_report(project, cmdout):
+    assert run_main(["run", "--last-failed"]) == 0
+    cmdout.assert_substrs_anywhere(["No previously failed tests"])
+    assert_run_output(cmdout, "mysuite", successful_tests=["mytest2"], failed_tests=["mytest1"])
+
+
+def test_failed_first(tmp_cwd, cmdout):
+    generate_project(tmp_cwd, "mysuite", """import lemoncheesecake.api as lcc
+
+@lcc.suite()
+class mysuite:
+    @lcc.test()
+    def mytest1(self):
+        pass
+
+    @lcc.test()
+    def mytest2(self):
+        lcc.log_error("failure")
+""")
+    assert run_main(["run"]) == 0
+    assert run_main(["run", "--failed-first"]) == 0
+
+    cmdout.assert_lines_match(r"KO\s+1 # mysuite.mytest2")
+
+
+def test_failed_first_with_schedule_duration(project):
+    assert "cannot be used along with" in run_main(["run", "--failed-first", "--schedule", "duration"])
+
+
+def test_schedule_failfast(tmp_cwd, cmdout):
+    generate_project(tmp_cwd, "mysuite", """import lemoncheesecake.api as lcc
+
+@lcc.suite()
+class mysuite:
+    @lcc.test()
+    def mytest1(self):
+        pass
+
+    @lcc.test()
+    def mytest2(self):
+        lcc.log_error("failure")
+""")
+    assert run_main(["run"]) == 0
+    assert run_main(["run", "--schedule", "failfast"]) == 0
+
+    cmdout.assert_lines_match(r"KO\s+1 # mysuite.mytest2")
+
+
+def test_schedule_failfast_without_previous_report(project, cmdout):
+    assert run_main(["run", "--schedule", "failfast"]) == 0
+    assert_run_output(cmdout, "mysuite", successful_tests=["mytest2"], failed_tests=["mytest1"])
+
+
+def test_schedule_failfast_invalid_history_depth(project):
+    assert "--history-depth must be" in run_main(["run", "--schedule", "failfast", "--history-depth", "0"])
+
+
+def test_get_suites_loads_suites_once(project):
+    assert run_main(["run"]) == 0
+    project = load_project()
+    cli_args = build_cli_args(["run", "--schedule", "failfast", "--shard", "1/2", "--time-budget", "1h"])
+
+    with patch.object(project, "load_suites", wraps=project.load_suites) as mock:
+        suites = get_suites(
+            cli_args, project, get_durations(cli_args, project), set(), get_history(cli_args, project)
+        )
+
+    assert len(suites) == 1
+    mock.assert_called_once_with()
+
+
 def test_cli_exit_error_on_failure_successful_suite(successful_project):
     assert run_main(["run", "--exit-error-on-failure"]) == 0
 
@@ -144,14 +248,15 @@ def test_run_suites_from_project_default():
     _test_run_suites_from_project(
         project, [],
         (ReportingBackendMatcher("json", "html", "console"),
-         osp.join(os.getcwd(), "report"), savingstrategy.save_at_each_failed_test_strategy, False, False, 1)
+         osp.join(os.getcwd(), "report"), savingstrategy.save_at_each_failed_test_strategy, False, False, 1,
+         "thread", None, None, 1, None, 1, None)
     )
 
 
 def test_run_suites_from_project_thread_cli_args():
     _test_run_suites_from_project(
         SampleProject(), ["--threads", "4"],
-        (Any(), Any(), Any(), Any(), Any(), 4)
+        (Any(), Any(), Any(), Any(), Any(), 4, Any(), Any(), Any(), Any(), Any(), Any(), Any())
     )
 
 
@@ -159,10 +264,17 @@ def test_run_suites_from_project_thread_env():
     with env_vars(LCC_THREADS="4"):
         _test_run_suites_from_project(
             SampleProject(), [],
-            (Any(), Any(), Any(), Any(), Any(), 4)
+            (Any(), Any(), Any(), Any(), Any(), 4, Any(), Any(), Any(), Any(), Any(), Any(), Any())
         )
 
 
+def test_run_suites_from_project_workers_cli_args():
+    _test_run_suites_from_project(
+        SampleProject(), ["--workers", "4", "--worker-type", "process"],
+        (Any(), Any(), Any(), Any(), Any(), 4, "process", Any(), Any(), Any(), Any(), Any(), Any())
+    )
+
+
 def test_run_suites_from_project_thread_cli_args_while_threaded_is_disabled():
     project = SampleProject()
     project.threaded = False
@@ -171,10 +283,62 @@ def test_run_suites_from_project_thread_cli_args_while_threaded_is_disabled():
         _test_run_suites_from_project(project, ["--threads", "4"], None)
 
 
+def test_run_suites_from_project_async_concurrency_cli_args():
+    _test_run_suites_from_project(
+        SampleProject(), ["--async-concurrency", "100"],
+        (Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), 100, Any(), Any(), Any())
+    )
+
+
+def test_run_suites_from_project_async_concurrency_cli_args_while_threaded_is_disabled():
+    project = SampleProject()
+    project.threaded = False
+
+    with pytest.raises(LemoncheesecakeException, match="does not support running tests concurrently"):
+        _test_run_suites_from_project(project, ["--async-concurrency", "100"], None)
+
+
+def test_run_suites_from_project_batch_size_cli_args():
+    _test_run_suites_from_project(
+        SampleProject(), ["--batch-size", "50"],
+        (Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), 50, Any())
+    )
+
+
+def test_run_suites_from_project_invalid_batch_size_cli_args():
+    with pytest.raises(LemoncheesecakeException, match="--batch-size"):
+        _test_run_suites_from_project(SampleProject(), ["--batch-size", "0"], None)
+
+
+def test_run_suites_from_project_test_timeout_cli_args():
+    _test_run_suites_from_project(
+        SampleProject(), ["--test-timeout", "1.5"],
+        (Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), 1.5)
+    )
+
+
+def test_run_suites_from_project_test_timeout_through_project():
+    project = SampleProject()
+    project.default_test_timeout = 10
+
+    _test_run_suites_from_project(
+        project, [],
+        (Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), 10)
+    )
+
+
+def test_run_suites_from_project_invalid_test_timeout_cli_args():
+    with pytest.raises(LemoncheesecakeException, match="timeout"):
+        _test_run_suites_from_project(SampleProject(), ["--test-timeout", "0"], None)
+
+
 def test_run_suites_from_project_saving_strategy_cli_args():
     _test_run_suites_from_project(
         SampleProject(), ["--save-report", "at_each_failed_test"],
-        (Any(), Any(), savingstrategy.save_at_each_failed_test_strategy, Any(), Any(), Any())
+        (
+            Any(), Any(), savingstrategy.save_at_each_failed_test_strategy,
+            Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any()
+        )
     )
 
 
@@ -182,14 +346,20 @@ def test_run_suites_from_project_saving_strategy_env():
     with env_vars(LCC_SAVE_REPORT="at_each_failed_test"):
         _test_run_suites_from_project(
             SampleProject(), [],
-            (Any(), Any(), savingstrategy.save_at_each_failed_test_strategy, Any(), Any(), Any())
+            (
+                Any(), Any(), savingstrategy.save_at_each_failed_test_strategy,
+                Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any()
+            )
         )
 
 
 def test_run_suites_from_project_reporting_backends_cli_args():
     _test_run_suites_from_project(
         SampleProject(), ["--reporting", "^console"],
-        (ReportingBackendMatcher("json", "html"), Any(), Any(), Any(), Any(), Any())
+        (
+            ReportingBackendMatcher("json", "html"),
+            Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any()
+        )
     )
 
 
@@ -197,7 +367,10 @@ def test_run_suites_from_project_reporting_backends_env():
     with env_vars(LCC_REPORTING="^console"):
         _test_run_suites_from_project(
             SampleProject(), [],
-            (ReportingBackendMatcher("json", "html"), Any(), Any(), Any(), Any(), Any())
+            (
+                ReportingBackendMatcher("json", "html"),
+                Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any()
+            )
         )
 
 
@@ -207,21 +380,24 @@ def test_run_suites_from_project_custom_attr_default_reporting_backend_names():
 
     _test_run_suites_from_project(
         project, [],
-        (ReportingBackendMatcher("json", "html"), Any(), Any(), Any(), Any(), Any())
+        (
+            ReportingBackendMatcher("json", "html"),
+            Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any()
+        )
     )
 
 
 def test_run_suites_from_project_force_disabled_set():
     _test_run_suites_from_project(
         SampleProject(), ["--force-disabled"],
-        (Any(), Any(), Any(), True, Any(), Any())
+        (Any(), Any(), Any(), True, Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any())
     )
 
 
 def test_run_suites_from_project_stop_on_failure_set():
     _test_run_suites_from_project(
         SampleProject(), ["--stop-on-failure"],
-        (Any(), Any(), Any(), Any(), True, Any())
+        (Any(), Any(), Any(), Any(), True, Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any())
     )
 
 
@@ -234,7 +410,7 @@ def test_run_suites_from_project_report_dir_through_project(tmpdir):
 
     _test_run_suites_from_project(
         MyProject(), [],
-        (Any(), report_dir, Any(), Any(), Any(), Any())
+        (Any(), report_dir, Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any())
     )
 
 
@@ -243,7 +419,7 @@ def test_run_suites_from_project_report_dir_cli_args(tmpdir):
 
     _test_run_suites_from_project(
         SampleProject(), ["--report-dir", report_dir],
-        (Any(), report_dir, Any(), Any(), Any(), Any())
+        (Any(), report_dir, Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any())
     )
 
 
@@ -253,5 +429,37 @@ def test_run_suites_from_project_report_dir_env(tmpdir):
     with env_vars(LCC_REPORT_DIR=report_dir):
         _test_run_suites_from_project(
             SampleProject(), [],
-            (Any(), report_dir, Any(), Any(), Any(), Any())
+            (Any(), report_dir, Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any(), Any())
         )
+
+
+def test_run_stop_on_failure_cancels_running_tests(tmp_cwd, cmdout):
+    generate_project(tmp_cwd, "mysuite", """import threading
+import lemoncheesecake.api as lcc
+
+test_2_started = threading.Event()
+test_1_failed = threading.Event()
+
+@lcc.suite()
+class mysuite:
+    @lcc.test()
+    def mytest1(self):
+        test_2_started.wait(5)
+        lcc.log_error("failure")
+        test_1_failed.set()
+
+    @lcc.test()
+    def mytest2(self):
+        test_2_started.set()
+        test_1_failed.wait(5)
+        lcc.log_info("still running")
+
+    @lcc.test()
+    def mytest3(self):
+        pass
+""")
+    assert run_main(["run", "--stop-on-failure", "--threads", "2"]) == 0
+
+    cmdout.assert_substrs_anywhere(["mysuite.mytest2 (cancelled)"])
+    cmdout.assert_substrs_anywhere(["Cancelled: 1"])
+    cmdout.assert_substrs_anywhere(["Skipped: 1"])
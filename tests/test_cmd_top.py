@@ -1,9 +1,10 @@
 import re
 
 from lemoncheesecake.cli import main
-from lemoncheesecake.cli.commands.top import TopSuites, TopTests, TopSteps
+from lemoncheesecake.cli.commands.top import TopSuites, TopTests, TopSteps, TopCriticalPath
 from lemoncheesecake.reporting.backends.json_ import save_report_into_file
 from lemoncheesecake.filter import ResultFilter, StepFilter
+from lemoncheesecake.reporting import TaskRun
 import lemoncheesecake.api as lcc
 
 from helpers.cli import cmdout
@@ -220,3 +221,58 @@ def test_top_steps_cmd_test_run_in_progress(report_in_progress_path, cmdout):
 
     cmdout.dump()
     cmdout.assert_substrs_anywhere(["step"])
+
+
+def _make_report_with_task_runs():
+    report = make_report()
+    report.task_runs = [
+        TaskRun("test session setup", [], "worker-1", 0.0, 0.0, 0.0, 1.0),
+        TaskRun("test suite.test_1", [0], "worker-1", 1.0, 1.0, 1.0, 2.0),
+        TaskRun("test suite.test_2", [0], "worker-2", 1.0, 1.0, 1.5, 4.0),
+        TaskRun("test session teardown", [1, 2], "worker-1", 4.0, 4.0, 4.0, 5.0),
+    ]
+    return report
+
+
+def test_get_critical_path():
+    report = _make_report_with_task_runs()
+
+    critical_path = TopCriticalPath.get_critical_path(report.task_runs)
+
+    assert [task_run.name for task_run in critical_path] == \
+        ["test session setup", "test suite.test_2", "test session teardown"]
+
+
+def test_get_top_critical_path():
+    top_critical_path = TopCriticalPath.get_top_critical_path(_make_report_with_task_runs())
+
+    assert top_critical_path[1] == ("test suite.test_2", "worker-2", "0.500s", "2.500s", "4.000s")
+
+
+def test_get_top_workers():
+    top_workers = TopCriticalPath.get_top_workers(_make_report_with_task_runs())
+
+    assert top_workers == [
+        ("worker-1", "3", "3.000s", "60%", "0.000s"),
+        ("worker-2", "1", "2.500s", "50%", "0.500s"),
+    ]
+
+
+def test_top_critical_path_cmd(tmpdir, cmdout):
+    report_path = tmpdir.join("report.json").strpath
+    save_report_into_file(_make_report_with_task_runs(), report_path)
+
+    assert main(["top-critical-path", report_path]) == 0
+
+    lines = cmdout.get_lines()
+    assert "test session setup" in lines[4]
+    cmdout.assert_substrs_anywhere(["worker-2"])
+
+
+def test_top_critical_path_cmd_without_task_runs(tmpdir, cmdout):
+    report_path = tmpdir.join("report.json").strpath
+    save_report_into_file(make_report(), report_path)
+
+    assert main(["top-critical-path", report_path]) == 0
+
+    cmdout.assert_substrs_anywhere(["Critical path: <none>"])
@@ -0,0 +1,199 @@
+import os
+import os.path as osp
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from lemoncheesecake.distributed import parse_address, get_authkey
+from lemoncheesecake.reporting import load_report
+from lemoncheesecake.reporting.report import CANCELLED_STATUS_DETAILS
+from lemoncheesecake.exceptions import LemoncheesecakeException, UserError
+
+from helpers.runner import generate_project, run_main
+from helpers.report import assert_test_statuses
+
+
+TEST_MODULE = """import os
+import lemoncheesecake.api as lcc
+from lemoncheesecake.matching import *
+
+@lcc.suite("My Suite")
+class mysuite:
+    def setup_suite(self, fixt):
+        lcc.log_info("suite setup")
+
+    @lcc.test("My Test 1")
+    def mytest1(self, fixt):
+        check_that("value", fixt, equal_to(42))
+        lcc.save_attachment_content("content", "file.txt")
+
+    @lcc.test("My Test 2")
+    def mytest2(self):
+        lcc.log_error("failure")
+
+    @lcc.test("My Test 3")
+    def mytest3(self):
+        lcc.log_info("pid %d" % os.getpid())
+"""
+
+FIXTURE_MODULE = """import lemoncheesecake.api as lcc
+
+@lcc.fixture(scope="session")
+def fixt():
+    return 42
+"""
+
+
+def _get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_worker(project_dir, address):
+    return subprocess.Popen(
+        [
+            sys.executable, "-c", "import sys; from lemoncheesecake.cli import main; sys.exit(main())",
+            "worker", "--connect", address, "--project", project_dir, "--timeout", "10"
+        ],
+        stdout=subprocess.DEVNULL
+    )
+
+
+@pytest.fixture()
+def project_dir(tmpdir):
+    generate_project(tmpdir.strpath, "mysuite", TEST_MODULE, FIXTURE_MODULE)
+    return tmpdir.strpath
+
+
+def test_parse_address():
+    assert parse_address("somehost:1234") == ("somehost", 1234)
+    assert parse_address(":1234") == ("localhost", 1234)
+
+
+def test_parse_address_invalid():
+    with pytest.raises(LemoncheesecakeException, match="Invalid address"):
+        parse_address("somehost")
+
+
+def test_get_authkey_default_on_loopback(monkeypatch):
+    monkeypatch.delenv("LCC_AUTHKEY", raising=False)
+    assert get_authkey(("localhost", 1234)) == b"lemoncheesecake"
+    assert get_authkey(("127.0.0.1", 1234)) == b"lemoncheesecake"
+
+
+def test_get_authkey_required_on_public_address(monkeypatch):
+    monkeypatch.delenv("LCC_AUTHKEY", raising=False)
+    with pytest.raises(UserError, match="LCC_AUTHKEY must be set"):
+        get_authkey(("0.0.0.0", 1234))
+
+
+def test_get_authkey_from_env(monkeypatch):
+    monkeypatch.setenv("LCC_AUTHKEY", "secret")
+    assert get_authkey(("0.0.0.0", 1234)) == b"secret"
+
+
+def test_run_with_coordinator_on_public_address_without_authkey(project_dir, monkeypatch):
+    monkeypatch.delenv("LCC_AUTHKEY", raising=False)
+    monkeypatch.chdir(project_dir)
+    assert "LCC_AUTHKEY must be set" in run_main(["run", "--coordinator", "--listen", "0.0.0.0:0"])
+
+
+def test_run_with_coordinator(project_dir):
+    address = "127.0.0.1:%d" % _get_free_port()
+    workers = [_start_worker(project_dir, address) for _ in range(2)]
+    try:
+        assert run_main(["run", "--project", project_dir, "--coordinator", "--listen", address, "--workers", "2"]) == 0
+    finally:
+        exit_codes = [worker.wait(timeout=10) for worker in workers]
+    assert exit_codes == [0, 0]
+
+    report = load_report(osp.join(project_dir, "report"))
+    assert_test_statuses(report, passed=["mysuite.mytest1", "mysuite.mytest3"], failed=["mysuite.mytest2"])
+
+    # the suite setup is run by the coordinator
+    assert report.get_suite("mysuite").suite_setup.get_steps()[0].get_logs()[0].message == "suite setup"
+
+    # the tests are run by the workers
+    test_3 = report.get_test("mysuite.mytest3")
+    assert test_3.get_steps()[0].get_logs()[0].message != "pid %d" % os.getpid()
+
+    # attachments are transferred to the coordinator
+    attachment = report.get_test("mysuite.mytest1").get_steps()[0].get_logs()[-1]
+    with open(osp.join(project_dir, "report", attachment.filename)) as fh:
+        assert fh.read() == "content"
+
+
+def test_run_with_coordinator_and_worker_type_process(project_dir):
+    assert "cannot be used" in run_main(
+        ["run", "--project", project_dir, "--coordinator", "--worker-type", "process"]
+    )
+
+
+def test_run_with_coordinator_worker_crash(tmpdir):
+    generate_project(tmpdir.strpath, "mysuite", """import os
+import lemoncheesecake.api as lcc
+
+@lcc.suite("My Suite")
+class mysuite:
+    @lcc.test("My Test 1")
+    def mytest1(self):
+        os._exit(42)
+
+    @lcc.test("My Test 2")
+    def mytest2(self):
+        pass
+""")
+    address = "127.0.0.1:%d" % _get_free_port()
+    workers = [_start_worker(tmpdir.strpath, address) for _ in range(2)]
+    try:
+        assert run_main(
+            ["run", "--project", tmpdir.strpath, "--coordinator", "--listen", address, "--workers", "2"]
+        ) == 0
+    finally:
+        for worker in workers:
+            worker.wait(timeout=10)
+
+    report = load_report(tmpdir.join("report").strpath)
+    assert_test_statuses(report, passed=["mysuite.mytest2"], failed=["mysuite.mytest1"])
+    test_1 = report.get_test("mysuite.mytest1")
+    assert "closed the connection unexpectedly" in test_1.get_steps()[-1].get_logs()[-1].message
+
+
+def test_run_with_coordinator_stop_on_failure_cancels_running_tests(tmpdir):
+    test_2_started = tmpdir.join("test_2_started").strpath
+    generate_project(tmpdir.strpath, "mysuite", """import os
+import time
+import lemoncheesecake.api as lcc
+
+@lcc.suite("My Suite")
+class mysuite:
+    @lcc.test("My Test 1")
+    def mytest1(self):
+        while not os.path.exists(%r):
+            time.sleep(0.01)
+        lcc.log_error("failure")
+
+    @lcc.test("My Test 2")
+    def mytest2(self):
+        open(%r, "w").close()
+        for _ in range(500):
+            lcc.log_info("still running")
+            time.sleep(0.01)
+""" % (test_2_started, test_2_started))
+    address = "127.0.0.1:%d" % _get_free_port()
+    workers = [_start_worker(tmpdir.strpath, address) for _ in range(2)]
+    try:
+        run_main([
+            "run", "--project", tmpdir.strpath, "--coordinator", "--listen", address, "--workers", "2",
+            "--stop-on-failure"
+        ])
+    finally:
+        for worker in workers:
+            worker.wait(timeout=10)
+
+    report = load_report(tmpdir.join("report").strpath)
+    assert_test_statuses(report, failed=["mysuite.mytest1", "mysuite.mytest2"])
+    assert report.get_test("mysuite.mytest2").status_details == CANCELLED_STATUS_DETAILS
@@ -1,4 +1,8 @@
-from lemoncheesecake.events import AsyncEventManager, SyncEventManager, Event
+import threading
+import time
+
+from lemoncheesecake import events
+from lemoncheesecake.events import AsyncEventManager, SyncEventManager, Event, RuntimeEvent
 
 
 class MyEvent(Event):
@@ -41,3 +45,223 @@ def test_unsubscribe():
     with eventmgr.handle_events():
         eventmgr.fire(MyEvent(42))
     assert not i_got_called
+
+
+class MyRuntimeEvent(RuntimeEvent):
+    def __init__(self, val):
+        super(MyRuntimeEvent, self).__init__(None)
+        self.val = val
+
+
+def _make_async_event_manager(handled_events):
+    def handler(event):
+        handled_events.append((event.__class__, event.val))
+    eventmgr = AsyncEventManager()
+    eventmgr.register_event(MyEvent, MyRuntimeEvent)
+    eventmgr.subscribe_to_event(MyEvent, handler)
+    eventmgr.subscribe_to_event(MyRuntimeEvent, handler)
+    return eventmgr
+
+
+def test_async_fire_keeps_order_of_runtime_events():
+    handled_events = []
+    eventmgr = _make_async_event_manager(handled_events)
+    with eventmgr.handle_events():
+        eventmgr.fire(MyRuntimeEvent(1))
+        eventmgr.fire(MyRuntimeEvent(2))
+        eventmgr.fire(MyEvent(3))
+        eventmgr.fire(MyRuntimeEvent(4))
+    assert handled_events == [(MyRuntimeEvent, 1), (MyRuntimeEvent, 2), (MyEvent, 3), (MyRuntimeEvent, 4)]
+
+
+def test_async_fire_orders_events_across_threads():
+    handled_events = []
+    eventmgr = _make_async_event_manager(handled_events)
+
+    def fire_events(val):
+        for i in range(100):
+            eventmgr.fire(MyRuntimeEvent((val, i)))
+
+    with eventmgr.handle_events():
+        thread = threading.Thread(target=fire_events, args=("thread",))
+        thread.start()
+        thread.join()
+        # the runtime events of the other thread have been fired before, they are handled before
+        eventmgr.fire(MyEvent("main"))
+
+    assert handled_events == [(MyRuntimeEvent, ("thread", i)) for i in range(100)] + [(MyEvent, "main")]
+
+
+def test_async_fire_flushes_runtime_events_when_idle():
+    handled_events = []
+    eventmgr = _make_async_event_manager(handled_events)
+    with eventmgr.handle_events():
+        eventmgr.fire(MyRuntimeEvent(1))
+        time.sleep(AsyncEventManager.IDLE_FLUSH_DELAY * 4)
+        assert handled_events == [(MyRuntimeEvent, 1)]
+
+
+def test_async_fire_stats():
+    eventmgr = _make_async_event_manager([])
+    with eventmgr.handle_events():
+        for i in range(10):
+            eventmgr.fire(MyRuntimeEvent(i))
+        eventmgr.fire(MyEvent(10))
+
+    assert eventmgr.stats.nb_events == 11
+    assert eventmgr.stats.events_per_second > 0
+    assert 0 <= eventmgr.stats.average_latency <= eventmgr.stats.max_latency
+
+
+class SlowListener:
+    dispatch_queue_size = 100
+
+    def __init__(self, delay=0.0, failure=None):
+        self.delay = delay
+        self.failure = failure
+        self.events = []
+
+    def on_my(self, event):
+        time.sleep(self.delay)
+        if self.failure:
+            raise self.failure
+        self.events.append(event.val)
+
+
+class FastListener:
+    def __init__(self):
+        self.events = []
+
+    def on_my(self, event):
+        self.events.append(event.val)
+
+
+def _make_event_manager_with_listeners(*listeners):
+    eventmgr = AsyncEventManager()
+    eventmgr.register_event(MyEvent, events.TestSessionEndEvent)
+    for listener in listeners:
+        eventmgr.add_listener(listener)
+    return eventmgr
+
+
+def test_async_fire_with_dispatched_listener():
+    slow_listener = SlowListener(delay=0.05)
+    fast_listener = FastListener()
+    eventmgr = _make_event_manager_with_listeners(slow_listener, fast_listener)
+
+    with eventmgr.handle_events():
+        for i in range(5):
+            eventmgr.fire(MyEvent(i))
+        # the fast listener is not held up by the slow listener
+        time.sleep(AsyncEventManager.IDLE_FLUSH_DELAY)
+        assert fast_listener.events == [0, 1, 2, 3, 4]
+        assert len(slow_listener.events) < 5
+
+    assert slow_listener.events == [0, 1, 2, 3, 4]
+
+
+def test_async_fire_with_dispatched_listener_flushed_on_test_session_end():
+    slow_listener = SlowListener(delay=0.01)
+    eventmgr = _make_event_manager_with_listeners(slow_listener)
+    handled_events = []
+    eventmgr.subscribe_to_event(events.TestSessionEndEvent, lambda event: handled_events.append(list(slow_listener.events)))
+
+    with eventmgr.handle_events():
+        for i in range(5):
+            eventmgr.fire(MyEvent(i))
+        eventmgr.fire(events.TestSessionEndEvent(None))
+
+    assert handled_events == [[0, 1, 2, 3, 4]]
+
+
+def test_async_fire_with_dispatched_listener_failure():
+    eventmgr = _make_event_manager_with_listeners(SlowListener(failure=ValueError("boom")))
+
+    with eventmgr.handle_events():
+        eventmgr.fire(MyEvent(1))
+
+    exception, _ = eventmgr.get_pending_failure()
+    assert isinstance(exception, ValueError)
+
+
+
+def test_async_fire_with_dispatched_listener_failure_is_pending_during_the_events_handling():
+    eventmgr = _make_event_manager_with_listeners(SlowListener(failure=ValueError("boom")))
+
+    with eventmgr.handle_events():
+        eventmgr.fire(MyEvent(1))
+        # the failure is known as soon as it happens (so that the test run is stopped), not at the end
+        deadline = time.time() + 5
+        while eventmgr.get_pending_failure()[0] is None and time.time() < deadline:
+            time.sleep(0.01)
+        exception, serialized_exception = eventmgr.get_pending_failure()
+        assert isinstance(exception, ValueError)
+        assert "boom" in serialized_exception
+
+def test_async_fire_with_dispatched_listener_falling_behind(capsys):
+    slow_listener = SlowListener(delay=0.01)
+    slow_listener.dispatch_queue_size = 4
+    eventmgr = _make_event_manager_with_listeners(slow_listener)
+
+    with eventmgr.handle_events():
+        for i in range(10):
+            eventmgr.fire(MyEvent(i))
+
+    assert slow_listener.events == list(range(10))
+    assert "SlowListener is falling behind" in capsys.readouterr().err
+
+
+class SelectiveListener:
+    subscribed_events = (MyEvent,)
+
+    def __init__(self):
+        self.events = []
+
+    def on_my(self, event):
+        self.events.append(event.val)
+
+    def on_my_runtime(self, event):
+        self.events.append(event.val)
+
+
+def test_add_listener_with_subscribed_events():
+    listener = SelectiveListener()
+    eventmgr = SyncEventManager()
+    eventmgr.register_event(MyEvent, MyRuntimeEvent)
+    eventmgr.add_listener(listener)
+
+    eventmgr.fire(MyEvent(1))
+    eventmgr.fire(MyRuntimeEvent(2))
+    assert listener.events == [1]
+
+
+def test_event_name():
+    assert events.LogEvent.get_name() == "log"
+    assert events.TestSessionSetupEndEvent.get_name() == "test_session_setup_end"
+    assert MyRuntimeEvent.get_name() == "my_runtime"
+
+
+def test_event_has_no_dict():
+    event = events.LogEvent(None, "step", 1, "info", "message")
+    assert not hasattr(event, "__dict__")
+
+
+def test_serialize_event():
+    event = events.CheckEvent("location", "step", 1, "description", True, "details", event_time=42)
+    eventmgr = SyncEventManager.load()
+    unserialized_event = events.unserialize_event(events.serialize_event(event), eventmgr, {}, {})
+    assert isinstance(unserialized_event, events.CheckEvent)
+    assert (
+        unserialized_event.location, unserialized_event.step, unserialized_event.thread_id,
+        unserialized_event.check_description, unserialized_event.check_is_successful,
+        unserialized_event.check_details, unserialized_event.time
+    ) == ("location", "step", 1, "description", True, "details", 42)
+
+
+def test_serialize_event_without_slots():
+    event = MyRuntimeEvent(42)
+    eventmgr = SyncEventManager()
+    eventmgr.register_event(MyRuntimeEvent)
+    unserialized_event = events.unserialize_event(events.serialize_event(event), eventmgr, {}, {})
+    assert unserialized_event.val == 42
+    assert unserialized_event.time == event.time
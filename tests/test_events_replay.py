@@ -19,6 +19,8 @@ class TestReplayEvents(ReportingSessionTests):
         event_manager = SyncEventManager.load()
         new_report = Report()
         new_report.nb_threads = nb_threads
+        # the scheduling data of the tasks are not conveyed by events
+        new_report.task_runs = report.task_runs
         writer = ReportWriter(new_report)
         event_manager.add_listener(writer)
 
@@ -1,7 +1,10 @@
+import threading
+
 import pytest
 
 import lemoncheesecake.api as lcc
-from lemoncheesecake.fixture import load_fixtures_from_func, FixtureRegistry, BuiltinFixture
+from lemoncheesecake.fixture import load_fixtures_from_func, FixtureRegistry, BuiltinFixture, \
+    _PerThreadFixtureResult
 from lemoncheesecake.suite import load_suite_from_class, load_suites_from_classes
 
 from lemoncheesecake import exceptions
@@ -32,6 +35,13 @@ def test_fixture_decorator_invalid_per_thread():
             pass
 
 
+def test_fixture_decorator_invalid_prewarm():
+    with pytest.raises(AssertionError, match=r"can only be prewarm"):
+        @lcc.fixture(scope="session", prewarm=True)
+        def myfixt():
+            pass
+
+
 def test_load_from_func():
     @lcc.fixture()
     def myfixture():
@@ -605,3 +615,41 @@ def test_get_fixtures_scheduled_for_test(fixture_registry_sample, suites_sample)
 
     scheduled = fixture_registry_sample.get_fixtures_scheduled_for_test(suites_sample[1].get_tests()[0], None)
     assert sorted(scheduled.get_fixture_names()) == ["fixt_for_test1", "fixt_for_test2"]
+
+
+def test_per_thread_fixture_prewarm_during_teardown():
+    setup_started = threading.Event()
+    teardown_done = threading.Event()
+    calls = []
+
+    def fixt():
+        setup_started.set()
+        teardown_done.wait(5)
+        calls.append("setup")
+        yield 1
+        calls.append("teardown")
+
+    result = _PerThreadFixtureResult("fixt", fixt, {})
+    thread = threading.Thread(target=result.prewarm)
+    thread.start()
+    setup_started.wait(5)
+    result.teardown()
+    teardown_done.set()
+    thread.join(5)
+
+    # the fixture set up while being torn down is torn down right away
+    assert calls == ["setup", "teardown"]
+
+
+def test_per_thread_fixture_prewarm_after_teardown():
+    calls = []
+
+    def fixt():
+        calls.append("setup")
+        return 1
+
+    result = _PerThreadFixtureResult("fixt", fixt, {})
+    result.teardown()
+    result.prewarm()
+
+    assert calls == []
@@ -0,0 +1,205 @@
+import os
+import os.path as osp
+
+import pytest
+
+import lemoncheesecake.api as lcc
+from lemoncheesecake.history import Durations, History, load_previous_report, load_history, get_report_dirs, \
+    get_history_index_path, order_tests_by_failure_rate
+from lemoncheesecake.reporting.backends.json_ import JsonBackend
+from lemoncheesecake.suite import load_suites_from_classes, resolve_tests_dependencies
+from lemoncheesecake.testtree import flatten_tests
+from lemoncheesecake.exceptions import LemoncheesecakeException
+
+from helpers.report import make_report, make_suite_result, make_test_result, make_result
+
+
+def _make_test_result(name, duration, status="passed"):
+    return make_test_result(name, status=status, start_time=0.0, end_time=duration)
+
+
+def test_durations_from_report():
+    report = make_report([
+        make_suite_result(
+            "suite",
+            tests=[
+                _make_test_result("test_1", 1.0),
+                _make_test_result("test_2", 2.0, status="failed"),
+                _make_test_result("test_3", 3.0, status="skipped")
+            ],
+            setup=make_result(start_time=0.0, end_time=4.0),
+            teardown=make_result(start_time=0.0, end_time=5.0)
+        )
+    ])
+
+    durations = Durations.from_report(report)
+
+    assert durations.tests == {"suite.test_1": 1.0, "suite.test_2": 2.0}
+    assert durations.get_suite_setup_duration("suite") == 4.0
+    assert durations.get_suite_teardown_duration("suite") == 5.0
+    assert durations.get_suite_setup_duration("other_suite") == 0
+
+
+def test_durations_get_test_duration():
+    durations = Durations({"suite_a.test_1": 1.0, "suite_a.test_2": 3.0, "suite_b.test_1": 10.0})
+
+    assert durations.get_test_duration("suite_a.test_1") == 1.0
+    assert durations.get_test_duration("suite_a.test_3") == 2.0
+    assert durations.get_test_duration("suite_c.test_1") == 3.0
+
+
+def test_durations_empty():
+    durations = Durations()
+
+    assert durations.is_empty()
+    assert durations.get_test_duration("suite.test") == 0
+
+
+def test_load_previous_report_default(tmpdir):
+    report = make_report([make_suite_result("suite", tests=[_make_test_result("test", 1.0)])])
+    tmpdir.mkdir("report")
+    JsonBackend().save_report(tmpdir.join("report", "report.json").strpath, report)
+
+    previous_report = load_previous_report(tmpdir.strpath)
+
+    assert previous_report.get_test("suite.test") is not None
+
+
+def test_load_previous_report_none(tmpdir):
+    assert load_previous_report(tmpdir.strpath) is None
+
+
+def test_load_previous_report_invalid_default_report(tmpdir):
+    tmpdir.mkdir("report")
+
+    assert load_previous_report(tmpdir.strpath) is None
+
+
+def test_load_previous_report_invalid_given_report(tmpdir):
+    with pytest.raises(LemoncheesecakeException, match="Cannot load previous report"):
+        load_previous_report(tmpdir.strpath, tmpdir.join("does_not_exist").strpath)
+
+
+def test_history():
+    history = History.from_test_results([
+        {"suite.test_1": ("failed", 1.0), "suite.test_2": ("passed", None)},
+        {"suite.test_1": ("passed", 2.0), "suite.test_2": ("passed", 3.0)},
+    ])
+
+    assert history.get_failure_rate("suite.test_1") == 0.5
+    assert history.get_failure_rate("suite.test_2") == 0
+    assert history.get_failure_rate("suite.test_3") == 0
+    assert history.get_durations().tests == {"suite.test_1": 1.0, "suite.test_2": 3.0}
+
+
+def _save_report(report_dir, tests, mtime):
+    os.makedirs(report_dir)
+    report = make_report([make_suite_result("suite", tests=tests)])
+    report_path = osp.join(report_dir, "report.json")
+    JsonBackend().save_report(report_path, report)
+    os.utime(report_path, (mtime, mtime))
+
+
+def test_get_report_dirs(tmpdir):
+    _save_report(tmpdir.join("reports", "report-2").strpath, [_make_test_result("test", 1.0)], 1000)
+    _save_report(tmpdir.join("reports", "report-1").strpath, [_make_test_result("test", 1.0)], 2000)
+    _save_report(tmpdir.join("report").strpath, [_make_test_result("test", 1.0)], 3000)
+
+    assert get_report_dirs(tmpdir.strpath) == [
+        osp.realpath(tmpdir.join(path).strpath) for path in ("report", "reports/report-1", "reports/report-2")
+    ]
+
+
+def test_load_history(tmpdir):
+    _save_report(tmpdir.join("reports", "report-2").strpath, [_make_test_result("test", 1.0, "failed")], 1000)
+    _save_report(tmpdir.join("reports", "report-1").strpath, [_make_test_result("test", 1.0, "failed")], 2000)
+    _save_report(tmpdir.join("report").strpath, [_make_test_result("test", 1.0, "passed")], 3000)
+
+    assert load_history(tmpdir.strpath).get_failure_rate("suite.test") == 2 / 3
+    assert load_history(tmpdir.strpath, depth=2).get_failure_rate("suite.test") == 0.5
+
+
+def test_load_history_uses_index(tmpdir, mocker):
+    _save_report(tmpdir.join("report").strpath, [_make_test_result("test", 1.0, "failed")], 1000)
+    load_history(tmpdir.strpath)
+    assert osp.exists(get_history_index_path(tmpdir.strpath))
+
+    # the report has not changed, it is not loaded again
+    load_report_mock = mocker.patch("lemoncheesecake.history.load_report")
+    assert load_history(tmpdir.strpath).get_failure_rate("suite.test") == 1
+    load_report_mock.assert_not_called()
+
+
+def test_load_history_with_new_report(tmpdir):
+    _save_report(tmpdir.join("reports", "report-1").strpath, [_make_test_result("test", 1.0, "failed")], 1000)
+    load_history(tmpdir.strpath)
+    _save_report(tmpdir.join("report").strpath, [_make_test_result("test", 1.0, "passed")], 2000)
+
+    assert load_history(tmpdir.strpath).get_failure_rate("suite.test") == 0.5
+
+
+def test_load_history_without_reports(tmpdir):
+    assert load_history(tmpdir.strpath).is_empty()
+
+
+def test_order_tests_by_failure_rate():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+        @lcc.test()
+        def test_4(self):
+            pass
+
+    history = History.from_test_results([
+        {"suite.test_1": ("passed", 1.0), "suite.test_2": ("passed", 2.0),
+         "suite.test_3": ("failed", 3.0), "suite.test_4": ("passed", 0.5)},
+        {"suite.test_1": ("passed", 1.0), "suite.test_2": ("failed", 2.0),
+         "suite.test_3": ("failed", 3.0), "suite.test_4": ("passed", 0.5)},
+    ])
+    suites = load_suites_from_classes([suite])
+    resolve_tests_dependencies(suites, suites)
+
+    suites = order_tests_by_failure_rate(suites, history)
+
+    assert [test.path for test in flatten_tests(suites)] == [
+        "suite.test_3", "suite.test_2", "suite.test_4", "suite.test_1"
+    ]
+
+
+def test_order_tests_by_failure_rate_with_dependency():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        @lcc.depends_on("suite.test_1")
+        def test_3(self):
+            pass
+
+    history = History.from_test_results([
+        {"suite.test_1": ("passed", 1.0), "suite.test_2": ("passed", 0.5), "suite.test_3": ("failed", 1.0)},
+    ])
+    suites = load_suites_from_classes([suite])
+    resolve_tests_dependencies(suites, suites)
+
+    suites = order_tests_by_failure_rate(suites, history)
+
+    # test_1 is not ordered after test_3 which depends on it
+    assert [test.path for test in flatten_tests(suites)] == ["suite.test_1", "suite.test_3", "suite.test_2"]
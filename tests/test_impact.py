@@ -0,0 +1,168 @@
+import os
+import os.path as osp
+import subprocess
+import sys
+
+import pytest
+
+from lemoncheesecake.helpers.moduleimport import import_module, get_module_dependencies
+from lemoncheesecake.impact import get_dependency_map_path
+from lemoncheesecake.reporting import load_report
+
+from helpers.runner import generate_project, run_main
+from helpers.cli import cmdout
+from helpers.utils import tmp_cwd
+
+
+def _write(path, content):
+    with open(path, "w") as fh:
+        fh.write(content)
+
+
+def test_get_module_dependencies(tmpdir):
+    tmpdir.join("helper_1.py").write("import helper_2\n")
+    tmpdir.join("helper_2.py").write("import os\n")
+    tmpdir.join("mod.py").write("import sys\nsys.path.insert(0, %r)\nfrom helper_1 import *\n" % tmpdir.strpath)
+
+    import_module(tmpdir.join("mod.py").strpath)
+
+    assert get_module_dependencies(tmpdir.join("mod.py").strpath, tmpdir.strpath) == {
+        tmpdir.join("helper_1.py").strpath, tmpdir.join("helper_2.py").strpath
+    }
+
+
+SUITE_USING_HELPER = """import lemoncheesecake.api as lcc
+import helper
+
+@lcc.suite()
+class suite_a:
+    @lcc.test()
+    def test(self):
+        pass
+"""
+
+SUITE_USING_FIXTURE = """import lemoncheesecake.api as lcc
+
+@lcc.suite()
+class suite_b:
+    @lcc.test()
+    def test(self, fixt):
+        pass
+"""
+
+SUITE_USING_NOTHING = """import lemoncheesecake.api as lcc
+
+@lcc.suite()
+class suite_c:
+    @lcc.test()
+    def test(self):
+        pass
+"""
+
+FIXTURES = """import lemoncheesecake.api as lcc
+
+@lcc.fixture()
+def fixt():
+    return 42
+"""
+
+PROJECT = """import os.path
+import sys
+from lemoncheesecake.project import Project
+
+project_dir = os.path.dirname(__file__)
+sys.path.insert(0, project_dir)
+
+project = Project(project_dir)
+"""
+
+
+@pytest.fixture()
+def project(tmp_cwd, monkeypatch):
+    # each test project has its own "helper" module
+    monkeypatch.delitem(sys.modules, "helper", raising=False)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    generate_project(tmp_cwd, "suite_a", SUITE_USING_HELPER, FIXTURES, PROJECT)
+    _write(osp.join(tmp_cwd, "suites", "suite_b.py"), SUITE_USING_FIXTURE)
+    _write(osp.join(tmp_cwd, "suites", "suite_c.py"), SUITE_USING_NOTHING)
+    _write(osp.join(tmp_cwd, "helper.py"), "VALUE = 1\n")
+    return tmp_cwd
+
+
+def _git(*args):
+    subprocess.run(
+        ["git", "-c", "user.name=lcc", "-c", "user.email=lcc@example.com"] + list(args),
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+
+@pytest.fixture()
+def git_project(project):
+    _write(".gitignore", "report/\n.lcc_cache/\n")
+    _git("init", "-q")
+    _git("add", ".")
+    _git("commit", "-q", "-m", "init")
+    return project
+
+
+def _get_run_tests():
+    return [test.path for test in load_report("report").all_tests()]
+
+
+def test_changed_since_revision_local_module(git_project):
+    _write("helper.py", "VALUE = 2\n")
+
+    assert run_main(["run", "--changed-since", "HEAD"]) == 0
+
+    assert _get_run_tests() == ["suite_a.test"]
+
+
+def test_changed_since_revision_fixture(git_project):
+    _write(osp.join("fixtures", "fixtures.py"), FIXTURES + "\n")
+
+    assert run_main(["run", "--changed-since", "HEAD"]) == 0
+
+    assert _get_run_tests() == ["suite_b.test"]
+
+
+def test_changed_since_revision_suite_file(git_project):
+    _write(osp.join("suites", "suite_c.py"), SUITE_USING_NOTHING + "\n")
+
+    assert run_main(["run", "--changed-since", "HEAD"]) == 0
+
+    assert _get_run_tests() == ["suite_c.test"]
+
+
+def test_changed_since_revision_project_file(git_project):
+    _write("project.py", PROJECT + "\n")
+
+    assert run_main(["run", "--changed-since", "HEAD"]) == 0
+
+    assert _get_run_tests() == ["suite_a.test", "suite_b.test", "suite_c.test"]
+
+
+def test_changed_since_revision_nothing_changed(git_project, cmdout):
+    assert run_main(["run", "--changed-since", "HEAD"]) == 0
+
+    cmdout.assert_substrs_anywhere(["No test is affected"])
+
+
+def test_changed_since_invalid_revision(git_project):
+    assert "Cannot get the changed files" in run_main(["run", "--changed-since", "does_not_exist"])
+
+
+def test_changed_since_snapshot(project):
+    snapshot = get_dependency_map_path(project)
+
+    # there is no snapshot yet, all tests are run
+    assert run_main(["run", "--changed-since", snapshot]) == 0
+    assert _get_run_tests() == ["suite_a.test", "suite_b.test", "suite_c.test"]
+    assert osp.exists(snapshot)
+
+    _write("helper.py", "VALUE = 2\n")
+    # make sure the modification time changes whatever the file system time resolution is
+    mtime = osp.getmtime("helper.py") + 10
+    os.utime("helper.py", (mtime, mtime))
+
+    assert run_main(["run", "--changed-since", snapshot]) == 0
+    assert _get_run_tests() == ["suite_a.test"]
@@ -1,11 +1,13 @@
 import time
+import pickle
 
 import pytest
 
 import lemoncheesecake.api as lcc
 from lemoncheesecake.reporting.report import format_time_as_iso8601, parse_iso8601_time, Step, \
-    check_report_message_template, \
+    check_report_message_template, ReportLocation, \
     TestResult as TstResult  # we change the name of TestResult so that pytest won't try to interpret as a test class
+from lemoncheesecake.suite import load_suite_from_class
 
 from helpers.report import assert_report_stats, make_check, make_step, make_test_result, make_result, \
     make_suite_result, make_log, make_report
@@ -284,3 +286,71 @@ def test_report_build_message_with_disabled_pct(report_sample):
 
 
 # TODO: report_stats lake tests
+
+
+def test_report_location_of_node_is_reused():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    suite = load_suite_from_class(suite)
+    test = suite.get_tests()[0]
+
+    location = ReportLocation.in_test(test)
+    assert location is ReportLocation.in_test(test)
+    assert location == ReportLocation.in_test("suite.test")
+    assert ReportLocation.in_suite_setup(suite) is ReportLocation.in_suite_setup(suite)
+    assert ReportLocation.in_suite_setup(suite) != ReportLocation.in_suite_teardown(suite)
+
+
+def test_report_location_of_node_after_rename_or_move():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    @lcc.suite()
+    class other_suite:
+        pass
+
+    suite = load_suite_from_class(suite)
+    other_suite = load_suite_from_class(other_suite)
+    test = suite.get_tests()[0]
+    assert ReportLocation.in_test(test) == ReportLocation.in_test("suite.test")
+
+    # renaming an ancestor
+    suite.name = "renamed_suite"
+    assert ReportLocation.in_test(test) == ReportLocation.in_test("renamed_suite.test")
+
+    # moving the node
+    other_suite.add_test(test)
+    assert ReportLocation.in_test(test) == ReportLocation.in_test("other_suite.test")
+
+    # renaming the node
+    test.name = "renamed_test"
+    assert ReportLocation.in_test(test) == ReportLocation.in_test("other_suite.renamed_test")
+
+
+def test_report_location_of_pulled_node():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    suite = load_suite_from_class(suite)
+    test = suite.get_tests()[0]
+    assert ReportLocation.in_test(test) == ReportLocation.in_test("suite.test")
+
+    assert ReportLocation.in_test(test.pull_node()) == ReportLocation.in_test("test")
+    assert ReportLocation.in_test(test) == ReportLocation.in_test("suite.test")
+
+
+def test_report_location_pickle():
+    location = ReportLocation.in_test("suite.test")
+    unpickled_location = pickle.loads(pickle.dumps(location))
+    assert unpickled_location == location
+    assert hash(unpickled_location) == hash(location)
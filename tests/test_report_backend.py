@@ -15,6 +15,8 @@ from lemoncheesecake.reporting.backends.json_ import \
 from lemoncheesecake.reporting.backend import get_reporting_backend_names, parse_reporting_backend_names_expression
 from lemoncheesecake.reporting.backends import JsonBackend
 from lemoncheesecake.reporting.savingstrategy import make_report_saving_strategy
+from lemoncheesecake.reporting.backend import FileReportSession
+from lemoncheesecake.events import SyncEventManager
 
 from helpers.report import assert_report
 from helpers.runner import run_suite_classes
@@ -219,3 +221,26 @@ def test_saving_strategy_every_N(do_test_saving_strategy):
 
     # this one is a very basic test because doing time-related test can be painful
     do_test_saving_strategy((suite,), "every_100s", call_count=1)
+
+
+@pytest.mark.parametrize("strategy_name,expected", (
+    ("at_end_of_tests", ["test_session_end"]),
+    ("at_each_suite", ["suite_end", "test_session_end"]),
+    ("at_each_failed_test", [
+        "suite_setup_end", "suite_teardown_end", "test_end", "test_session_end",
+        "test_session_setup_end", "test_session_teardown_end"
+    ]),
+    ("at_each_log", ["check", "log", "log_attachment", "log_url", "test_session_end"]),
+    ("every_100s", [
+        "check", "log", "log_attachment", "log_url", "suite_end", "suite_setup_end", "suite_teardown_end",
+        "test_end", "test_session_end", "test_session_setup_end", "test_session_teardown_end"
+    ]),
+))
+def test_file_report_session_subscribed_events(strategy_name, expected):
+    event_manager = SyncEventManager.load()
+    event_manager.add_listener(
+        FileReportSession("report.json", Report(), JsonBackend(), make_report_saving_strategy(strategy_name))
+    )
+    assert sorted(
+        event_name for event_name, event_type in event_manager._event_types.items() if event_type._handlers
+    ) == expected
@@ -0,0 +1,162 @@
+import os.path as osp
+
+import pytest
+
+from lemoncheesecake.reporting import load_report, Attachment
+from lemoncheesecake.reporting.backends.json_ import JsonBackend
+from lemoncheesecake.reporting.merge import merge_reports, merge_reports_into_dir
+from lemoncheesecake.exceptions import LemoncheesecakeException
+
+from helpers.report import make_report, make_suite_result, make_test_result, make_result, make_step, make_log
+from helpers.runner import run_main
+from helpers.cli import cmdout
+
+
+def _make_test_result(name, status="passed", start_time=1.0, end_time=2.0):
+    return make_test_result(name, status=status, start_time=start_time, end_time=end_time)
+
+
+def test_merge_reports_suites_by_path():
+    report_1 = make_report([
+        make_suite_result("suite_a", tests=[_make_test_result("test_1")]),
+        make_suite_result("suite_b", tests=[_make_test_result("test_1")])
+    ])
+    report_2 = make_report([
+        make_suite_result(
+            "suite_a", tests=[_make_test_result("test_2")],
+            sub_suites=[make_suite_result("sub_suite", tests=[_make_test_result("test_1")])]
+        ),
+        make_suite_result("suite_c", tests=[_make_test_result("test_1")])
+    ])
+
+    report = merge_reports([report_1, report_2])
+
+    assert [test.path for test in report.all_tests()] == [
+        "suite_a.test_1", "suite_a.test_2", "suite_a.sub_suite.test_1", "suite_b.test_1", "suite_c.test_1"
+    ]
+
+
+def test_merge_reports_same_test_takes_last():
+    report_1 = make_report([make_suite_result("suite", tests=[_make_test_result("test", status="failed")])])
+    report_2 = make_report([make_suite_result("suite", tests=[_make_test_result("test", status="passed")])])
+
+    report = merge_reports([report_1, report_2])
+
+    assert report.nb_tests == 1
+    assert report.get_test("suite.test").status == "passed"
+
+
+def test_merge_reports_times():
+    report_1 = make_report([make_suite_result("suite", tests=[_make_test_result("test_1", start_time=5.0, end_time=6.0)])])
+    report_2 = make_report([make_suite_result("suite", tests=[_make_test_result("test_2", start_time=1.0, end_time=3.0)])])
+    report_1.nb_threads = 2
+    report_2.nb_threads = 3
+
+    report = merge_reports([report_1, report_2])
+
+    assert report.start_time == 1.0
+    assert report.end_time == 6.0
+    assert report.get_suite("suite").start_time == 1.0
+    assert report.get_suite("suite").end_time == 6.0
+    assert report.nb_threads == 5
+
+
+def test_merge_reports_test_session_setups():
+    report_1 = make_report(
+        [make_suite_result("suite", tests=[_make_test_result("test_1")])],
+        setup=make_result(
+            steps=[make_step("step 1", logs=[make_log("info")])], status="passed", start_time=1.0, end_time=2.0
+        )
+    )
+    report_2 = make_report(
+        [make_suite_result("suite", tests=[_make_test_result("test_2")])],
+        setup=make_result(
+            steps=[make_step("step 2", logs=[make_log("error")])], status="failed", start_time=0.5, end_time=1.5
+        )
+    )
+
+    report = merge_reports([report_1, report_2])
+
+    setup = report.test_session_setup
+    assert [step.description for step in setup.get_steps()] == ["step 1", "step 2"]
+    assert setup.status == "failed"
+    assert setup.start_time == 0.5
+    assert setup.end_time == 2.0
+    assert not report.is_successful()
+
+
+def test_merge_reports_suite_teardowns():
+    report_1 = make_report([
+        make_suite_result(
+            "suite", tests=[_make_test_result("test_1")],
+            teardown=make_result(steps=[make_step("teardown 1")], status="passed", start_time=2.0, end_time=3.0)
+        )
+    ])
+    report_2 = make_report([
+        make_suite_result("suite", tests=[_make_test_result("test_2")])
+    ])
+    report_3 = make_report([
+        make_suite_result(
+            "suite", tests=[_make_test_result("test_3")],
+            teardown=make_result(steps=[make_step("teardown 3")], status="passed", start_time=2.0, end_time=4.0)
+        )
+    ])
+
+    report = merge_reports([report_1, report_2, report_3])
+
+    teardown = report.get_suite("suite").suite_teardown
+    assert [step.description for step in teardown.get_steps()] == ["teardown 1", "teardown 3"]
+    assert teardown.status == "passed"
+    assert teardown.end_time == 4.0
+
+
+def test_merge_reports_nothing():
+    with pytest.raises(LemoncheesecakeException, match="no report"):
+        merge_reports([])
+
+
+def _save_report_with_attachment(report_dir, test_name, attachment_content):
+    step = make_step("step")
+    step.add_log(Attachment("file", "attachments/0001_file.txt", False, 1.0))
+    report = make_report([
+        make_suite_result("suite", tests=[make_test_result(test_name, steps=[step], status="passed")])
+    ])
+    report_dir.mkdir("attachments").join("0001_file.txt").write(attachment_content)
+    JsonBackend().save_report(report_dir.join("report.js").strpath, report)
+
+
+def test_merge_reports_into_dir(tmpdir):
+    _save_report_with_attachment(tmpdir.mkdir("report_1"), "test_1", "content 1")
+    _save_report_with_attachment(tmpdir.mkdir("report_2"), "test_2", "content 2")
+    out_dir = tmpdir.join("merged").strpath
+
+    merge_reports_into_dir([tmpdir.join("report_1").strpath, tmpdir.join("report_2", "report.js").strpath], out_dir)
+
+    report = load_report(out_dir)
+    attachments = {}
+    for test in report.all_tests():
+        attachment = test.get_steps()[0].get_logs()[0]
+        with open(osp.join(out_dir, attachment.filename)) as fh:
+            attachments[test.path] = fh.read()
+    assert attachments == {"suite.test_1": "content 1", "suite.test_2": "content 2"}
+    assert osp.exists(osp.join(out_dir, "report.html"))
+
+
+def test_merge_reports_into_non_empty_dir(tmpdir):
+    _save_report_with_attachment(tmpdir.mkdir("report"), "test", "content")
+
+    with pytest.raises(LemoncheesecakeException, match="not empty"):
+        merge_reports_into_dir([tmpdir.join("report").strpath], tmpdir.strpath)
+
+
+def test_cmd_merge(tmpdir, cmdout):
+    _save_report_with_attachment(tmpdir.mkdir("report_1"), "test_1", "content 1")
+    _save_report_with_attachment(tmpdir.mkdir("report_2"), "test_2", "content 2")
+    out_dir = tmpdir.join("merged").strpath
+
+    assert run_main(
+        ["merge", "-o", out_dir, tmpdir.join("report_1").strpath, tmpdir.join("report_2").strpath]
+    ) == 0
+
+    cmdout.assert_substrs_anywhere(["Merged 2 report(s)"])
+    assert load_report(out_dir).nb_tests == 2
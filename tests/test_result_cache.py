@@ -0,0 +1,234 @@
+import os
+import os.path as osp
+
+import pytest
+
+import lemoncheesecake.api as lcc
+from lemoncheesecake.matching import check_that, equal_to
+from lemoncheesecake.resultcache import ResultCache, compute_test_key, CACHED_STATUS_DETAILS
+from lemoncheesecake.suite import load_suite_from_class
+from lemoncheesecake.reporting import load_report
+
+from helpers.runner import run_suite_class, build_fixture_registry, generate_project, run_main
+from helpers.cli import cmdout
+from helpers.utils import tmp_cwd
+
+
+@pytest.fixture()
+def result_cache(tmpdir):
+    return ResultCache(tmpdir.join("cache").strpath)
+
+
+def _get_test(suite_class, path):
+    return next(test for test in load_suite_from_class(suite_class).get_tests() if test.path == path)
+
+
+def test_compute_test_key_depends_on_parameters():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized(({"value": 1}, {"value": 2}))
+        def test(self, value):
+            pass
+
+    registry = build_fixture_registry()
+
+    assert compute_test_key(_get_test(suite, "suite.test_1"), registry) != \
+        compute_test_key(_get_test(suite, "suite.test_2"), registry)
+
+
+def test_compute_test_key_depends_on_fingerprint():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    test = _get_test(suite, "suite.test")
+    registry = build_fixture_registry()
+
+    assert compute_test_key(test, registry, "v1") == compute_test_key(test, registry, "v1")
+    assert compute_test_key(test, registry, "v1") != compute_test_key(test, registry, "v2")
+
+
+def test_compute_test_key_depends_on_fixtures():
+    @lcc.fixture()
+    def fixt(dep):
+        return dep
+
+    @lcc.fixture()
+    def dep():
+        return 1
+
+    @lcc.fixture(names=["dep"])
+    def other_dep():
+        return 2
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, fixt):
+            pass
+
+    test = _get_test(suite, "suite.test")
+
+    assert compute_test_key(test, build_fixture_registry(fixt, dep)) != \
+        compute_test_key(test, build_fixture_registry(fixt, other_dep))
+
+
+
+def test_compute_test_key_depends_on_suite_hooks():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    registry = build_fixture_registry()
+    key = compute_test_key(_get_test(suite, "suite.test"), registry)
+
+    for hook_name in "setup_test", "teardown_test", "setup_suite", "teardown_suite":
+        def hook(self, *args):
+            lcc.log_info(hook_name)
+
+        setattr(suite, hook_name, hook)
+        assert compute_test_key(_get_test(suite, "suite.test"), registry) != key
+        delattr(suite, hook_name)
+
+
+def test_passed_test_is_cached(result_cache):
+    calls = []
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            calls.append(1)
+            lcc.set_step("my step")
+            lcc.log_info("some info")
+            check_that("value", 1, equal_to(1))
+
+    run_suite_class(suite, result_cache=result_cache)
+    report = run_suite_class(suite, result_cache=result_cache)
+
+    assert len(calls) == 1
+    test = report.get_test("suite.test")
+    assert test.status == "passed"
+    assert test.status_details == CACHED_STATUS_DETAILS
+    step = test.get_steps()[0]
+    assert step.description == "my step"
+    assert [log.message for log in step.get_logs()[:1]] == ["some info"]
+    assert step.get_logs()[1].description == "Expect value to be equal to 1"
+
+
+def test_failed_test_is_not_cached(result_cache):
+    calls = []
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            calls.append(1)
+            lcc.log_error("something goes wrong")
+
+    run_suite_class(suite, result_cache=result_cache)
+    report = run_suite_class(suite, result_cache=result_cache)
+
+    assert len(calls) == 2
+    assert report.get_test("suite.test").status == "failed"
+
+
+def test_test_with_attachment_is_not_cached(result_cache):
+    calls = []
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            calls.append(1)
+            lcc.save_attachment_content("data", "file.txt")
+
+    run_suite_class(suite, result_cache=result_cache)
+    run_suite_class(suite, result_cache=result_cache)
+
+    assert len(calls) == 2
+
+
+def test_evict_least_recently_used(tmpdir):
+    cache_dir = tmpdir.mkdir("cache")
+    for i, name in enumerate(("a.json", "b.json", "c.json")):
+        path = cache_dir.join(name)
+        path.write("x" * 10)
+        os.utime(path.strpath, (1000 + i, 1000 + i))
+
+    ResultCache(cache_dir.strpath, max_size=20).evict()
+
+    assert sorted(os.listdir(cache_dir.strpath)) == ["b.json", "c.json"]
+
+
+def test_save_results_evicts_entries(tmpdir):
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            lcc.log_info("x" * 1000)
+
+        @lcc.test()
+        def test_2(self):
+            lcc.log_info("x" * 1000)
+
+    result_cache = ResultCache(tmpdir.join("cache").strpath, max_size=1500)
+    run_suite_class(suite, result_cache=result_cache)
+
+    assert len(os.listdir(tmpdir.join("cache").strpath)) == 1
+
+
+TEST_MODULE = """import lemoncheesecake.api as lcc
+
+@lcc.suite()
+class mysuite:
+    @lcc.test()
+    def mytest(self):
+        lcc.log_info("run")
+"""
+
+PROJECT = """from lemoncheesecake.project import Project
+
+class MyProject(Project):
+    def build_result_cache_fingerprint(self):
+        return "%s"
+
+project = MyProject()
+"""
+
+
+def test_run_with_result_cache(tmp_cwd, cmdout):
+    generate_project(tmp_cwd, "mysuite", TEST_MODULE)
+
+    assert run_main(["run", "--result-cache"]) == 0
+    assert load_report("report").get_test("mysuite.mytest").status_details is None
+    assert run_main(["run", "--result-cache"]) == 0
+    assert load_report("report").get_test("mysuite.mytest").status_details == CACHED_STATUS_DETAILS
+
+    cmdout.assert_substrs_anywhere(["mysuite.mytest (cached)"])
+    assert osp.isdir(osp.join(tmp_cwd, ".lcc_cache", "results"))
+
+
+def test_run_with_result_cache_and_fingerprint(tmp_cwd):
+    generate_project(tmp_cwd, "mysuite", TEST_MODULE, project_content=PROJECT % "v1")
+    assert run_main(["run", "--result-cache"]) == 0
+
+    with open("project.py", "w") as fh:
+        fh.write(PROJECT % "v2")
+    assert run_main(["run", "--result-cache"]) == 0
+
+    assert load_report("report").get_test("mysuite.mytest").status_details is None
+
+
+def test_run_without_result_cache(tmp_cwd):
+    generate_project(tmp_cwd, "mysuite", TEST_MODULE)
+
+    assert run_main(["run", "--result-cache"]) == 0
+    assert run_main(["run"]) == 0
+
+    assert load_report("report").get_test("mysuite.mytest").status_details is None
@@ -3,6 +3,8 @@ Created on Sep 30, 2016
 
 @author: nicolas
 '''
+import asyncio
+import os
 import threading
 import time
 from collections import defaultdict
@@ -13,9 +15,11 @@ from lemoncheesecake.exceptions import *
 import lemoncheesecake.api as lcc
 from lemoncheesecake.matching import *
 from lemoncheesecake.suite import add_test_into_suite
-from lemoncheesecake.reporting.report import ReportLocation
+from lemoncheesecake.reporting.report import ReportLocation, ReportStats, CANCELLED_STATUS_DETAILS
 from lemoncheesecake.reporting.backend import ReportingBackend, ReportingSession
-from lemoncheesecake.suite import load_suites_from_directory
+from lemoncheesecake.suite import load_suites_from_directory, load_suite_from_class
+from lemoncheesecake import runner
+from lemoncheesecake.history import Durations
 
 from helpers.runner import run_suite_class, run_suite_classes, run_suites, run_suite, build_suite_from_module
 from helpers.report import assert_test_statuses, assert_test_passed, assert_test_failed, assert_test_skipped, \
@@ -1185,6 +1189,105 @@ def test_run_with_fixture_per_thread_logging():
     assert report.test_session_teardown.get_steps()[0].get_logs()[0].message == "Fixture teardown"
 
 
+def test_run_with_fixture_per_thread_prewarm():
+    threads = set()
+
+    @lcc.fixture(scope="session", per_thread=True, prewarm=True)
+    def fixt():
+        threads.add(threading.current_thread().name)
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, fixt):
+            time.sleep(0.2)  # give the other threads the time to set the fixture up
+
+    report = run_suite_class(suite, fixtures=(fixt,), nb_threads=3)
+
+    # the fixture has been set up on all the threads despite being used by a single test
+    assert len(threads) == 3
+    assert get_last_test(report).status == "passed"
+
+    setup_index = [task_run.name for task_run in report.task_runs].index("test session setup")
+    per_thread_setups = [task_run for task_run in report.task_runs if task_run.name == "per-thread setup fixt"]
+    assert sorted(task_run.worker for task_run in per_thread_setups) == sorted(threads)
+    for task_run in per_thread_setups:
+        assert task_run.dependencies == [setup_index]
+        assert task_run.start_time <= task_run.end_time
+
+
+def test_run_with_fixture_per_thread_prewarm_suite_scope():
+    threads = set()
+
+    @lcc.fixture(scope="suite", per_thread=True, prewarm=True)
+    def fixt():
+        threads.add(threading.current_thread().name)
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, fixt):
+            time.sleep(0.2)
+
+    report = run_suite_class(suite, fixtures=(fixt,), nb_threads=2)
+
+    assert len(threads) == 2
+    setup_index = [task_run.name for task_run in report.task_runs].index("suite setup suite")
+    for task_run in report.task_runs:
+        if task_run.name == "per-thread setup fixt":
+            assert task_run.dependencies == [setup_index]
+
+
+def test_run_with_fixture_per_thread_prewarm_logging():
+    # a prewarm setup is not bound to a report location, a fixture logging during its setup is set up by the test
+    @lcc.fixture(scope="session", per_thread=True, prewarm=True)
+    def fixt():
+        lcc.log_info("Fixture setup")
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, fixt):
+            pass
+
+    report = run_suite_class(suite, fixtures=(fixt,))
+    test = get_last_test(report)
+
+    assert test.status == "passed"
+    assert test.get_steps()[0].get_logs()[-1].message == "Fixture setup"
+
+
+def test_run_with_fixture_per_thread_prewarm_error():
+    calls = []
+
+    @lcc.fixture(scope="session", per_thread=True, prewarm=True)
+    def fixt():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            raise Exception("this is an error")
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, fixt):
+            pass
+
+    report = run_suite_class(suite, fixtures=(fixt,))
+
+    # the fixture is set up again by the test
+    assert len(calls) == 2
+    test = get_last_test(report)
+    assert test.status == "passed"
+    # the prewarm error is reported as a warning by the next test run by the thread
+    log = test.get_steps()[0].get_logs()[0]
+    assert log.level == "warn"
+    assert "Cannot prewarm per-thread fixture 'fixt'" in log.message and "this is an error" in log.message
+
+
 def test_fixture_called_multiple_times():
     marker = []
 
@@ -1692,6 +1795,64 @@ def test_stop_on_failure_suite_teardown():
     assert_test_statuses(report, passed=["suite1.test1"], skipped=["suite2.test2"])
 
 
+def _make_suite_with_test_failing_while_another_is_running():
+    test_2_started = threading.Event()
+    test_1_failed = threading.Event()
+    calls = []
+
+    @lcc.suite()
+    class suite:
+        def teardown_test(self, test, status):
+            calls.append("teardown %s" % test.name)
+
+        @lcc.test()
+        def test_1(self):
+            test_2_started.wait(5)
+            lcc.log_error("something goes wrong")
+            test_1_failed.set()
+            lcc.log_info("still running")
+            calls.append("end test_1")
+
+        @lcc.test()
+        def test_2(self):
+            test_2_started.set()
+            test_1_failed.wait(5)
+            check_that("value", 1, equal_to(1))
+            calls.append("end test_2")
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+    return suite, calls
+
+
+def test_stop_on_failure_cancels_running_tests():
+    suite, calls = _make_suite_with_test_failing_while_another_is_running()
+
+    report = run_suite_class(suite, stop_on_failure=True, nb_threads=2)
+
+    assert_test_statuses(report, failed=["suite.test_1", "suite.test_2"], skipped=["suite.test_3"])
+    test_2 = report.get_test("suite.test_2")
+    assert test_2.status_details == CANCELLED_STATUS_DETAILS
+    assert "cancelled" in test_2.get_steps()[-1].get_logs()[-1].message
+    assert report.get_test("suite.test_1").status_details is None
+    # the failed test is not cancelled and the teardown of the cancelled test is run
+    assert sorted(calls) == ["end test_1", "teardown test_1", "teardown test_2"]
+    stats = ReportStats.from_report(report)
+    assert stats.tests_cancelled_nb == 1
+    assert stats.tests_nb_by_status["skipped"] == 1
+
+
+def test_no_cancellation_without_stop_on_failure():
+    suite, calls = _make_suite_with_test_failing_while_another_is_running()
+
+    report = run_suite_class(suite, nb_threads=2)
+
+    assert_test_statuses(report, failed=["suite.test_1"], passed=["suite.test_2", "suite.test_3"])
+    assert "end test_2" in calls
+
+
 def test_disabled_test():
     @lcc.suite("Suite")
     class mysuite:
@@ -1887,6 +2048,30 @@ def test_exception_in_reporting_backend(tmpdir):
         run_suite_class(mysuite, backends=[MyReportingBackend()], tmpdir=tmpdir)
 
 
+
+def test_exception_in_dispatched_reporting_backend(tmpdir):
+    class MyException(Exception):
+        pass
+
+    class MyReportingSession(ReportingSession):
+        dispatch_queue_size = 10
+
+        def on_log(self, event):
+            raise MyException()
+
+    class MyReportingBackend(ReportingBackend):
+        def create_reporting_session(self, report_dir, report, parallel, saving_strategy):
+            return MyReportingSession()
+
+    @lcc.suite("MySuite")
+    class mysuite(object):
+        @lcc.test("mytest")
+        def mytest(self):
+            lcc.log_info("some log")
+
+    with pytest.raises(MyException):
+        run_suite_class(mysuite, backends=[MyReportingBackend()], tmpdir=tmpdir)
+
 # this bug was provoke a freeze and was introduced in 0.21.0 and fixed in 0.22.3
 def test_bug_in_task_handling():
     @lcc.suite("suite")
@@ -2008,3 +2193,886 @@ def test_depends_on_failed_and_subsuite():
     assert_test_statuses(report, failed=["suite1.test1"], skipped=["suite1.suite2.test2"])
 
 
+
+
+def test_run_in_worker_processes():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            lcc.log_info("pid %d" % os.getpid())
+
+        @lcc.test()
+        def test_2(self):
+            check_that("value", 1, equal_to(2))
+
+        @lcc.test()
+        def test_3(self):
+            lcc.save_attachment_content("foo", "foo.txt")
+
+    report = run_suite_class(suite, nb_threads=2, worker_type="process")
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_3"], failed=["suite.test_2"])
+    test_1 = report.get_test("suite.test_1")
+    assert test_1.get_steps()[0].get_logs()[0].message != "pid %d" % os.getpid()
+    test_3 = report.get_test("suite.test_3")
+    assert test_3.get_steps()[0].get_logs()[0].filename == "attachments/0001_foo.txt"
+
+
+def test_run_in_worker_processes_with_fixtures():
+    @lcc.fixture(scope="session")
+    def session_fixt():
+        return 1
+
+    @lcc.fixture(scope="suite")
+    def suite_fixt(session_fixt):
+        return session_fixt + 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, suite_fixt):
+            lcc.log_info(str(suite_fixt))
+
+    report = run_suite_class(suite, fixtures=(session_fixt, suite_fixt), worker_type="process")
+
+    assert_test_passed(report)
+    assert get_last_log(report).message == "2"
+
+
+
+def test_run_in_worker_processes_setups_are_only_run_by_workers(tmpdir):
+    setups_path = tmpdir.join("setups").strpath
+
+    def record_setup(name):
+        with open(setups_path, "a") as fh:
+            fh.write("%s %d\n" % (name, os.getpid()))
+
+    @lcc.fixture(scope="session")
+    def session_fixt():
+        record_setup("session_fixt")
+
+    @lcc.suite()
+    class suite:
+        def setup_suite(self, session_fixt):
+            record_setup("setup_suite")
+            lcc.log_info("setup_suite")
+
+        @lcc.test()
+        @lcc.parametrized({"value": i} for i in range(6))
+        def test(self, value):
+            time.sleep(0.05)
+
+    report = run_suite_class(suite, fixtures=(session_fixt,), nb_threads=3, worker_type="process")
+
+    assert_test_statuses(report, passed=["suite.test_%d" % (i + 1) for i in range(6)])
+    with open(setups_path) as fh:
+        setups = fh.read().splitlines()
+    worker_pids = {setup.split()[1] for setup in setups}
+    assert str(os.getpid()) not in worker_pids
+    # each worker process having run tests has run each setup once, the setup is reported once
+    assert sorted(setups) == sorted(
+        "%s %s" % (name, pid) for name in ("session_fixt", "setup_suite") for pid in worker_pids
+    )
+    suite_setup = report.get_suite("suite").suite_setup
+    assert [log.message for step in suite_setup.get_steps() for log in step.get_logs()] == ["setup_suite"]
+
+def test_run_in_worker_processes_abort_suite():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            raise lcc.AbortSuite("this is the end")
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    report = run_suite_class(suite, worker_type="process")
+
+    assert_test_statuses(report, failed=["suite.test_1"], skipped=["suite.test_2"])
+
+
+def test_run_in_worker_processes_crash():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            os._exit(42)
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    report = run_suite_class(suite, worker_type="process")
+
+    assert_test_statuses(report, failed=["suite.test_1"], passed=["suite.test_2"])
+    test_1 = report.get_test("suite.test_1")
+    assert "exited unexpectedly with code 42" in test_1.get_steps()[-1].get_logs()[-1].message
+
+
+def test_run_in_worker_processes_reuse_workers():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            lcc.log_info(str(os.getpid()))
+
+        @lcc.test()
+        def test_2(self):
+            lcc.log_info(str(os.getpid()))
+
+        @lcc.test()
+        def test_3(self):
+            lcc.log_info(str(os.getpid()))
+
+    report = run_suite_class(suite, worker_type="process")
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_2", "suite.test_3"])
+    pids = {
+        report.get_test(path).get_steps()[0].get_logs()[0].message
+        for path in ("suite.test_1", "suite.test_2", "suite.test_3")
+    }
+    assert len(pids) == 1
+    assert str(os.getpid()) not in pids
+
+
+def test_run_in_worker_processes_concurrent_tests(tmpdir):
+    def wait_for_each_other(name, other_name):
+        open(tmpdir.join(name).strpath, "w").close()
+        while not tmpdir.join(other_name).exists():
+            time.sleep(0.01)
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            wait_for_each_other("test_1", "test_2")
+            for i in range(10):
+                lcc.set_step("step %d" % i)
+                lcc.log_info("test_1")
+                time.sleep(0.01)
+                lcc.log_info("test_1")
+
+        @lcc.test()
+        def test_2(self):
+            wait_for_each_other("test_2", "test_1")
+            for i in range(10):
+                lcc.set_step("step %d" % i)
+                lcc.log_info("test_2")
+                time.sleep(0.01)
+                lcc.log_info("test_2")
+
+    report = run_suite_class(suite, nb_threads=2, worker_type="process")
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_2"])
+    for name in "test_1", "test_2":
+        steps = report.get_test("suite.%s" % name).get_steps()
+        assert len(steps) == 10
+        assert all(log.message == name for step in steps for log in step.get_logs())
+
+
+def test_run_in_worker_processes_stop_on_failure_cancels_running_tests(tmpdir):
+    test_2_started = tmpdir.join("test_2_started").strpath
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            while not os.path.exists(test_2_started):
+                time.sleep(0.01)
+            lcc.log_error("something goes wrong")
+
+        @lcc.test()
+        def test_2(self):
+            open(test_2_started, "w").close()
+            for _ in range(500):
+                lcc.log_info("still running")
+                time.sleep(0.01)
+
+    report = run_suite_class(suite, stop_on_failure=True, nb_threads=2, worker_type="process")
+
+    assert_test_statuses(report, failed=["suite.test_1", "suite.test_2"])
+    test_2 = report.get_test("suite.test_2")
+    assert test_2.status_details == CANCELLED_STATUS_DETAILS
+    assert "cancelled" in test_2.get_steps()[-1].get_logs()[-1].message
+
+
+def test_run_in_worker_processes_per_thread_fixture():
+    @lcc.fixture(scope="session", per_thread=True)
+    def fixt():
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self, fixt):
+            pass
+
+    with pytest.raises(LemoncheesecakeException, match="Per-thread fixture 'fixt'"):
+        run_suite_class(suite, fixtures=(fixt,), worker_type="process")
+
+
+def test_run_with_durations():
+    executed_tests = []
+
+    @lcc.suite("suite")
+    class suite:
+        @lcc.test("test_1")
+        def test_1(self):
+            executed_tests.append("test_1")
+
+        @lcc.test("test_2")
+        def test_2(self):
+            executed_tests.append("test_2")
+
+        @lcc.test("test_3")
+        def test_3(self):
+            executed_tests.append("test_3")
+
+    durations = Durations({"suite.test_1": 1.0, "suite.test_2": 3.0, "suite.test_3": 2.0})
+    report = run_suite_class(suite, durations=durations)
+
+    assert_test_statuses(report, passed=("suite.test_1", "suite.test_2", "suite.test_3"))
+    assert executed_tests == ["test_2", "test_3", "test_1"]
+
+
+def test_run_async_test():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        async def test(self):
+            await asyncio.sleep(0)
+            lcc.set_step("some step")
+            check_that("value", 1, equal_to(1))
+
+    report = run_suite_class(suite)
+
+    assert_test_passed(report)
+    assert report.get_test("suite.test").get_steps()[-1].description == "some step"
+
+
+def test_run_async_test_failure():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        async def test(self):
+            await asyncio.sleep(0)
+            check_that("value", 1, equal_to(2))
+
+    report = run_suite_class(suite)
+
+    assert_test_failed(report)
+
+
+def test_run_async_test_exception():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        async def test(self):
+            await asyncio.sleep(0)
+            raise Exception("error")
+
+    report = run_suite_class(suite)
+
+    assert_test_failed(report)
+    assert "error" in get_last_log(report).message
+
+
+def test_run_async_tests_concurrently():
+    running = []
+    max_running = []
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"value": i} for i in range(10))
+        async def test(self, value):
+            running.append(value)
+            max_running.append(len(running))
+            lcc.log_info("before %d" % value)
+            await asyncio.sleep(0.05)
+            lcc.log_info("after %d" % value)
+            running.remove(value)
+
+    report = run_suite_class(suite, async_concurrency=5)
+
+    assert_test_statuses(report, passed=["suite.test_%d" % (i + 1) for i in range(10)])
+    assert max(max_running) == 5
+    # each test logs into its own test despite being interleaved with other tests
+    for i in range(10):
+        logs = report.get_test("suite.test_%d" % (i + 1)).get_steps()[0].get_logs()
+        assert [log.message for log in logs] == ["before %d" % i, "after %d" % i]
+
+
+def test_run_async_tests_without_concurrency():
+    running = []
+    max_running = []
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"value": i} for i in range(3))
+        async def test(self, value):
+            running.append(value)
+            max_running.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(value)
+
+    report = run_suite_class(suite)
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_2", "suite.test_3"])
+    assert max(max_running) == 1
+
+
+
+def test_run_async_and_sync_tests_within_threads_capacity():
+    running = []
+    max_running = []
+
+    def enter(value):
+        running.append(value)
+        max_running.append(len(running))
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"value": i} for i in range(3))
+        async def async_test(self, value):
+            enter("async %d" % value)
+            await asyncio.sleep(0.02)
+            running.remove("async %d" % value)
+
+        @lcc.test()
+        @lcc.parametrized({"value": i} for i in range(3))
+        def sync_test(self, value):
+            enter("sync %d" % value)
+            time.sleep(0.02)
+            running.remove("sync %d" % value)
+
+    report = run_suite_class(suite, nb_threads=2)
+
+    assert_test_statuses(report, passed=[test.path for test in report.all_tests()])
+    assert max(max_running) == 2
+
+
+def test_is_run_parallelized():
+    @lcc.suite()
+    class sync_suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    @lcc.suite()
+    class async_suite:
+        @lcc.test()
+        async def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    sync_suites = [load_suite_from_class(sync_suite)]
+    async_suites = [load_suite_from_class(async_suite)]
+
+    assert not runner.is_run_parallelized(sync_suites)
+    assert runner.is_run_parallelized(sync_suites, nb_threads=2)
+    assert not runner.is_run_parallelized(sync_suites, async_concurrency=10)
+    assert not runner.is_run_parallelized(async_suites)
+    assert runner.is_run_parallelized(async_suites, async_concurrency=10)
+    assert not runner.is_run_parallelized(async_suites, worker_type="process", async_concurrency=10)
+
+def test_run_async_fixtures():
+    marker = []
+
+    @lcc.fixture(scope="session")
+    async def session_fixt():
+        lcc.log_info("session_fixt setup")
+        marker.append("session_fixt setup")
+        yield 1
+        marker.append("session_fixt teardown")
+
+    @lcc.fixture(scope="suite")
+    async def suite_fixt(session_fixt):
+        await asyncio.sleep(0)
+        return session_fixt + 1
+
+    @lcc.fixture()
+    async def test_fixt(suite_fixt):
+        marker.append("test_fixt setup")
+        yield suite_fixt + 1
+        marker.append("test_fixt teardown")
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        async def async_test(self, test_fixt):
+            marker.append(test_fixt)
+
+        @lcc.test()
+        def sync_test(self, test_fixt):
+            marker.append(test_fixt)
+
+    report = run_suite_class(suite, fixtures=(session_fixt, suite_fixt, test_fixt))
+
+    assert_test_statuses(report, passed=["suite.async_test", "suite.sync_test"])
+    assert marker == [
+        "session_fixt setup",
+        "test_fixt setup", 3, "test_fixt teardown",
+        "test_fixt setup", 3, "test_fixt teardown",
+        "session_fixt teardown"
+    ]
+    assert report.test_session_setup.get_steps()[0].get_logs()[0].message == "session_fixt setup"
+
+
+def test_run_async_fixture_shares_event_loop_with_async_tests():
+    loops = []
+
+    @lcc.fixture(scope="session")
+    async def fixt():
+        loops.append(asyncio.get_running_loop())
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        async def test(self, fixt):
+            loops.append(asyncio.get_running_loop())
+
+    report = run_suite_class(suite, fixtures=(fixt,))
+
+    assert_test_passed(report)
+    assert loops[0] is loops[1]
+
+
+def test_run_async_tests_with_async_per_thread_fixture():
+    marker = []
+
+    @lcc.fixture(scope="session", per_thread=True)
+    async def per_thread_fixt():
+        await asyncio.sleep(0.01)
+        marker.append("setup")
+        yield 1
+        marker.append("teardown")
+
+    @lcc.fixture()
+    async def test_fixt(per_thread_fixt):
+        return per_thread_fixt + 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"value": i} for i in range(3))
+        async def test(self, value, per_thread_fixt, test_fixt):
+            marker.append((per_thread_fixt, test_fixt))
+
+    report = run_suite_class(suite, fixtures=(per_thread_fixt, test_fixt), async_concurrency=3)
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_2", "suite.test_3"])
+    # the async tests, run concurrently by the event loop thread, share the same setup of the fixture
+    assert marker == ["setup", (1, 2), (1, 2), (1, 2), "teardown"]
+
+
+def test_run_async_test_in_worker_processes():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        async def test(self):
+            await asyncio.sleep(0)
+            lcc.log_info("pid %d" % os.getpid())
+
+    report = run_suite_class(suite, worker_type="process")
+
+    assert_test_passed(report)
+    assert get_last_log(report).message != "pid %d" % os.getpid()
+
+
+def _make_concurrency_probe():
+    lock = threading.Lock()
+    running = []
+    max_running = []
+
+    def probe():
+        with lock:
+            running.append(1)
+            max_running.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    return probe, max_running
+
+
+def test_run_with_exclusive_resource():
+    probe, max_running = _make_concurrency_probe()
+    others = []
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.resource("db", exclusive=True)
+        def test_1(self):
+            probe()
+
+        @lcc.test()
+        @lcc.resource("db", exclusive=True)
+        def test_2(self):
+            probe()
+
+        @lcc.test()
+        @lcc.resource("db", exclusive=True)
+        def test_3(self):
+            probe()
+
+        @lcc.test()
+        def test_4(self):
+            others.append(1)
+
+    report = run_suite_class(suite, nb_threads=4)
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_2", "suite.test_3", "suite.test_4"])
+    assert max(max_running) == 1
+    assert others == [1]
+
+
+def test_run_with_suite_resource_max_concurrent():
+    probe, max_running = _make_concurrency_probe()
+
+    @lcc.suite()
+    @lcc.resource("api", max_concurrent=2)
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(6))
+        def test(self, i):
+            probe()
+
+    report = run_suite_class(suite, nb_threads=4)
+
+    assert_test_statuses(report, passed=["suite.test_%d" % i for i in range(1, 7)])
+    assert max(max_running) == 2
+
+
+def test_run_with_suite_not_parallel():
+    probe, max_running = _make_concurrency_probe()
+    other_probe, other_max_running = _make_concurrency_probe()
+
+    @lcc.suite(parallel=False)
+    class serial_suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(4))
+        def test(self, i):
+            probe()
+
+    @lcc.suite()
+    class other_suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(4))
+        def test(self, i):
+            other_probe()
+
+    report = run_suite_classes([serial_suite, other_suite], nb_threads=4)
+
+    assert report.is_successful()
+    assert max(max_running) == 1
+    assert max(other_max_running) > 1
+
+
+def test_run_with_suite_max_workers_including_sub_suites():
+    probe, max_running = _make_concurrency_probe()
+
+    @lcc.suite(max_workers=2)
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(3))
+        def test(self, i):
+            probe()
+
+        @lcc.suite()
+        class sub_suite:
+            @lcc.test()
+            @lcc.parametrized({"i": i} for i in range(3))
+            def test(self, i):
+                probe()
+
+    report = run_suite_class(suite, nb_threads=6)
+
+    assert report.is_successful()
+    assert max(max_running) == 2
+
+
+def test_batch_test_tasks():
+    @lcc.fixture()
+    def fixt():
+        return 1
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(5))
+        def test(self, i):
+            pass
+
+        @lcc.test()
+        def test_with_fixture(self, fixt):
+            pass
+
+        @lcc.test()
+        async def test_async(self):
+            pass
+
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(2))
+        def other_test(self, i):
+            pass
+
+    suite = load_suite_from_class(suite)
+    test_tasks = [runner.TestTask(test, None) for test in suite.get_tests()]
+    tasks = runner.batch_test_tasks(test_tasks, 3, unbatchable_test_paths={"suite.other_test_2"})
+
+    def get_paths(task):
+        if isinstance(task, runner.TestBatchTask):
+            return [test_task.test.path for test_task in task.test_tasks]
+        else:
+            return task.test.path
+
+    assert list(map(get_paths, tasks)) == [
+        ["suite.test_1", "suite.test_2", "suite.test_3"],
+        ["suite.test_4", "suite.test_5"],
+        "suite.test_with_fixture",
+        "suite.test_async",
+        "suite.other_test_1",
+        "suite.other_test_2"
+    ]
+
+
+def test_run_with_batch_size():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(10))
+        def test(self, i):
+            if i == 3:
+                lcc.log_error("failure")
+            else:
+                lcc.log_info("test %d" % i)
+
+        @lcc.suite()
+        class sub_suite:
+            @lcc.test()
+            def test(self):
+                pass
+
+    report = run_suite_class(suite, nb_threads=2, batch_size=4)
+
+    assert_test_statuses(
+        report,
+        passed=["suite.test_%d" % i for i in range(1, 11) if i != 4] + ["suite.sub_suite.test"],
+        failed=["suite.test_4"]
+    )
+    assert report.get_test("suite.test_2").get_steps()[0].get_logs()[0].message == "test 1"
+
+
+
+def test_run_with_batch_size_and_unexpected_exception(monkeypatch):
+    prepare_test_args = runner.TestTask._prepare_test_args
+
+    def buggy_prepare_test_args(test, scheduled_fixtures):
+        if test.name == "test_2":
+            raise RuntimeError("bug")
+        return prepare_test_args(test, scheduled_fixtures)
+
+    monkeypatch.setattr(runner.TestTask, "_prepare_test_args", staticmethod(buggy_prepare_test_args))
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(4))
+        def test(self, i):
+            pass
+
+    report = run_suite_class(suite, batch_size=4)
+
+    assert_test_statuses(report, passed=["suite.test_1", "suite.test_3", "suite.test_4"], failed=["suite.test_2"])
+    assert "bug" in report.get_test("suite.test_2").get_steps()[-1].get_logs()[-1].message
+
+def test_run_with_batch_size_and_stop_on_failure():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(4))
+        def test(self, i):
+            if i == 1:
+                lcc.log_error("failure")
+
+    report = run_suite_class(suite, stop_on_failure=True, batch_size=4)
+
+    assert_test_statuses(
+        report, passed=["suite.test_1"], failed=["suite.test_2"], skipped=["suite.test_3", "suite.test_4"]
+    )
+
+
+def test_run_with_batch_size_and_test_dependencies():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.parametrized({"i": i} for i in range(3))
+        def test(self, i):
+            if i == 0:
+                lcc.log_error("failure")
+
+        @lcc.test()
+        @lcc.depends_on("suite.test_1")
+        def dependent_test(self):
+            pass
+
+    report = run_suite_class(suite, batch_size=10)
+
+    assert_test_statuses(
+        report, passed=["suite.test_2", "suite.test_3"], failed=["suite.test_1"], skipped=["suite.dependent_test"]
+    )
+
+
+def test_run_with_test_timeout():
+    release = threading.Event()
+    released = threading.Event()
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.timeout(0.2)
+        def stuck_test(self):
+            lcc.log_info("before")
+            release.wait()
+            lcc.log_info("after")
+            released.set()
+
+        @lcc.test()
+        def test(self):
+            pass
+
+    try:
+        report = run_suite_class(suite)
+    finally:
+        release.set()
+    released.wait(5)
+
+    assert_test_statuses(report, passed=["suite.test"], failed=["suite.stuck_test"])
+    test = report.get_test("suite.stuck_test")
+    assert [log.message for log in test.get_steps()[-2].get_logs()] == ["before"]
+    timeout_log = test.get_steps()[-1].get_logs()[0]
+    assert timeout_log.message.startswith("The test has timed out after 0.2 seconds")
+    assert "release.wait()" in timeout_log.message
+
+
+def test_run_with_default_test_timeout():
+    release = threading.Event()
+
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def stuck_test(self):
+            release.wait()
+
+        @lcc.test()
+        @lcc.timeout(10)
+        def test(self):
+            time.sleep(0.3)
+
+    try:
+        report = run_suite_class(suite, nb_threads=2, test_timeout=0.2)
+    finally:
+        release.set()
+
+    assert_test_statuses(report, passed=["suite.test"], failed=["suite.stuck_test"])
+
+
+def test_run_async_with_test_timeout():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.timeout(0.2)
+        async def stuck_test(self):
+            await asyncio.sleep(10)
+
+    report = run_suite_class(suite, async_concurrency=2)
+
+    assert_test_statuses(report, failed=["suite.stuck_test"])
+
+
+
+def test_run_async_with_test_timeout_runs_teardown():
+    teardowns = []
+
+    @lcc.fixture()
+    async def fixt():
+        yield
+        teardowns.append("fixt")
+
+    @lcc.suite()
+    class suite:
+        def teardown_test(self, test, status):
+            teardowns.append("teardown_test %s" % status)
+
+        @lcc.test()
+        @lcc.timeout(0.2)
+        async def stuck_test(self, fixt):
+            await asyncio.sleep(10)
+
+    report = run_suite_class(suite, fixtures=(fixt,), async_concurrency=2)
+
+    assert_test_statuses(report, failed=["suite.stuck_test"])
+    assert teardowns == ["fixt", "teardown_test failed"]
+    assert "timed out" in report.get_test("suite.stuck_test").get_steps()[0].get_logs()[0].message
+
+def test_run_in_worker_processes_with_test_timeout():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.timeout(0.2)
+        def stuck_test(self):
+            time.sleep(10)
+
+        @lcc.test()
+        def test(self):
+            pass
+
+    report = run_suite_class(suite, worker_type="process")
+
+    # the worker process killed on timeout has been replaced to run the other test
+    assert_test_statuses(report, passed=["suite.test"], failed=["suite.stuck_test"])
+    assert "timeout" in report.get_test("suite.stuck_test").get_steps()[-1].get_logs()[0].message
+
+
+def test_run_task_runs():
+    @lcc.suite()
+    class suite:
+        def setup_suite(self):
+            pass
+
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        @lcc.depends_on("suite.test_1")
+        def test_2(self):
+            pass
+
+    report = run_suite_class(suite, nb_threads=2)
+
+    task_runs = {task_run.name: task_run for task_run in report.task_runs}
+    assert sorted(task_runs) == [
+        "suite setup suite", "suite teardown suite", "test suite.test_1", "test suite.test_2"
+    ]
+    setup_index = report.task_runs.index(task_runs["suite setup suite"])
+    test_1_index = report.task_runs.index(task_runs["test suite.test_1"])
+    assert task_runs["test suite.test_1"].dependencies == [setup_index]
+    assert task_runs["test suite.test_2"].dependencies == sorted([setup_index, test_1_index])
+    for task_run in report.task_runs:
+        assert task_run.worker is not None
+        assert task_run.ready_time <= task_run.dispatch_time <= task_run.start_time <= task_run.end_time
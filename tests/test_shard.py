@@ -0,0 +1,245 @@
+import pytest
+
+import lemoncheesecake.api as lcc
+from lemoncheesecake.shard import parse_shard, split_tests_into_shards, get_shard_suites
+from lemoncheesecake.suite import load_suites_from_classes, resolve_tests_dependencies
+from lemoncheesecake.history import Durations
+from lemoncheesecake.testtree import flatten_tests
+from lemoncheesecake.exceptions import LemoncheesecakeException
+
+from helpers.runner import generate_project, run_main
+from helpers.cli import assert_run_output, cmdout
+from helpers.utils import tmp_cwd
+
+
+def _split(suite_classes, nb_shards, durations=None):
+    suites = load_suites_from_classes(suite_classes)
+    resolve_tests_dependencies(suites, suites)
+    return [[test.path for test in shard] for shard in split_tests_into_shards(suites, nb_shards, durations)]
+
+
+def test_parse_shard():
+    assert parse_shard("3/8") == (3, 8)
+
+
+@pytest.mark.parametrize("shard", ("foo", "1", "a/2", "0/2", "3/2", "1/0"))
+def test_parse_shard_invalid(shard):
+    with pytest.raises(LemoncheesecakeException, match="Invalid shard"):
+        parse_shard(shard)
+
+
+def test_split_by_test_count():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+        @lcc.test()
+        def test_4(self):
+            pass
+
+        @lcc.test()
+        def test_5(self):
+            pass
+
+    assert _split([suite], 2) == [
+        ["suite.test_1", "suite.test_3", "suite.test_5"],
+        ["suite.test_2", "suite.test_4"]
+    ]
+
+
+def test_split_by_durations():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+        @lcc.test()
+        def test_4(self):
+            pass
+
+    durations = Durations({"suite.test_1": 10.0, "suite.test_2": 1.0, "suite.test_3": 2.0, "suite.test_4": 3.0})
+
+    assert _split([suite], 2, durations) == [
+        ["suite.test_1"],
+        ["suite.test_2", "suite.test_3", "suite.test_4"]
+    ]
+
+
+def test_split_with_empty_durations():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    assert _split([suite], 2, Durations()) == [["suite.test_1"], ["suite.test_2"]]
+
+
+def test_split_keeps_dependent_tests_together():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        @lcc.depends_on("suite.test_1")
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+        @lcc.test()
+        @lcc.depends_on("suite.test_2")
+        def test_4(self):
+            pass
+
+    assert _split([suite], 2) == [
+        ["suite.test_1", "suite.test_2", "suite.test_4"],
+        ["suite.test_3"]
+    ]
+
+
+def test_split_keeps_tests_of_suite_with_setup_together():
+    @lcc.suite()
+    class suite_a:
+        def setup_suite(self):
+            pass
+
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    @lcc.suite()
+    class suite_b:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    assert _split([suite_a, suite_b], 2) == [
+        ["suite_a.test_1", "suite_a.test_2"],
+        ["suite_b.test_1", "suite_b.test_2"]
+    ]
+
+
+def test_split_covers_all_tests():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.test()
+        def test_3(self):
+            pass
+
+    shards = _split([suite], 5)
+
+    assert sorted(path for shard in shards for path in shard) == ["suite.test_1", "suite.test_2", "suite.test_3"]
+    assert shards == _split([suite], 5)
+
+
+def test_get_shard_suites():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    suites = load_suites_from_classes([suite])
+
+    shard_suites = get_shard_suites(suites, suites, (2, 2))
+
+    assert [test.path for test in flatten_tests(shard_suites)] == ["suite.test_2"]
+
+
+def test_get_shard_suites_empty_shard():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test(self):
+            pass
+
+    suites = load_suites_from_classes([suite])
+
+    assert get_shard_suites(suites, suites, (2, 2)) == []
+
+
+TEST_MODULE = """import lemoncheesecake.api as lcc
+
+@lcc.suite("My Suite")
+class mysuite:
+    @lcc.test("My Test 1")
+    def mytest1(self):
+        pass
+
+    @lcc.test("My Test 2")
+    def mytest2(self):
+        pass
+
+"""
+
+
+@pytest.fixture()
+def project(tmp_cwd):
+    generate_project(tmp_cwd, "mysuite", TEST_MODULE)
+
+
+def test_run_first_shard(project, cmdout):
+    assert run_main(["run", "--shard", "1/2"]) == 0
+    assert_run_output(cmdout, "mysuite", successful_tests=["mytest1"])
+
+
+def test_run_second_shard(project, cmdout):
+    assert run_main(["run", "--shard", "2/2"]) == 0
+    assert_run_output(cmdout, "mysuite", successful_tests=["mytest2"])
+
+
+def test_run_shard_invalid(project):
+    assert "Invalid shard" in run_main(["run", "--shard", "3/2"])
+
+
+def test_run_empty_shard(project, cmdout):
+    assert run_main(["run", "--shard", "3/3"]) == 0
+    cmdout.assert_substrs_anywhere(["Shard 3/3 does not contain any test."])
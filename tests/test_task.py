@@ -1,10 +1,14 @@
+import asyncio
+import queue
 import time
 from functools import reduce
 import re
+import threading
 
 import pytest
 
-from lemoncheesecake.task import BaseTask, TaskContext, run_tasks, check_task_dependencies, \
+from lemoncheesecake.task import BaseTask, TaskContext, TaskScheduler, run_tasks, check_tasks_dependencies, \
+    order_tasks_by_longest_path, abandon_task, run_task, \
     TaskResultSuccess, TaskResultFailure
 from lemoncheesecake.exceptions import LemoncheesecakeException, TaskFailure
 
@@ -190,46 +194,366 @@ def test_run_tasks_using_on_completion_dependency_5():
     assert c.skipped
 
 
-def test_check_task_dependencies_ok():
+def test_check_tasks_dependencies_ok():
     a = DummyTask("a", 1, [])
     b = DummyTask("b", 2, [a])
 
-    check_task_dependencies(b)
+    check_tasks_dependencies([b])
 
 
-def test_check_task_dependencies_ok_complex():
+def test_check_tasks_dependencies_ok_complex():
     a = DummyTask("a", 1, [])
     b = DummyTask("b", 2, [a])
     c = DummyTask("c", 3, [a])
     d = DummyTask("d", 4, [b, c])
 
-    check_task_dependencies(d)
+    check_tasks_dependencies([d])
 
 
-def test_check_task_dependencies_ko_direct_dependency():
+def test_check_tasks_dependencies_ko_direct_dependency():
     a = DummyTask("a", 1, [])
     b = DummyTask("b", 2, [a])
     a.on_success_dependencies.append(b)
 
     with pytest.raises(AssertionError, match="circular dependency"):
-        check_task_dependencies(b)
+        check_tasks_dependencies([b])
 
 
-def test_check_task_dependencies_ko_indirect_dependency():
+def test_check_tasks_dependencies_ko_indirect_dependency():
     a = DummyTask("a", 1, [])
     b = DummyTask("b", 2, [a])
     c = DummyTask("c", 3, [b])
     a.on_success_dependencies.append(c)
 
     with pytest.raises(AssertionError, match="circular dependency"):
-        check_task_dependencies(c)
+        check_tasks_dependencies([c])
 
 
-def test_check_task_dependencies_ko_indirect_dependency_2():
+def test_check_tasks_dependencies_ko_indirect_dependency_2():
     a = DummyTask("a", 1, [])
     b = DummyTask("b", 2, [a])
     c = DummyTask("c", 3, [b])
     a.on_success_dependencies.append(b)
 
     with pytest.raises(AssertionError, match="circular dependency"):
-        check_task_dependencies(c)
+        check_tasks_dependencies([c])
+
+
+def test_check_tasks_dependencies_ko_reports_cycle():
+    a = DummyTask("a", 1, [])
+    b = DummyTask("b", 2, [a])
+    c = DummyTask("c", 3, [b])
+    d = DummyTask("d", 4, [c])
+    a.on_completion_dependencies.append(c)
+
+    with pytest.raises(AssertionError, match=re.escape("<task c> -> <task b> -> <task a> -> <task c>")):
+        check_tasks_dependencies([d])
+
+
+def test_check_tasks_dependencies_deep_graph():
+    # a long chain of "diamonds": walking every path of such a graph would never end
+    tasks = [DummyTask("root", 1)]
+    for i in range(1000):
+        left = DummyTask("left %d" % i, 1, [tasks[-1]])
+        right = DummyTask("right %d" % i, 1, [tasks[-1]])
+        tasks.extend((left, right, DummyTask("join %d" % i, 1, [left, right])))
+
+    check_tasks_dependencies(tasks)
+
+
+def test_task_scheduler_ready_tasks():
+    a = DummyTask("a", 1)
+    b = DummyTask("b", 1, [a])
+    c = DummyTask("c", 1, on_completion_dependencies=[a])
+    d = DummyTask("d", 1, [b, c])
+    e = DummyTask("e", 1)
+
+    scheduler = TaskScheduler((a, b, c, d, e))
+    assert scheduler.pop_ready_tasks(1) == [a]
+    assert scheduler.pop_ready_tasks(10) == [e]
+    assert not scheduler.has_ready_tasks()
+
+    scheduler.mark_task_as_completed(a)
+    assert scheduler.pop_ready_tasks(10) == [b, c]
+
+    scheduler.mark_task_as_completed(c)
+    assert not scheduler.has_ready_tasks()
+    scheduler.mark_task_as_completed(b)
+    assert scheduler.pop_ready_tasks(10) == [d]
+
+
+def test_task_scheduler_pop_remaining_tasks():
+    a = DummyTask("a", 1)
+    b = DummyTask("b", 1, [a])
+    c = DummyTask("c", 1)
+    d = DummyTask("d", 1, [c])
+
+    scheduler = TaskScheduler((a, b, c, d))
+    assert scheduler.pop_ready_tasks(1) == [a]
+    assert scheduler.pop_remaining_tasks() == [b, c, d]
+
+    # completing a task does not release tasks that have already been popped
+    scheduler.mark_task_as_completed(a)
+    assert not scheduler.has_ready_tasks()
+
+
+class ResourceTask(DummyTask):
+    def __init__(self, name, resources, on_success_dependencies=None):
+        DummyTask.__init__(self, name, 1, on_success_dependencies)
+        self.resources = resources
+
+    def get_resources(self):
+        return self.resources
+
+
+def test_task_scheduler_exclusive_resource():
+    a = ResourceTask("a", {"db": 1})
+    b = ResourceTask("b", {"db": None})
+    c = ResourceTask("c", {})
+    d = ResourceTask("d", {"db": None})
+
+    scheduler = TaskScheduler((a, b, c, d))
+    assert scheduler.pop_ready_tasks(10) == [a, c]
+
+    scheduler.mark_task_as_completed(a)
+    assert scheduler.pop_ready_tasks(10) == [b, d]
+
+
+def test_task_scheduler_max_concurrent_resource():
+    tasks = [ResourceTask(str(i), {"api": 2}) for i in range(4)]
+
+    scheduler = TaskScheduler(tasks)
+    assert scheduler.pop_ready_tasks(10) == tasks[:2]
+    assert scheduler.pop_ready_tasks(10) == []
+
+    scheduler.mark_task_as_completed(tasks[1])
+    assert scheduler.pop_ready_tasks(10) == [tasks[2]]
+
+
+def test_task_scheduler_resource_limit_of_running_task():
+    a = ResourceTask("a", {"db": None})
+    b = ResourceTask("b", {"db": 1})
+    c = ResourceTask("c", {"db": None})
+
+    scheduler = TaskScheduler((a, b, c))
+    # b needs an exclusive access to "db" while a is using it
+    assert scheduler.pop_ready_tasks(10) == [a, c]
+    scheduler.mark_task_as_completed(a)
+    assert scheduler.pop_ready_tasks(10) == []
+    scheduler.mark_task_as_completed(c)
+    assert scheduler.pop_ready_tasks(10) == [b]
+
+
+def test_task_scheduler_resources_of_remaining_tasks():
+    a = ResourceTask("a", {"db": 1})
+    b = ResourceTask("b", {"db": 1})
+
+    scheduler = TaskScheduler((a, b))
+    assert scheduler.pop_ready_tasks(10) == [a]
+    assert scheduler.pop_remaining_tasks() == [b]
+    scheduler.mark_task_as_completed(b)
+    scheduler.mark_task_as_completed(a)
+
+
+def test_run_tasks_large_number_of_tasks():
+    root = DummyTask("root", 1)
+    tasks = [root] + [DummyTask("task_%d" % i, 1, [root]) for i in range(2000)]
+    tasks.append(DummyTask("last", 1, on_completion_dependencies=tasks[1:]))
+
+    run_tasks(tasks, TaskContext(), nb_threads=4)
+
+    assert all(isinstance(task.result, TaskResultSuccess) for task in tasks)
+    assert tasks[-1].output == 1 + 2000 * 2
+
+
+def test_order_tasks_by_longest_path():
+    setup = BaseTestTask("setup")
+    short = BaseTestTask("short", on_success_dependencies=[setup])
+    long = BaseTestTask("long", on_success_dependencies=[setup])
+    other = BaseTestTask("other")
+    durations = {setup: 1, short: 1, long: 10, other: 5}
+
+    tasks = order_tasks_by_longest_path([other, setup, short, long], lambda task: durations[task])
+
+    assert tasks == [setup, long, other, short]
+
+
+def test_order_tasks_by_longest_path_keep_rank_on_equal_durations():
+    task_1 = BaseTestTask("1")
+    task_2 = BaseTestTask("2", on_success_dependencies=[task_1])
+    task_3 = BaseTestTask("3")
+
+    tasks = order_tasks_by_longest_path([task_1, task_2, task_3], lambda task: 0)
+
+    assert tasks == [task_1, task_2, task_3]
+
+
+class AsyncTask(BaseTestTask):
+    running = []
+    max_running = []
+
+    def is_async(self):
+        return True
+
+    async def run_async(self, context):
+        self.running.append(self)
+        self.max_running.append(len(self.running))
+        await asyncio.sleep(0.01)
+        self.running.remove(self)
+
+
+def test_run_tasks_async():
+    setup = DummyTask("setup", 1)
+    tasks = [AsyncTask(str(i), on_success_dependencies=[setup]) for i in range(10)]
+    teardown = BaseTestTask("teardown", on_completion_dependencies=tasks)
+
+    run_tasks([setup] + tasks + [teardown], TaskContext(), nb_threads=2, async_concurrency=4)
+
+    assert all(isinstance(task.result, TaskResultSuccess) for task in tasks + [teardown])
+    assert max(AsyncTask.max_running) == 4
+
+
+def test_run_tasks_async_failure():
+    class FailingAsyncTask(AsyncTask):
+        async def run_async(self, context):
+            raise TaskFailure("error")
+
+    a = FailingAsyncTask("a")
+    b = DummyTask("b", 1, on_success_dependencies=[a])
+
+    run_tasks([a, b], TaskContext(), async_concurrency=1)
+
+    assert isinstance(a.result, TaskResultFailure)
+    assert b.skipped
+
+
+def test_run_tasks_with_timeout():
+    release = threading.Event()
+
+    class StuckTask(BaseTestTask):
+        def __init__(self, name):
+            BaseTestTask.__init__(self, name)
+            self.stacktrace = None
+
+        def get_timeout(self, context):
+            return 0.1
+
+        def run(self, context):
+            release.wait()
+
+        def abandon(self, context, stacktrace):
+            self.stacktrace = stacktrace
+            raise TaskFailure("timed out")
+
+    a = StuckTask("a")
+    b = DummyTask("b", 1, on_success_dependencies=[a])
+    c = DummyTask("c", 2)
+
+    try:
+        run_tasks([a, b, c], TaskContext(), nb_threads=1)
+    finally:
+        release.set()
+
+    assert isinstance(a.result, TaskResultFailure)
+    assert a.result.reason == "timed out"
+    assert "release.wait()" in a.stacktrace
+    assert b.skipped
+    assert isinstance(c.result, TaskResultSuccess)
+
+
+def test_run_tasks_timeout_starts_with_the_task():
+    class SlowWorkersTask(BaseTestTask):
+        def run(self, context):
+            # the workers are kept busy before running the next task
+            context.run_on_each_worker(lambda: time.sleep(0.3))
+
+    class QuickTask(BaseTestTask):
+        def get_timeout(self, context):
+            return 0.2
+
+        def run(self, context):
+            time.sleep(0.05)
+
+    a = SlowWorkersTask("a")
+    b = QuickTask("b", on_success_dependencies=[a])
+
+    start_cpu_time = time.process_time()
+    run_tasks([a, b], TaskContext(), nb_threads=2)
+
+    assert isinstance(b.result, TaskResultSuccess)
+    # the scheduler does not busy-wait while the task is not started
+    assert time.process_time() - start_cpu_time < 0.2
+
+
+def test_abandon_task_already_completed():
+    a = DummyTask("a", 1)
+    a.result = TaskResultSuccess()
+
+    assert not abandon_task(a, TaskContext(), None)
+    assert isinstance(a.result, TaskResultSuccess)
+    assert not a.abandoned
+
+
+def test_abandoned_task_late_completion_is_dropped():
+    a = DummyTask("a", 1)
+    completed_task_queue = queue.Queue()
+
+    assert abandon_task(a, TaskContext(), None)
+    # the thread that was stuck on the task eventually completes it
+    run_task(a, TaskContext(), completed_task_queue)
+
+    assert isinstance(a.result, TaskResultFailure)
+    assert completed_task_queue.empty()
+
+
+def test_run_tasks_async_with_timeout():
+    class StuckAsyncTask(AsyncTask):
+        def get_timeout(self, context):
+            return 0.1
+
+        async def run_async(self, context):
+            await asyncio.sleep(10)
+
+    a = StuckAsyncTask("a")
+
+    run_tasks([a], TaskContext(), async_concurrency=1)
+
+    assert isinstance(a.result, TaskResultFailure)
+
+
+def test_run_tasks_timing():
+    a = DummyTask("a", 1)
+    b = DummyTask("b", 2, on_success_dependencies=[a])
+    c = DummyTask("c", 3)
+
+    run_tasks([a, b, c], TaskContext(), nb_threads=2)
+
+    for task in a, b, c:
+        assert task.timing.ready_time <= task.timing.dispatch_time <= task.timing.start_time <= task.timing.end_time
+        assert re.match(r"^worker-\d+$", task.timing.worker)
+    assert b.timing.ready_time >= a.timing.end_time
+
+
+def test_run_on_each_worker():
+    threads = set()
+
+    class RunOnEachWorkerTask(BaseTestTask):
+        def run(self, context):
+            context.run_on_each_worker(lambda: threads.add(threading.current_thread().name))
+
+    class SleepingTask(BaseTestTask):
+        def run(self, context):
+            time.sleep(0.2)  # give the other workers the time to call the function
+
+    a = RunOnEachWorkerTask("a")
+    b = SleepingTask("b", on_success_dependencies=[a])
+
+    run_tasks([a, b], TaskContext(), nb_threads=3)
+
+    assert threads == {"worker-1", "worker-2", "worker-3"}
+
+
+def test_run_on_each_worker_outside_of_run_tasks():
+    calls = []
+    TaskContext().run_on_each_worker(lambda: calls.append(1))
+    assert calls == [1]
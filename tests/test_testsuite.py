@@ -9,7 +9,7 @@ Created on Sep 30, 2016
 import pytest
 
 import lemoncheesecake.api as lcc
-from lemoncheesecake.suite import load_suite_from_class, add_test_into_suite, resolve_tests_dependencies
+from lemoncheesecake.suite import load_suite_from_class, add_test_into_suite, resolve_tests_dependencies, Suite
 from lemoncheesecake.exceptions import SuiteLoadingError, ValidationError
 
 from helpers.runner import dummy_test_callback, build_suite_from_module
@@ -471,6 +471,97 @@ def test_resolve_test_dependencies_with_callable():
     assert suite.get_test_by_name("test_2").resolved_dependencies[0].path == "suite.test_1"
 
 
+def test_resolve_test_dependencies_with_tests_with_tag():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        @lcc.tags("mytag")
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+        @lcc.suite()
+        @lcc.tags("mytag")
+        class sub_suite:
+            @lcc.test()
+            def test_3(self):
+                pass
+
+        @lcc.test()
+        @lcc.tags("mytag")
+        @lcc.depends_on(lcc.tests_with_tag("mytag"))
+        def test_4(self):
+            pass
+
+    suite = load_suite_from_class(suite)
+    resolve_tests_dependencies([suite], [suite])
+    assert [test.path for test in suite.get_test_by_name("test_4").resolved_dependencies] == \
+        ["suite.test_1", "suite.sub_suite.test_3"]
+
+
+def test_resolve_test_dependencies_with_tests_in_suite():
+    @lcc.suite()
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.suite()
+        class sub_suite:
+            @lcc.test()
+            def test_2(self):
+                pass
+
+            @lcc.suite()
+            class sub_sub_suite:
+                @lcc.test()
+                def test_3(self):
+                    pass
+
+        @lcc.test()
+        @lcc.depends_on(lcc.tests_in_suite("suite.sub_suite"))
+        def test_4(self):
+            pass
+
+    suite = load_suite_from_class(suite)
+    resolve_tests_dependencies([suite], [suite])
+    assert [test.path for test in suite.get_test_by_name("test_4").resolved_dependencies] == \
+        ["suite.sub_suite.test_2", "suite.sub_suite.sub_sub_suite.test_3"]
+
+
+def test_declarative_test_dependencies_as_callables():
+    @lcc.suite()
+    class suite:
+        @lcc.suite()
+        class sub_suite:
+            @lcc.test()
+            @lcc.tags("mytag")
+            def test(self):
+                pass
+
+    test = load_suite_from_class(suite).get_suites()[0].get_tests()[0]
+    assert lcc.tests_with_tag("mytag")(test)
+    assert not lcc.tests_with_tag("othertag")(test)
+    assert lcc.tests_in_suite("suite")(test)
+    assert lcc.tests_in_suite("suite.sub_suite")(test)
+    assert not lcc.tests_in_suite("suite.sub")(test)
+
+
+def test_resolve_test_dependencies_with_long_chain():
+    suite = Suite(None, "suite", "suite")
+    for i in range(3000):
+        test = lcc.Test("test_%d" % i, "Test %d" % i, dummy_test_callback())
+        if i > 0:
+            test.dependencies.append("suite.test_%d" % (i - 1))
+        suite.add_test(test)
+
+    resolve_tests_dependencies([suite], [suite])
+    assert suite.get_test_by_name("test_2999").resolved_dependencies[0].path == "suite.test_2998"
+
+
 def test_resolve_tests_dependencies_with_unknown_test():
     @lcc.suite()
     class suite:
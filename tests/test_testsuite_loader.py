@@ -481,6 +481,80 @@ def test_load_suite_from_class_with_fixture_dependencies():
     assert fixture_names == ["foo"]
 
 
+def test_load_suite_from_class_with_resources():
+    @lcc.suite()
+    @lcc.resource("db", max_concurrent=2)
+    @lcc.resource("device", exclusive=True)
+    class suite:
+        @lcc.test()
+        @lcc.resource("db", exclusive=True)
+        @lcc.resource("port")
+        def test(self):
+            pass
+
+        @lcc.test()
+        def other_test(self):
+            pass
+
+    suite = load_suite_from_class(suite)
+
+    assert suite.get_resources() == {"db": 2, "device": 1}
+    test, other_test = suite.get_tests()
+    assert test.get_resources() == {"db": 1, "device": 1, "port": None}
+    assert other_test.get_resources() == {"db": 2, "device": 1}
+
+
+def test_load_suite_from_class_with_max_workers():
+    @lcc.suite(max_workers=2)
+    class suite_1:
+        @lcc.test()
+        def test(self):
+            pass
+
+    @lcc.suite(parallel=False)
+    class suite_2:
+        @lcc.test()
+        def test(self):
+            pass
+
+    @lcc.suite()
+    class suite_3:
+        @lcc.test()
+        def test(self):
+            pass
+
+    assert [suite.max_workers for suite in load_suites_from_classes([suite_1, suite_2, suite_3])] == [2, 1, None]
+
+
+def test_suite_with_both_parallel_false_and_max_workers():
+    with pytest.raises(AssertionError):
+        lcc.suite(parallel=False, max_workers=2)
+
+
+def test_load_suite_from_class_with_timeout():
+    @lcc.suite()
+    @lcc.timeout(10)
+    class suite:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        @lcc.timeout(1)
+        def test_2(self):
+            pass
+
+    suite = load_suite_from_class(suite)
+
+    assert suite.get_tests()[0].get_timeout() == 10
+    assert suite.get_tests()[1].get_timeout() == 1
+
+
+def test_resource_with_both_exclusive_and_max_concurrent():
+    with pytest.raises(AssertionError):
+        lcc.resource("db", exclusive=True, max_concurrent=2)
+
+
 def test_load_suite_from_file_with_single_suite(tmpdir):
     file = tmpdir.join("my_suite.py")
     file.write(
@@ -2,7 +2,8 @@ import pytest
 
 import lemoncheesecake.api as lcc
 from lemoncheesecake.suite import load_suites_from_classes, load_suite_from_class
-from lemoncheesecake.testtree import find_suite, find_test, flatten_suites, flatten_tests
+from lemoncheesecake.testtree import find_suite, find_test, flatten_suites, flatten_tests, prioritize_tests, \
+    sort_tests
 
 
 def test_hierarchy():
@@ -389,3 +390,80 @@ def test_pull_test_suite():
 
     assert sub_suite.parent_suite is not None
     assert len(sub_suite.get_tests()) == 1
+
+
+def test_prioritize_tests():
+    @lcc.suite()
+    class suite_1:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    @lcc.suite()
+    class suite_2:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.suite()
+        class sub_suite_1:
+            @lcc.test()
+            def test_1(self):
+                pass
+
+        @lcc.suite()
+        class sub_suite_2:
+            @lcc.test()
+            def test_1(self):
+                pass
+
+            @lcc.test()
+            def test_2(self):
+                pass
+
+    suites = prioritize_tests(
+        load_suites_from_classes([suite_1, suite_2]),
+        lambda test: test.path == "suite_2.sub_suite_2.test_2"
+    )
+
+    assert [test.path for test in flatten_tests(suites)] == [
+        "suite_2.test_1",
+        "suite_2.sub_suite_2.test_2", "suite_2.sub_suite_2.test_1",
+        "suite_2.sub_suite_1.test_1",
+        "suite_1.test_1", "suite_1.test_2"
+    ]
+
+
+def test_sort_tests():
+    @lcc.suite()
+    class suite_1:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.test()
+        def test_2(self):
+            pass
+
+    @lcc.suite()
+    class suite_2:
+        @lcc.test()
+        def test_1(self):
+            pass
+
+        @lcc.suite()
+        class sub_suite:
+            @lcc.test()
+            def test_1(self):
+                pass
+
+    keys = {"suite_1.test_1": 3, "suite_1.test_2": 2, "suite_2.test_1": 4, "suite_2.sub_suite.test_1": 1}
+    suites = sort_tests(load_suites_from_classes([suite_1, suite_2]), lambda test: keys[test.path])
+
+    assert [test.path for test in flatten_tests(suites)] == [
+        "suite_2.test_1", "suite_2.sub_suite.test_1", "suite_1.test_2", "suite_1.test_1"
+    ]